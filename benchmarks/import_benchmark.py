@@ -0,0 +1,38 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Time `import item_tracking` in fresh interpreters, and fail above a budget or if it imports scipy.
+Usage: python benchmarks/import_benchmark.py [--repeat 5] [--budget 500]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = ("import json, sys, time\n"
+          "start = time.perf_counter()\n"
+          "import item_tracking\n"
+          "elapsed = time.perf_counter() - start\n"
+          "print(json.dumps(dict(seconds=elapsed, modules=len(sys.modules),\n"
+          "                      scipy=sorted(m for m in sys.modules if m.split('.')[0] == 'scipy'))))\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--budget", type=float, default=500., help="max import time (ms) of the fastest run")
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+    runs = [json.loads(subprocess.check_output([sys.executable, "-c", SCRIPT], cwd=ROOT, env=env).decode('utf-8'))
+            for _ in range(args.repeat)]
+    best = min(run['seconds'] for run in runs) * 1e3
+    print("import item_tracking: best {:.1f} ms of {} runs, {} modules, scipy modules {}".format(
+        best, args.repeat, runs[0]['modules'], runs[0]['scipy'] or "none"))
+    if best > args.budget or runs[0]['scipy']:
+        sys.exit("import item_tracking over {:.0f} ms or importing scipy".format(args.budget))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Time the matchers of Tracker.matchingDistanceDecider from 10 to 2000 items per frame.
+Usage: python benchmarks/matching_benchmark.py [--seed 0] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # item_tracking of this checkout
+from item_tracking.matching import candidateEdges, greedyMatch, optimalMatch
+
+
+def legacyMatch(distance, thresholdDist):
+    """ former argmin loop of matchingDistanceDecider, for reference """
+    distance = distance.copy()
+    lSize, cSize = distance.shape
+    matched = 0
+    mini = np.nanmin(distance)
+    while mini < thresholdDist:
+        p = np.argmin(distance)
+        l, c = p//cSize, p % cSize
+        distance[l, :] = np.inf
+        distance[:, c] = np.inf
+        matched += 1
+        mini = np.nanmin(distance)
+    return matched
+
+
+def crowdDistance(n, rng, density=1., noise=0.1):
+    """ n items on a square floor of density items per m2, seen again with some noise and dropouts """
+    side = np.sqrt(n / density)
+    tracked = rng.uniform(0, side, (n, 2))
+    new = tracked + rng.normal(0, noise, (n, 2))
+    new = new[rng.permutation(n)[:int(n * 0.95)]]
+    return np.sqrt(((new[:, None, :] - tracked[None, :, :]) ** 2).sum(axis=-1))
+
+
+def timeIt(function, repeat):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=1.)
+    parser.add_argument("--legacy-max", type=int, default=500, help="largest size timed with the former loop")
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(args.seed)
+    print("{:>6} {:>10} {:>12} {:>12} {:>12} {:>16} {:>16}".format(
+        "items", "edges", "legacy (ms)", "greedy (ms)", "optimal (ms)", "greedy pairs/cost", "optimal pairs/cost"))
+    for n in (10, 20, 50, 100, 200, 500, 1000, 2000):
+        distance = crowdDistance(n, rng)
+        rows, cols, costs = candidateEdges(distance, args.threshold)
+        greedy, (gl, gc) = timeIt(lambda: greedyMatch(rows, cols, costs, distance.shape, args.threshold), args.repeat)
+        optimal, (ol, oc) = timeIt(lambda: optimalMatch(rows, cols, costs, distance.shape, args.threshold), args.repeat)
+        legacy = timeIt(lambda: legacyMatch(distance, args.threshold), 1)[0] if n <= args.legacy_max else np.nan
+        print("{:>6} {:>10} {:>12.2f} {:>12.2f} {:>12.2f} {:>7}/{:<8.2f} {:>7}/{:<8.2f}".format(
+            n, len(costs), legacy * 1e3, greedy * 1e3, optimal * 1e3,
+            len(gl), distance[gl, gc].sum(), len(ol), distance[ol, oc].sum()))
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Time independent scenes tracked one after the other in this process, then by a TrackerPool.
+Usage: python benchmarks/pool_benchmark.py [--scenes 8] [--workers 4] [--items 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # item_tracking of this checkout
+from item_tracking import Tracker
+from item_tracking.workers import TrackerPool
+from scenarios import crowdScenario
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenes", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--frames", type=int, default=30)
+    args = parser.parse_args()
+
+    scenes = [crowdScenario(items=args.items, components=5, frames=args.frames, occlusion=0.05, seed=s)
+              for s in range(args.scenes)]
+    start = time.perf_counter()
+    for scenario in scenes:
+        tracker = Tracker()
+        tracker.setParams(thresholdDist=0.5)
+        for frame in scenario:
+            tracker.updateFromArrays(frame.poses, visibility=frame.visibility, timestamp=frame.time)
+    serial = time.perf_counter() - start
+
+    with TrackerPool(range(args.scenes), workers=args.workers, thresholdDist=0.5) as pool:
+        start = time.perf_counter()
+        for f in range(args.frames):
+            pool.update(dict((s, dict(poses=scenario[f].poses, visibility=scenario[f].visibility, timestamp=scenario[f].time))
+                             for s, scenario in enumerate(scenes)))
+        pooled = time.perf_counter() - start
+    print("{} scenes x {} frames: serial {:.1f} frames/s, pool of {} workers {:.1f} frames/s".format(
+        args.scenes, args.frames, args.scenes * args.frames / serial, len(pool.commands), args.scenes * args.frames / pooled))
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Synthetic crowd scenarios: items walking on a floor, seen as a few components each,
+with occlusions, component dropouts and crossing trajectories. A scenario only depends on its parameters and seed.
+"""
+
+import collections
+import numpy as np
+
+
+Frame = collections.namedtuple('Frame', ['time', 'ids', 'poses', 'visibility'])
+
+
+def crowdScenario(items=100, components=5, frames=50, occlusion=0., dropout=0., crossing=0.,
+                  density=0.5, speed=1.2, fps=10., noise=0.02, seed=0):
+    """
+    :param items: number of items in the scene
+    :param components: components per item
+    :param frames: number of frames
+    :param occlusion: probability per frame that a visible item starts being hidden, for 5 frames on average
+    :param dropout: probability that a component of a visible item is not seen
+    :param crossing: fraction of the items walking in pairs toward each other, crossing at mid scenario
+    :param density: items per m2
+    :param speed: mean walking speed (m/s)
+    :param fps: frames per second
+    :param noise: standard deviation of the components positions (m)
+    :param seed: random seed
+    :return: list of Frame, ids being the ground truth item of each row, only the seen items being given
+    """
+    rng = np.random.RandomState(seed)
+    side = np.sqrt(items / density)
+    duration = frames / fps
+    start = np.zeros((items, 3))
+    start[:, :2] = rng.uniform(0, side, (items, 2))
+    heading = rng.uniform(0, 2 * np.pi, items)
+    velocity = np.zeros((items, 3))
+    velocity[:, 0], velocity[:, 1] = np.cos(heading), np.sin(heading)
+    velocity *= rng.normal(speed, 0.2 * speed, (items, 1))
+
+    # crossing pairs meet at the same point at mid scenario
+    pairs = rng.permutation(items)[:2 * int(items * crossing / 2)].reshape(-1, 2)
+    for a, b in pairs.tolist():
+        meeting = start[a] + velocity[a] * duration / 2
+        velocity[b] = -velocity[a]
+        start[b] = meeting - velocity[b] * duration / 2
+
+    offsets = rng.normal(0, 0.3, (items, components, 3))
+    offsets[..., 2] = np.abs(offsets[..., 2]) + np.linspace(0.2, 1.7, components)
+
+    hiddenLeft = np.zeros(items, dtype=np.intp)
+    scenario = []
+    for f in range(frames):
+        t = f / fps
+        starting = (hiddenLeft == 0) & (rng.rand(items) < occlusion)
+        hiddenLeft[starting] = rng.geometric(1 / 5., starting.sum())
+        seen = np.flatnonzero(hiddenLeft == 0)
+        hiddenLeft[hiddenLeft > 0] -= 1
+        barycenters = start[seen] + velocity[seen] * t
+        poses = barycenters[:, None, :] + offsets[seen] + rng.normal(0, noise, (len(seen), components, 3))
+        visibility = rng.rand(len(seen), components) >= dropout
+        detected = visibility.any(axis=1)
+        scenario.append(Frame(t, seen[detected], poses[detected], visibility[detected]))
+    return scenario
@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Time Tracker.updateTracking (or Tracker.updateFromArrays) and its stages on the synthetic scenarios of scenarios.py,
+and check the association quality, so that speed work can not silently break tracking.
+Results are written as JSON, to be compared between commits with --baseline.
+Usage: python benchmarks/tracking_benchmark.py [--only crowd occluded] [--arrays] [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # item_tracking of this checkout
+from item_tracking import Tracker
+from item_tracking.item import ItemHandler
+from item_tracking.profiling import Profiler
+from scenarios import crowdScenario
+
+
+TRACKER_PARAMS = dict(thresholdDist=0.5, time_add=0.2, time_del=1.)
+
+SUITE = [
+    dict(name='small', items=20, components=3),
+    dict(name='crowd', items=300, components=5),
+    dict(name='occluded', items=300, components=5, occlusion=0.05, dropout=0.1),
+    dict(name='crossing', items=300, components=5, crossing=0.5),
+    dict(name='skeletons', items=100, components=15, dropout=0.2),
+    dict(name='smoothed', items=300, components=5, occlusion=0.05,
+         tracker=dict(with_items_pose_smoothing=True, items_pose_smoothing_coeff=0.5,
+                      with_components_pose_smoothing=True, components_pose_smoothing_coeff=0.5)),
+    dict(name='components speeds', items=300, components=5, occlusion=0.05,
+         tracker=dict(compute_speed_from_components_speeds=True)),
+    dict(name='large gated', items=1000, components=5, occlusion=0.05, tracker=dict(gating=Tracker.GRID)),
+    dict(name='fast movers', items=300, components=5, occlusion=0.05, speed=3.),
+    dict(name='fast kalman', items=300, components=5, occlusion=0.05, speed=3.,
+         tracker=dict(with_kalman=True, kalman_gate=11.34)),
+    dict(name='pooled', items=300, components=5, occlusion=0.05, dropout=0.1, tracker=dict(item_pool_size=1000)),
+    dict(name='optimal', items=300, components=5, occlusion=0.05, tracker=dict(matching=Tracker.OPTIMAL)),
+    dict(name='optimal 30 ms budget', items=300, components=5, occlusion=0.05,
+         tracker=dict(matching=Tracker.OPTIMAL, frame_budget_ms=30)),
+]
+
+
+class AssociationMetrics(object):
+    """ MOTA-style counts: an item is found when a confirmed (UPDATE) track is on it, an ID switch when this track changes """
+
+    def __init__(self, items):
+        self.items = items
+        self.lastIds = dict()
+        self.gt = self.found = self.misses = self.idSwitches = 0
+
+    def update(self, gtIds, trackIds, trackStates):
+        confirmed = np.asarray(trackStates) == ItemHandler.UPDATE
+        self.gt += self.items
+        self.found += int(confirmed.sum())
+        self.misses += self.items - int(confirmed.sum())
+        for gt, track in zip(np.asarray(gtIds)[confirmed].tolist(), np.asarray(trackIds)[confirmed].tolist()):
+            if self.lastIds.get(gt, track) != track:
+                self.idSwitches += 1
+            self.lastIds[gt] = track
+
+    def report(self):
+        return dict(gt=self.gt, found=self.found, misses=self.misses, idSwitches=self.idSwitches,
+                    mota=1. - (self.misses + self.idSwitches) / float(max(self.gt, 1)))
+
+
+def runScenario(config, frames, seed, arrays=False):
+    scenario = crowdScenario(items=config['items'], components=config['components'], frames=frames,
+                             occlusion=config.get('occlusion', 0.), dropout=config.get('dropout', 0.),
+                             crossing=config.get('crossing', 0.), speed=config.get('speed', 1.2), seed=seed)
+    clock = [0.]
+    profiler = Profiler()
+    tracker = Tracker()
+    tracker.setParams(nowTime=lambda: clock[0], profiler=profiler, **TRACKER_PARAMS)
+    tracker.setParams(**config.get('tracker', {}))
+    metrics = AssociationMetrics(config['items'])
+    latencies, inputs = [], []
+    for frame in scenario:
+        clock[0] = frame.time
+        n = len(frame.ids)
+        if arrays:
+            start = time.perf_counter()
+            tracks = tracker.updateFromArrays(frame.poses, visibility=frame.visibility, timestamp=frame.time)
+            latencies.append(time.perf_counter() - start)
+            ids, states = tracks.ids[:n], tracks.states[:n]
+        else:
+            start = time.perf_counter()
+            for poses, visibility in zip(frame.poses.tolist(), frame.visibility.tolist()):
+                item = tracker.acquireItem()
+                for k, (pose, visible) in enumerate(zip(poses, visibility)):
+                    if visible:
+                        item.setComponent(k, x=pose[0], y=pose[1], z=pose[2])
+                tracker.addItem(item)
+            inputs.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            tracker.updateTracking()
+            latencies.append(time.perf_counter() - start)
+            tracked = tracker.trackedItems[:n]
+            ids, states = [item.getID() for item in tracked], [item.getState() for item in tracked]
+        metrics.update(frame.ids, ids, states)
+
+    latencies = np.array(latencies)
+    stages = dict()
+    for record in profiler.sink.records():
+        for name, elapsed in record['stages'].items():
+            stages.setdefault(name, []).append(elapsed)
+    detections = sum(len(frame.ids) for frame in scenario)
+    return dict(
+        name=config['name'], config=config, frames=frames, seed=seed, mode='arrays' if arrays else 'items',
+        framesPerSecond=len(latencies) / latencies.sum(), detectionsPerSecond=detections / latencies.sum(),
+        p50=float(np.percentile(latencies, 50)) * 1e3, p99=float(np.percentile(latencies, 99)) * 1e3,
+        inputMean=float(np.mean(inputs)) * 1e3 if inputs else None,
+        stages=dict((name, dict(p50=float(np.percentile(values, 50)) * 1e3, p99=float(np.percentile(values, 99)) * 1e3))
+                    for name, values in stages.items()),
+        quality=metrics.report())
+
+
+def revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.STDOUT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline):
+    """ print the speedups and quality changes of results against baseline, matched by scenario name and mode """
+    old = dict(((result['name'], result['mode']), result) for result in baseline['results'])
+    print("{:<20} {:>8} {:>12} {:>12} {:>14} {:>10}".format("scenario", "mode", "p50 speedup", "p99 speedup", "idSwitches", "mota"))
+    for result in results:
+        before = old.get((result['name'], result['mode']))
+        if before is None:
+            continue
+        print("{:<20} {:>8} {:>12.2f} {:>12.2f} {:>6} -> {:<5} {:>+10.4f}".format(
+            result['name'], result['mode'], before['p50'] / result['p50'], before['p99'] / result['p99'],
+            before['quality']['idSwitches'], result['quality']['idSwitches'],
+            result['quality']['mota'] - before['quality']['mota']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--only", nargs='+', help="names of the scenarios to run, all of them by default")
+    parser.add_argument("--arrays", action='store_true', help="feed the frames to updateFromArrays")
+    parser.add_argument("--output", help="JSON file of the results, printed if not given")
+    parser.add_argument("--baseline", help="JSON results of a former run to compare with")
+    args = parser.parse_args()
+
+    results = []
+    for config in SUITE:
+        if args.only and config['name'] not in args.only:
+            continue
+        result = runScenario(config, args.frames, args.seed, args.arrays)
+        results.append(result)
+        sys.stderr.write("{name:<20} p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  {framesPerSecond:8.1f} frames/s  "
+                         "mota {mota:.4f}  idSwitches {idSwitches}\n".format(mota=result['quality']['mota'],
+                                                                         idSwitches=result['quality']['idSwitches'], **result))
+    report = dict(revision=revision(), python=platform.python_version(), numpy=np.__version__, results=results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(results, json.load(f))
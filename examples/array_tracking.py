@@ -0,0 +1,24 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from item_tracking import Tracker
+import numpy as np
+
+
+if __name__ == "__main__":
+    tracker = Tracker()
+    tracker.setParams(thresholdDist=0.5, time_add=0.2)
+    components_names = ["head", "left_hand", "right_hand"]
+    offsets = np.array([[0, 0, 1.7], [-0.3, 0, 1.], [0.3, 0, 1.]])
+
+    for t in np.arange(0, 1, 0.1):  # 2 items with 3 components moving on the x axis
+        barycenters = np.array([[2 + t, 0, 0], [-t, 1, 0]])
+        poses = barycenters[:, None, :] + offsets[None, :, :]
+        visibility = np.ones(poses.shape[:2], dtype=bool)
+        visibility[1, 2] = t < 0.5  # right hand of the second item hidden after a while
+        tracks = tracker.updateFromArrays(poses, visibility=visibility, component_names=components_names, timestamp=t)
+        print(tracks.ids, tracks.states, tracks.speeds[:, 0])
+
+    # Item objects are only built on request
+    for item in tracker.arrayItems():
+        print(item.getID(), item.x, sorted(item.components))
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+asyncio counterpart of Tracker.track (python 3.6+), not imported by the package.
+"""
+
+import asyncio
+
+
+END = object()
+
+
+class Failure(object):
+    """ exception raised while reading or tracking a frame, given to the consumer """
+
+    def __init__(self, error):
+        self.error = error
+
+
+async def track(tracker, frames, maxsize=2, executor=None):
+    """
+    Read the frames while the previous ones are tracked, in an executor so that the event loop keeps running.
+    Frames waiting to be tracked and results waiting to be consumed are held in queues of maxsize:
+    when the consumer is slow, frames are not read any more. The Item of a waiting result may already be updated by
+    the next frames, the ArrayTracks of array frames are copies.
+    :param tracker: Tracker
+    :param frames: async iterable of detections, see Tracker.trackFrame
+    :param maxsize: size of the frames and results queues
+    :param executor: concurrent.futures executor running Tracker.trackFrame, the default one of the loop if None
+    :return: async generator of the FrameResult of each frame
+    """
+    loop = asyncio.get_running_loop() if hasattr(asyncio, 'get_running_loop') else asyncio.get_event_loop()  # python 3.6
+    inbox, outbox = asyncio.Queue(maxsize), asyncio.Queue(maxsize)
+
+    async def read():
+        try:
+            async for detections in frames:
+                await inbox.put(detections)
+            await inbox.put(END)
+        except Exception as e:
+            await inbox.put(Failure(e))
+
+    async def work():
+        while True:
+            detections = await inbox.get()
+            if detections is END or isinstance(detections, Failure):
+                await outbox.put(detections)
+                return
+            try:
+                result = await loop.run_in_executor(executor, tracker.trackFrame, detections)
+            except Exception as e:
+                await outbox.put(Failure(e))
+                return
+            await outbox.put(result)
+
+    tasks = [asyncio.ensure_future(read()), asyncio.ensure_future(work())]
+    try:
+        while True:
+            result = await outbox.get()
+            if result is END:
+                return
+            if isinstance(result, Failure):
+                raise result.error
+            yield result
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import itertools
+import operator
+import numpy as np
+from .item import Item, Component, reportMalformed
+from .circstats import circmeans, angleDifference
+
+
+def weightedSums(poses, onSight, weights):
+    """
+    Weighted sums accumulated component after component, as Item.setBarycenter.
+    :param poses: (N, K, 3)
+    :param onSight: (N, K) bool
+    :param weights: (N, K)
+    :return: weighted sums (N, 3) of the on sight and set poses, weights sum (N,)
+    """
+    total = np.zeros(poses.shape[:1] + (3,))
+    weight = np.zeros(poses.shape[:1])
+    used = onSight & ~np.isnan(poses).any(axis=2)
+    for k in range(poses.shape[1]):
+        total += np.where(used[:, k, None], poses[:, k] * weights[:, k, None], 0.)
+        weight += np.where(used[:, k], weights[:, k], 0.)
+    return total, weight
+
+
+def barycenters(poses, onSight, weights):
+    """
+    :return: barycenters (N, 3) of weightedSums, nan where no component is on sight, weights sum (N,)
+    """
+    total, weight = weightedSums(poses, onSight, weights)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(weight[:, None] != 0, total / weight[:, None], np.nan), weight
+
+
+def smoothedUpdate(current, previous, smoothed, coeff):
+    """
+    Exponential smoothing of Component.updateSmoothedPose, row by row.
+    :param current: (..., 3) poses
+    :param previous: (..., 3) smoothed poses of the matched previous items
+    :param smoothed: (..., 3) smoothed poses kept when previous is not set
+    :param coeff: scalar or array broadcastable to current
+    """
+    update = coeff * current + (1 - coeff) * previous
+    currentUnset = np.isnan(current).any(axis=-1, keepdims=True)
+    previousUnset = np.isnan(previous).any(axis=-1, keepdims=True)
+    return np.where(currentUnset, previous, np.where(previousUnset, smoothed, update))
+
+
+def gather(objects, attributes):
+    """
+    :param objects: sequence of Item or Component
+    :param attributes: names of the attributes to read
+    :return: (len(objects), len(attributes)) floats, nan for None
+    """
+    get = operator.attrgetter(*attributes) if len(attributes) > 1 else (lambda obj: (getattr(obj, attributes[0]),))
+    try:
+        flat = np.fromiter(itertools.chain.from_iterable(map(get, objects)), float, len(objects) * len(attributes))
+    except TypeError:  # some values are None
+        flat = np.array(list(map(get, objects)), dtype=float)
+    return flat.reshape(len(objects), len(attributes))
+
+
+def packPositions(items, attributes):
+    """
+    :param items: list of Item
+    :param attributes: component attributes to pack
+    :return: (N, S, len(attributes)) values of the s-th component of each item, nan for None,
+             (N, S) on sight mask, (N, S) valid mask (the component exists)
+    """
+    counts = np.array([len(item.components) for item in items], dtype=np.intp)
+    S = counts.max() if len(counts) else 0
+    flat = gather([component for item in items for component in item.components.values()], tuple(attributes) + ('status',))
+    valid = np.arange(S)[None, :] < counts[:, None]
+    packed = np.full((len(items), S, len(attributes)), np.nan)
+    packed[valid] = flat[:, :-1]
+    onSight = np.zeros((len(items), S), dtype=bool)
+    onSight[valid] = flat[:, -1] == Component.ON_SIGHT
+    return packed, onSight, valid
+
+
+def setBarycenters(items):
+    """
+    Item.setBarycenter of every item in a few numpy passes.
+    :param items: list of Item
+    """
+    batched = [item for item in items if item.ref == Item.COMPONENTS and len(item.components)]
+    if len(batched) != len(items):
+        for item in items:
+            if item.ref != Item.COMPONENTS or not len(item.components):
+                item.setBarycenter()
+    if not batched:
+        return
+    packed, onSight, _ = packPositions(batched, ('x', 'y', 'z', 'smoothed_x', 'smoothed_y', 'smoothed_z', 'baryWeight'))
+    poses, smoothed, weights = packed[..., :3], packed[..., 3:6], packed[..., 6]
+    smooth = np.array([item.smooth_components_poses for item in batched], dtype=bool)[:, None]
+    poseSet, smoothedSet = ~np.isnan(poses).any(axis=2), ~np.isnan(smoothed).any(axis=2)
+    # a TypeError stops setBarycenter at the first unset value of a component
+    smoothedUsed = onSight & smooth & smoothedSet
+    used = onSight & poseSet & (smoothedSet | ~smooth)
+    for i, s in zip(*np.nonzero(onSight & ~used)):
+        reportMalformed('position', "forgot to setup position of component '%s'", list(batched[i].components)[s])
+    bary, baryWeight = barycenters(poses, used, weights)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        smoothedBary = weightedSums(smoothed, smoothedUsed, weights)[0] / baryWeight[:, None]
+    for i, item in enumerate(batched):
+        if baryWeight[i] != 0:
+            item.x, item.y, item.z = bary[i].tolist()
+            item.baryWeight = float(baryWeight[i])
+            if item.smooth_components_poses:
+                item.smoothed_x, item.smoothed_y, item.smoothed_z = smoothedBary[i].tolist()
+            if item.smooth_poses:
+                item.setSmoothedPose()
+
+
+def setOrientations(items):
+    """
+    Item.setOrientation of every item in a few numpy passes.
+    :param items: list of Item
+    """
+    batched = [item for item in items if item.ref == Item.COMPONENTS and len(item.components)]
+    if len(batched) != len(items):
+        for item in items:
+            if item.ref != Item.COMPONENTS or not len(item.components):
+                item.setOrientation()
+    if not batched:
+        return
+    packed, onSight, _ = packPositions(batched, ('rx', 'ry', 'rz', 'baryWeight'))
+    angles = packed[..., :3]
+    used = onSight & ~np.isnan(angles).any(axis=2)
+    for i, s in zip(*np.nonzero(onSight & ~used)):
+        reportMalformed('orientation', "forgot to setup orientation of component '%s'", list(batched[i].components)[s])
+    means = circmeans(angles, used, packed[..., 3])
+    for item, mean in zip(batched, means.tolist()):
+        item.rx, item.ry, item.rz = mean
+
+
+def updateFromElders(youngsters, elders):
+    """
+    youngster < elder then youngster.setSpeed(old_body=elder) for every matched pair, in a few numpy passes:
+    ID, items and components smoothing, components speeds, lost components record, items speeds and angular speeds.
+    :param youngsters: list of Item, times already set
+    :param elders: list of Item, matched one to one with youngsters
+    """
+    if not youngsters:
+        return
+    for youngster, elder in zip(youngsters, elders):
+        youngster.setID(elder.getID())
+    deltaTime = np.array([youngster.getTime() - elder.getTime() for youngster, elder in zip(youngsters, elders)], dtype=float)
+    moved = deltaTime != 0
+
+    # items smoothing
+    smoothItems = [p for p, youngster in enumerate(youngsters) if youngster.smooth_poses]
+    if smoothItems:
+        young = gather([youngsters[p] for p in smoothItems], ('x', 'y', 'z', 'smoothed_x', 'smoothed_y', 'smoothed_z', 'smoothing_coeff'))
+        previous = gather([elders[p] for p in smoothItems], ('smoothed_x', 'smoothed_y', 'smoothed_z'))
+        smoothed = smoothedUpdate(young[:, :3], previous, young[:, 3:6], young[:, 6:7])
+        for p, value in zip(smoothItems, smoothed.tolist()):
+            youngsters[p].smoothed_x, youngsters[p].smoothed_y, youngsters[p].smoothed_z = [None if np.isnan(v) else v for v in value]
+
+    # components present in both items, and record of the lost ones
+    pairs, youngComponents, elderComponents = [], [], []
+    for p, (youngster, elder) in enumerate(zip(youngsters, elders)):
+        components = youngster.components
+        if list(components) == list(elder.components):
+            pairs.extend([p] * len(components))
+            youngComponents.extend(components.values())
+            elderComponents.extend(elder.components.values())
+            continue
+        for name, oldComp in elder.components.items():
+            component = components.get(name)
+            if component is not None:
+                pairs.append(p)
+                youngComponents.append(component)
+                elderComponents.append(oldComp)
+            else:  # keep track record even if lost
+                oldComp.status = Component.UNKNOWN
+                components[name] = oldComp
+    if youngComponents:
+        pairs = np.array(pairs)
+        young = gather(youngComponents, ('x', 'y', 'z', 'smooth_poses'))
+        old = gather(elderComponents, ('x', 'y', 'z', 'status'))
+        elderOnSight = old[:, 3] == Component.ON_SIGHT
+        smoothComponents = np.array([youngsters[p].smooth_components_poses for p in pairs.tolist()], dtype=bool) & elderOnSight
+        smoothPoses = young[:, 3] == 1
+        reference, elderReference = young[:, :3], old[:, :3]
+        smoothed = np.full(reference.shape, np.nan)
+        rows = np.flatnonzero(smoothComponents | smoothPoses)
+        if len(rows):  # smoothed poses are only read when used
+            youngSmoothed = gather([youngComponents[q] for q in rows.tolist()], ('smoothed_x', 'smoothed_y', 'smoothed_z', 'smoothing_coeff'))
+            oldSmoothed = gather([elderComponents[q] for q in rows.tolist()], ('smoothed_x', 'smoothed_y', 'smoothed_z'))
+            smoothed[rows] = np.where(smoothComponents[rows, None],
+                                      smoothedUpdate(reference[rows], oldSmoothed, youngSmoothed[:, :3], youngSmoothed[:, 3:]),
+                                      youngSmoothed[:, :3])
+            reference, elderReference = reference.copy(), elderReference.copy()
+            smoothRows = smoothPoses[rows]
+            reference[rows[smoothRows]] = smoothed[rows[smoothRows]]
+            elderReference[rows[smoothRows]] = oldSmoothed[smoothRows]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            speeds = (reference - elderReference) / deltaTime[pairs, None]
+        setSpeeds = elderOnSight & moved[pairs]
+        for q in np.flatnonzero(smoothComponents).tolist():
+            component = youngComponents[q]
+            component.smoothed_x, component.smoothed_y, component.smoothed_z = [None if np.isnan(v) else v for v in smoothed[q].tolist()]
+        updated = np.flatnonzero(setSpeeds)
+        for q, dx, dy, dz in zip(updated.tolist(), *speeds[updated].T.tolist()):
+            component = youngComponents[q]
+            component.dx, component.dy, component.dz = dx, dy, dz
+        for q in np.flatnonzero(~elderOnSight).tolist():
+            component = youngComponents[q]
+            component.dx, component.dy, component.dz = None, None, None
+
+    # items speeds
+    fromComponents = [p for p, youngster in enumerate(youngsters) if youngster.compute_speed_from_components_speeds]
+    fromItems = [p for p, youngster in enumerate(youngsters) if not youngster.compute_speed_from_components_speeds]
+    batched = [p for p in fromComponents if youngsters[p].ref == Item.COMPONENTS and len(youngsters[p].components)]
+    for p in fromComponents:
+        if p not in batched:
+            youngsters[p].setSpeed(old_body=elders[p])
+    if batched:
+        packed, onSight, _ = packPositions([youngsters[p] for p in batched], ('dx', 'dy', 'dz', 'speedWeight'))
+        speeds, speedWeight = barycenters(packed[..., :3], onSight, packed[..., 3])
+        for p, speed, weight in zip(batched, speeds.tolist(), speedWeight.tolist()):
+            if weight != 0:
+                youngsters[p].dx, youngsters[p].dy, youngsters[p].dz = speed
+                youngsters[p].speedWeight = weight
+    if fromItems:
+        attributes = ('x', 'y', 'z', 'smoothed_x', 'smoothed_y', 'smoothed_z')
+        smooth = np.array([youngsters[p].smooth_poses for p in fromItems], dtype=bool)[:, None]
+        current, previous = [np.where(smooth, values[:, 3:], values[:, :3]) for values in
+                             (gather([youngsters[p] for p in fromItems], attributes), gather([elders[p] for p in fromItems], attributes))]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            speeds = (current - previous) / deltaTime[fromItems, None]
+        for p, speed in zip(fromItems, speeds.tolist()):
+            if moved[p]:
+                youngsters[p].dx, youngsters[p].dy, youngsters[p].dz = speed
+
+    # items angular speeds
+    turning = [p for p in np.flatnonzero(moved).tolist()
+               if None not in (youngsters[p].rx, youngsters[p].ry, youngsters[p].rz, elders[p].rx, elders[p].ry, elders[p].rz)]
+    if turning:
+        attributes = ('rx', 'ry', 'rz')
+        angularSpeeds = angleDifference(gather([youngsters[p] for p in turning], attributes),
+                                        gather([elders[p] for p in turning], attributes)) / deltaTime[turning, None]
+        for p, speed in zip(turning, angularSpeeds.tolist()):
+            youngsters[p].drx, youngsters[p].dry, youngsters[p].drz = speed
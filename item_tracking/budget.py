@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from .profiling import clock
+
+
+FULL = 0
+GREEDY = 1  # greedy matching instead of optimal
+NARROW_GATE = 2  # and gating on, with a radius scaled by gateScale
+BARYCENTERS = 3  # and distances of the items barycenters instead of their components
+DEFER_LOST = 4  # and no speed reset nor smoothing update of the tracks lost, until they are seen again
+
+NAMES = {FULL: 'full', GREEDY: 'greedy', NARROW_GATE: 'narrow gate', BARYCENTERS: 'barycenters', DEFER_LOST: 'defer lost'}
+
+
+class FrameBudget(object):
+    """
+    Degradation level of each frame for a latency budget. The time of a frame is predicted from its number of items,
+    with the time per item measured at each level (moving average). The level is raised while the prediction exceeds
+    the budget, and lowered by one step per frame when the lower level is predicted under headroom * budget.
+    """
+
+    def __init__(self, budget, gateScale=0.5, headroom=0.7, smoothing=0.3):
+        """
+        :param budget: max time of a frame (s)
+        :param gateScale: factor of the gate radius from NARROW_GATE
+        :param headroom: fraction of the budget under which a lower level is used again
+        :param smoothing: weight of the last frame in the average times per item
+        """
+        self.budget = budget
+        self.gateScale = gateScale
+        self.headroom = headroom
+        self.smoothing = smoothing
+        self.costs = [None] * (DEFER_LOST + 1)  # time per item, by level
+        self.level = FULL
+        self.size = 0
+        self.start = None  # clock of the frame start, None out of a frame
+
+    def predict(self, level, size):
+        """ :return: predicted time of a frame of size items at level, None if the level was never used """
+        cost = self.costs[level]
+        return None if cost is None else cost * size
+
+    def startFrame(self, size):
+        """
+        :param size: number of new and tracked items of the frame
+        :return: level of the frame
+        """
+        level = self.level
+        while level < DEFER_LOST and self.predict(level, size) is not None and self.predict(level, size) > self.budget:
+            level += 1
+        if level == self.level and level > FULL:
+            lower = self.predict(level - 1, size)
+            if lower is not None and lower <= self.headroom * self.budget:
+                level -= 1
+        self.level, self.size, self.start = level, size, clock()
+        return level
+
+    def elapsed(self):
+        return clock() - self.start
+
+    def raiseLevel(self, level):
+        """ degrade the rest of the frame to level, when it is about to exceed the budget """
+        self.level = max(self.level, level)
+
+    def endFrame(self):
+        """ :return: time of the frame """
+        elapsed = self.elapsed()
+        cost = elapsed / max(self.size, 1)
+        previous = self.costs[self.level]
+        self.costs[self.level] = cost if previous is None else previous + self.smoothing * (cost - previous)
+        self.start = None
+        return elapsed
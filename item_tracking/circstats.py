@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Circular statistics of angles in radians, with numpy only. Unweighted means are bitwise equal to
+scipy.stats.circmean, which is only imported when asked for.
+"""
+
+import numpy as np
+
+
+TWO_PI = 2.0 * np.pi
+
+
+def circmean(angles, weights=None, scipy=False):
+    """
+    :param angles: sequence of angles (rad)
+    :param weights: weight of each angle, e.g. the baryWeight of the components, 1 if None
+    :param scipy: compute the (unweighted) mean with scipy.stats.circmean
+    :return: np.float64 mean in [0, 2 pi), nan without angles
+    """
+    angles = np.asarray(angles, dtype=float)
+    if not angles.size:
+        return np.float64(np.nan)
+    if scipy:
+        if weights is not None:
+            raise ValueError("scipy.stats.circmean has no weights")
+        from scipy.stats import circmean as scipyCircmean
+        return scipyCircmean(angles)
+    sines, cosines = np.sin(angles), np.cos(angles)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=float)
+        sines, cosines = sines * weights, cosines * weights
+    return np.arctan2(sines.sum(), cosines.sum()) % TWO_PI
+
+
+def circmeans(angles, used=None, weights=None):
+    """
+    circmean of the used angles of each row. Rows are grouped by number of used angles so that each mean sums
+    exactly the same values as circmean does.
+    :param angles: (N, K) or (N, K, A) radians
+    :param used: (N, K) bool, the angles that are not nan if None
+    :param weights: (N, K) weights, 1 if None
+    :return: (N,) or (N, A), nan for rows without used angle
+    """
+    angles = np.asarray(angles, dtype=float)
+    flat = angles.ndim == 2
+    if flat:
+        angles = angles[..., None]
+    N, K, A = angles.shape
+    if used is None:
+        used = ~np.isnan(angles).any(axis=2)
+    means = np.full((N, A), np.nan)
+    counts = used.sum(axis=1)
+    order = np.argsort(~used, axis=1, kind='stable')  # used angles first, in order
+    for count in np.unique(counts[counts > 0]).tolist():
+        rows = np.flatnonzero(counts == count)
+        samples = np.take_along_axis(angles[rows], order[rows, :count, None], axis=1)
+        sines, cosines = np.sin(samples), np.cos(samples)
+        if weights is not None:
+            sampleWeights = np.take_along_axis(np.asarray(weights, dtype=float)[rows], order[rows, :count], axis=1)[..., None]
+            sines, cosines = sines * sampleWeights, cosines * sampleWeights
+        means[rows] = np.arctan2(np.ascontiguousarray(sines.swapaxes(1, 2)).sum(axis=2),
+                                 np.ascontiguousarray(cosines.swapaxes(1, 2)).sum(axis=2)) % TWO_PI
+    return means[:, 0] if flat else means
+
+
+def raggedCircmeans(angles, lengths, weights=None):
+    """
+    :param angles: (L,) or (L, A) radians of all the rows, one after the other
+    :param lengths: (N,) number of angles of each row, summing to L
+    :param weights: (L,) weights, 1 if None
+    :return: circmeans of the rows, (N,) or (N, A)
+    """
+    angles = np.asarray(angles, dtype=float)
+    lengths = np.asarray(lengths, dtype=np.intp)
+    K = lengths.max() if len(lengths) else 0
+    used = np.arange(K)[None, :] < lengths[:, None]
+    padded = np.zeros((len(lengths), K) + angles.shape[1:])
+    padded[used] = angles
+    paddedWeights = None
+    if weights is not None:
+        paddedWeights = np.zeros(used.shape)
+        paddedWeights[used] = weights
+    return circmeans(padded, used, paddedWeights)
+
+
+def angleDifference(angles, others):
+    """ :return: angles - others wrapped to [-pi, pi), e.g. for angular speeds across the 0 / 2 pi cut """
+    return (np.asarray(angles, dtype=float) - others + np.pi) % TWO_PI - np.pi
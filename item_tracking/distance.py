@@ -0,0 +1,276 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy as np
+from .item import Item, Component
+from .pointcloud import CHAMFER, cloudDistances
+
+
+def componentIndex(*itemLists):
+    """
+    :param itemLists: lists of Item
+    :return: dict component name -> column, in first seen order
+    """
+    index = dict()
+    for items in itemLists:
+        for item in items:
+            for name in item.components:
+                if name not in index:
+                    index[name] = len(index)
+    return index
+
+
+def itemVisibility(item, index):
+    """
+    Set item.visibility, bitmask of its on sight components, new component names being appended to index.
+    :param item: Item
+    :param index: dict component name -> bit
+    :return: item.visibility
+    """
+    mask = 0
+    for name, component in item.components.items():
+        k = index.setdefault(name, len(index))
+        if component.status == Component.ON_SIGHT:
+            mask |= 1 << k
+    item.visibility = mask
+    return mask
+
+
+def visibilityWords(items, index):
+    """
+    :param items: list of Item, their visibility being set by itemVisibility if None
+    :param index: dict component name -> bit
+    :return: uint64 ndarray (N, W) of the visibility masks, 64 components per word
+    """
+    masks = [item.visibility if item.visibility is not None else itemVisibility(item, index) for item in items]
+    W = max(1, -(-len(index) // 64))
+    if W == 1:
+        return np.fromiter(masks, dtype=np.uint64, count=len(masks)).reshape(len(masks), 1)
+    words = 2 ** 64 - 1
+    return np.array([[(mask >> (64 * w)) & words for w in range(W)] for mask in masks], dtype=np.uint64).reshape(len(masks), W)
+
+
+def overlapping(newWords, trackedWords, rows=None, cols=None):
+    """
+    :param newWords, trackedWords: visibilityWords of the new and tracked items
+    :param rows, cols: pairs to test, all pairs if None
+    :return: bool ndarray of the pairs sharing an on sight component, (P,) or (N, M) for all pairs
+    """
+    if rows is None:
+        shared = np.zeros((len(newWords), len(trackedWords)), dtype=bool)
+        for w in range(newWords.shape[1]):
+            shared |= (newWords[:, w, None] & trackedWords[None, :, w]) != 0
+        return shared
+    return ((newWords[rows] & trackedWords[cols]) != 0).any(axis=1)
+
+
+def packComponents(items, index):
+    """
+    Pack the components of items into dense arrays, one column per component name.
+    :param items: list of Item
+    :param index: dict component name -> column
+    :return: poses (N, K, 3), smoothed poses (N, K, 3), on sight mask (N, K),
+             distWeight (N, K), smooth_poses flags (N, K),
+             components order (N, S) as columns in each item iteration order, -1 padded
+    """
+    N, K = len(items), len(index)
+    S = max([len(item.components) for item in items] + [0])
+    poses = np.full((N, K, 3), np.nan)
+    smoothed = np.full((N, K, 3), np.nan)
+    onSight = np.zeros((N, K), dtype=bool)
+    weights = np.zeros((N, K))
+    smoothFlags = np.zeros((N, K), dtype=bool)
+    order = np.full((N, S), -1, dtype=np.intp)
+    for i, item in enumerate(items):
+        for s, component in enumerate(item.components.values()):
+            k = index[component.name]
+            order[i, s] = k
+            poses[i, k] = component.x, component.y, component.z
+            smoothed[i, k] = component.smoothed_x, component.smoothed_y, component.smoothed_z
+            onSight[i, k] = component.status == Component.ON_SIGHT
+            weights[i, k] = component.distWeight
+            smoothFlags[i, k] = component.smooth_poses
+    return poses, smoothed, onSight, weights, smoothFlags, order
+
+
+def shiftPacked(packed, offsets):
+    """ :return: packComponents arrays with the poses and smoothed poses of each item moved by offsets (N, 3) """
+    offsets = np.asarray(offsets, dtype=float)[:, None, :]
+    return (packed[0] + offsets, packed[1] + offsets) + tuple(packed[2:])
+
+
+def pairDistances(newPacked, trackedPacked, rows, cols):
+    """
+    Weighted mean distance of the (rows[p], cols[p]) pairs, as computed by Item.__eq__.
+    :param newPacked: packComponents of the new items
+    :param trackedPacked: packComponents of the tracked items
+    :param rows: new items indexes
+    :param cols: tracked items indexes
+    :return: distances (P,), distWeight (P,)
+    """
+    nPoses, nSmoothed, nOnSight, nWeights, nSmoothFlags, order = newPacked
+    tPoses, tSmoothed, tOnSight, tWeights = trackedPacked[:4]
+    selfPoses = np.where(nSmoothFlags[..., None], nSmoothed, nPoses)
+    anySmooth, allSmooth = nSmoothFlags.any(), nSmoothFlags.all()
+    d = np.zeros(len(rows))
+    distWeight = np.zeros(len(rows))
+    with np.errstate(invalid='ignore'):
+        for s in range(order.shape[1]):  # s-th component of each new item
+            k = order[rows, s]
+            valid = k >= 0
+            k = np.maximum(k, 0)
+            if allSmooth or not anySmooth:
+                otherPoses = (tSmoothed if allSmooth else tPoses)[cols, k]
+            else:
+                otherPoses = np.where(nSmoothFlags[rows, k][:, None], tSmoothed[cols, k], tPoses[cols, k])
+            diff2 = np.float_power(selfPoses[rows, k] - otherPoses, 2)  # same rounding as pow() in Component.dist2
+            dist = np.sqrt(diff2[:, 0] + diff2[:, 1] + diff2[:, 2])
+            shared = valid & nOnSight[rows, k] & tOnSight[cols, k]
+            meanWeight = (nWeights[rows, k] + tWeights[cols, k]) / 2.
+            d += np.where(shared, dist * meanWeight, 0.)
+            distWeight += np.where(shared, meanWeight, 0.)
+        d = np.where(distWeight != 0, d / np.where(distWeight != 0, distWeight, 1.), np.inf)
+    return d, distWeight
+
+
+def denseDistances(newPacked, trackedPacked):
+    """
+    Same as pairDistances over all the pairs, when every new item iterates its components in the same order.
+    :return: distances (N, M), distWeight (N, M)
+    """
+    nPoses, nSmoothed, nOnSight, nWeights, nSmoothFlags, order = newPacked
+    tPoses, tSmoothed, tOnSight, tWeights = trackedPacked[:4]
+    d = np.zeros((len(nPoses), len(tPoses)))
+    distWeight = np.zeros(d.shape)
+    with np.errstate(invalid='ignore'):
+        for k in order[0] if len(order) else []:
+            if k < 0:
+                break
+            smooth = nSmoothFlags[:, k, None, None]
+            selfPoses = np.where(smooth[:, 0], nSmoothed[:, k], nPoses[:, k])[:, None, :]
+            otherPoses = np.where(smooth, tSmoothed[None, :, k], tPoses[None, :, k])
+            diff2 = np.float_power(selfPoses - otherPoses, 2)  # same rounding as pow() in Component.dist2
+            dist = np.sqrt(diff2[..., 0] + diff2[..., 1] + diff2[..., 2])
+            shared = nOnSight[:, k, None] & tOnSight[None, :, k]
+            meanWeight = (nWeights[:, k, None] + tWeights[None, :, k]) / 2.
+            d += np.where(shared, dist * meanWeight, 0.)
+            distWeight += np.where(shared, meanWeight, 0.)
+        d = np.where(distWeight != 0, d / np.where(distWeight != 0, distWeight, 1.), np.inf)
+    return d, distWeight
+
+
+def packedDistanceMatrix(newPacked, trackedPacked, pairs=None):
+    """
+    :param newPacked: packComponents of the new items
+    :param trackedPacked: packComponents of the tracked items
+    :param pairs: (rows, cols) candidate pairs, the others are left to np.inf. All pairs if None
+    :return: distance (N, M), distWeight (N, M)
+    """
+    N, M = len(newPacked[0]), len(trackedPacked[0])
+    order = newPacked[5]
+    if pairs is None and (order == order[:1]).all():
+        return denseDistances(newPacked, trackedPacked)
+    if pairs is None:
+        rows, cols = np.divmod(np.arange(N * M), M) if M else (np.array([], dtype=np.intp),) * 2
+    else:
+        rows, cols = np.asarray(pairs[0], dtype=np.intp), np.asarray(pairs[1], dtype=np.intp)
+    distance = np.full((N, M), np.inf)
+    distWeight = np.zeros((N, M))
+    distance[rows, cols], distWeight[rows, cols] = pairDistances(newPacked, trackedPacked, rows, cols)
+    return distance, distWeight
+
+
+def otherDistances(newItems, trackedItems, rows, cols, maxDistance=np.inf, cloudMetric=CHAMFER, offsets=None):
+    """
+    Distances of the pairs of items not both referenced by their components: Item.__eq__, or cloudDistances for
+    pairs of point clouds.
+    :param rows, cols: pairs indexes
+    :param maxDistance: distance over which point clouds pairs may be left to np.inf
+    :param cloudMetric: pointcloud.CHAMFER or pointcloud.HAUSDORFF
+    :param offsets: ndarray (len(trackedItems), 3) added to the tracked point clouds
+    :return: distances (P,)
+    """
+    distances = np.full(len(rows), np.inf)
+    newClouds = np.array([item.ref == Item.POINTCLOUD for item in newItems], dtype=bool)
+    trackedClouds = np.array([item.ref == Item.POINTCLOUD for item in trackedItems], dtype=bool)
+    clouds = newClouds[rows] & trackedClouds[cols]
+    if clouds.any():
+        distances[clouds] = cloudDistances([item.pointCloud for item in newItems], [item.pointCloud for item in trackedItems],
+                                           rows[clouds], cols[clouds], maxDistance, cloudMetric, offsets)
+        for i in np.unique(rows[clouds]).tolist():  # as Item.__eq__
+            newItems[i].distWeight = 1.
+    for p in np.flatnonzero(~clouds).tolist():
+        distances[p] = newItems[rows[p]] == trackedItems[cols[p]]
+    return distances
+
+
+def barycenterDistances(newPoints, trackedPoints, pairs=None):
+    """
+    Cheaper distances than distanceMatrix, of the items barycenters only.
+    :param newPoints: ndarray (N, 3) of the new items barycenters
+    :param trackedPoints: ndarray (M, 3) of the tracked items barycenters, or their predictions
+    :param pairs: (rows, cols) candidate pairs, the others are left to np.inf. All pairs if None
+    :return: distance ndarray (N, M), np.inf for the barycenters not set
+    """
+    N, M = len(newPoints), len(trackedPoints)
+    if pairs is None:
+        with np.errstate(invalid='ignore'):
+            distance = np.sqrt(((newPoints[:, None, :] - trackedPoints[None, :, :]) ** 2).sum(axis=2))
+    else:
+        rows, cols = np.asarray(pairs[0], dtype=np.intp), np.asarray(pairs[1], dtype=np.intp)
+        distance = np.full((N, M), np.inf)
+        distance[rows, cols] = np.sqrt(((newPoints[rows] - trackedPoints[cols]) ** 2).sum(axis=1))
+    distance[np.isnan(distance)] = np.inf
+    return distance
+
+
+def distanceMatrix(newItems, trackedItems, pairs=None, index=None, offsets=None, maxDistance=np.inf, cloudMetric=CHAMFER):
+    """
+    Vectorized equivalent of [[newItem == oldItem for oldItem in trackedItems] for newItem in newItems].
+    Components are accumulated in each new item iteration order, so the result is bitwise
+    identical to Item.__eq__, np.inf included for pairs without shared on sight components.
+    :param newItems: list of Item
+    :param trackedItems: list of Item
+    :param pairs: (rows, cols) candidate pairs, the others are left to np.inf. All pairs if None
+    :param index: dict component name -> bit of the items visibility (see itemVisibility), shared by the calls.
+                  The pairs without shared on sight components are then skipped before computing any distance
+    :param offsets: ndarray (len(trackedItems), 3) added to the tracked components poses, e.g. their predicted motion
+    :param maxDistance, cloudMetric: distances of the point clouds, see otherDistances
+    :return: distance ndarray (len(newItems), len(trackedItems))
+    """
+    N, M = len(newItems), len(trackedItems)
+    if not N * M:
+        return np.empty((N, M))
+    newComponents = np.array([item.ref == Item.COMPONENTS for item in newItems])
+    trackedComponents = np.array([item.ref == Item.COMPONENTS for item in trackedItems])
+    comparedPairs = pairs
+    if index is None:
+        index = componentIndex(newItems, trackedItems)
+        newPacked, trackedPacked = packComponents(newItems, index), packComponents(trackedItems, index)
+    else:
+        newWords, trackedWords = visibilityWords(newItems, index), visibilityWords(trackedItems, index)
+        newPacked, trackedPacked = packComponents(newItems, index), packComponents(trackedItems, index)
+        if pairs is None:
+            shared = overlapping(newWords, trackedWords)
+            order = newPacked[5]
+            if not (order == order[:1]).all() or shared.mean() <= 0.5:  # else the dense computation is faster
+                comparedPairs = np.nonzero(shared)
+        else:
+            rows, cols = np.asarray(pairs[0], dtype=np.intp), np.asarray(pairs[1], dtype=np.intp)
+            shared = overlapping(newWords, trackedWords, rows, cols)
+            comparedPairs = rows[shared], cols[shared]
+    if offsets is not None:
+        trackedPacked = shiftPacked(trackedPacked, offsets)
+    distance, distWeight = packedDistanceMatrix(newPacked, trackedPacked, comparedPairs)
+    if pairs is None:
+        rows, cols = np.nonzero(~(newComponents[:, None] & trackedComponents[None, :]))
+    else:
+        rows, cols = np.asarray(pairs[0], dtype=np.intp), np.asarray(pairs[1], dtype=np.intp)
+        other = ~(newComponents[rows] & trackedComponents[cols])
+        rows, cols = rows[other], cols[other]
+    if len(rows):  # other references keep the item to item distance
+        distance[rows, cols] = otherDistances(newItems, trackedItems, rows, cols, maxDistance, cloudMetric, offsets)
+    if pairs is None and trackedComponents[-1]:  # Item.__eq__ leaves the weight of the last compared item
+        for i in np.flatnonzero(newComponents).tolist():
+            newItems[i].distWeight = float(distWeight[i, -1])
+    return distance
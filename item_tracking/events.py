@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import collections
+import logging
+try:
+    import queue
+except ImportError:  # python 2
+    import Queue as queue
+
+
+logger = logging.getLogger(__name__)
+
+BORN = 1  # new track, NEW
+CONFIRMED = 2  # NEW -> UPDATE, seen for time_add
+LOST = 3  # UPDATE -> LOST, not seen
+FOUND = 4  # LOST -> UPDATE, seen again
+DROPPED = 5  # forgotten: lost before being confirmed, or for time_del
+
+NAMES = {BORN: 'born', CONFIRMED: 'confirmed', LOST: 'lost', FOUND: 'found', DROPPED: 'dropped'}
+
+Event = collections.namedtuple('Event', ['kind', 'ID'])
+
+
+class EventBatch(object):
+    """ Lifecycle events of the tracks during a frame, in emission order """
+
+    __slots__ = ('time', 'events')
+
+    def __init__(self, time):
+        self.time = time
+        self.events = []
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def __repr__(self):
+        return "EventBatch({}, {})".format(self.time, ", ".join("{} {}".format(NAMES[kind], ID) for kind, ID in self.events))
+
+    def add(self, kind, ID):
+        self.events.append(Event(kind, ID))
+
+    def extend(self, kind, ids):
+        self.events.extend([Event(kind, ID) for ID in ids])
+
+    def ids(self, kind):
+        """ :return: IDs of the events of kind, in emission order """
+        return [ID for k, ID in self.events if k == kind]
+
+
+class EventStream(object):
+    """
+    Delivers the EventBatch of each frame to listeners, called in the tracking thread, and to a bounded queue read by
+    other threads, e.g. with tracker.setParams(events=EventStream(maxsize=100)). When the queue is full, its oldest batch
+    is dropped.
+    """
+
+    def __init__(self, maxsize=0, emptyBatches=False):
+        """
+        :param maxsize: max number of batches in the queue, no queue if 0
+        :param emptyBatches: also deliver the batches of frames without events
+        """
+        self.listeners = []
+        self.queue = queue.Queue(maxsize) if maxsize else None
+        self.emptyBatches = emptyBatches
+        self.overflows = 0  # batches dropped from the full queue
+
+    def subscribe(self, listener):
+        """ :param listener: callable of an EventBatch, its exceptions being logged """
+        self.listeners.append(listener)
+        return listener
+
+    def unsubscribe(self, listener):
+        self.listeners.remove(listener)
+
+    def publish(self, batch):
+        if not batch.events and not self.emptyBatches:
+            return
+        for listener in self.listeners:
+            try:
+                listener(batch)
+            except Exception:
+                logger.exception("event listener %r failed", listener)
+        if self.queue is not None:
+            while True:
+                try:
+                    self.queue.put_nowait(batch)
+                    return
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.overflows += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, block=True, timeout=None):
+        """ :return: oldest EventBatch of the queue, see queue.Queue.get """
+        return self.queue.get(block, timeout)
+
+    def drain(self):
+        """ :return: list of the batches of the queue, oldest first, without waiting """
+        batches = []
+        while True:
+            try:
+                batches.append(self.queue.get_nowait())
+            except queue.Empty:
+                return batches
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import itertools
+import numpy as np
+
+
+def barycenterArray(items):
+    """
+    :param items: list of Item, barycenters already set
+    :return: ndarray (N, 3), nan where the barycenter is not set
+    """
+    return np.array([(item.x, item.y, item.z) for item in items], dtype=float).reshape(len(items), 3)
+
+
+def expandRanges(starts, counts):
+    """ concatenation of the ranges [starts[i], starts[i] + counts[i]) """
+    total = counts.sum()
+    if not total:
+        return np.array([], dtype=np.intp)
+    offsets = np.cumsum(counts) - counts
+    return np.repeat(starts - offsets, counts) + np.arange(total)
+
+
+class UniformGrid(object):
+
+    def __init__(self, points, cellSize):
+        """
+        :param points: ndarray (M, 3), nan rows are ignored
+        :param cellSize: edge of the cubic cells
+        """
+        self.cellSize = float(cellSize)
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        valid = np.flatnonzero(~np.isnan(self.points).any(axis=1))
+        self.cells = np.floor(self.points[valid] / self.cellSize).astype(np.int64)
+        self.valid = valid
+
+    def queryRadius(self, points, radius):
+        """
+        :param points: ndarray (N, 3), nan rows are ignored
+        :param radius: max euclidean distance
+        :return: rows (points), cols (grid points) of the pairs closer than radius, sorted by row then col
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        queries = np.flatnonzero(~np.isnan(points).any(axis=1))
+        if not len(queries) or not len(self.valid):
+            return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+        reach = max(int(np.ceil(radius / self.cellSize)), 0)
+        queryCells = np.floor(points[queries] / self.cellSize).astype(np.int64)
+
+        # cells to keys, with a margin of reach cells so that neighbour keys never alias
+        low = np.minimum(self.cells.min(axis=0), queryCells.min(axis=0)) - reach
+        dims = np.maximum(self.cells.max(axis=0), queryCells.max(axis=0)) + reach - low + 1
+        def keys(cells):
+            cells = cells - low
+            return (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+        order = np.argsort(keys(self.cells), kind='stable')
+        sortedKeys = keys(self.cells)[order]
+
+        rows, cols = [], []
+        for offset in itertools.product(range(-reach, reach + 1), repeat=3):
+            neighbourKeys = keys(queryCells + np.array(offset))
+            starts = np.searchsorted(sortedKeys, neighbourKeys, side='left')
+            counts = np.searchsorted(sortedKeys, neighbourKeys, side='right') - starts
+            rows.append(np.repeat(np.arange(len(queries)), counts))
+            cols.append(order[expandRanges(starts, counts)])
+        rows, cols = queries[np.concatenate(rows)], self.valid[np.concatenate(cols)]
+        close = ((points[rows] - self.points[cols]) ** 2).sum(axis=1) <= radius * radius
+        rows, cols = rows[close], cols[close]
+        order = np.lexsort((cols, rows))
+        return rows[order], cols[order]
+
+
+def kdtreePairs(newPoints, trackedPoints, radius):
+    """
+    :return: rows (newPoints), cols (trackedPoints) of the pairs closer than radius, sorted by row then col
+    """
+    from scipy.spatial import cKDTree
+    rowsValid = np.flatnonzero(~np.isnan(newPoints).any(axis=1))
+    colsValid = np.flatnonzero(~np.isnan(trackedPoints).any(axis=1))
+    if not len(rowsValid) or not len(colsValid):
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    newTree = cKDTree(newPoints[rowsValid])
+    trackedTree = cKDTree(trackedPoints[colsValid])
+    pairs = newTree.sparse_distance_matrix(trackedTree, radius, output_type='ndarray')
+    rows, cols = rowsValid[pairs['i']], colsValid[pairs['j']]
+    order = np.lexsort((cols, rows))
+    return rows[order], cols[order]
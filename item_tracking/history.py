@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import collections
+import numpy as np
+
+
+Trajectory = collections.namedtuple('Trajectory', ['times', 'barycenters', 'smoothedPoses', 'speeds',
+                                                   'componentPoses', 'componentNames'])
+
+
+class TrackHistory(object):
+    """
+    Last capacity samples of a track in ring buffers. Each sample is written twice, at i and i + capacity,
+    so that the last samples are always a contiguous slice and are read without copy.
+    """
+
+    FIELDS = ('times', 'barycenters', 'smoothedPoses', 'speeds', 'componentPoses')
+
+    def __init__(self, capacity, components=1):
+        self.capacity = capacity
+        self.count = 0  # samples appended
+        self.componentIndex = dict()  # component name -> column
+        self.componentNames = []
+        self.times = np.full(2 * capacity, np.nan)
+        self.barycenters = np.full((2 * capacity, 3), np.nan)
+        self.smoothedPoses = np.full((2 * capacity, 3), np.nan)
+        self.speeds = np.full((2 * capacity, 3), np.nan)
+        self.componentPoses = np.full((2 * capacity, components, 3), np.nan)
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def nbytes(self):
+        return sum([getattr(self, name).nbytes for name in self.FIELDS])
+
+    def columns(self, names):
+        """ :return: columns of the component names, new ones being added """
+        for name in names:
+            if name not in self.componentIndex:
+                self.componentIndex[name] = len(self.componentNames)
+                self.componentNames.append(name)
+        if len(self.componentNames) > self.componentPoses.shape[1]:
+            poses = np.full((2 * self.capacity, 2 * len(self.componentNames), 3), np.nan)
+            poses[:, :self.componentPoses.shape[1]] = self.componentPoses
+            self.componentPoses = poses
+        return [self.componentIndex[name] for name in names]
+
+    def append(self, time, barycenter, smoothedPose, speed, componentNames=(), componentPoses=()):
+        """
+        :param time: time of the sample
+        :param barycenter, smoothedPose, speed: x, y, z, None or nan if not set
+        :param componentNames: names of the components seen
+        :param componentPoses: x, y, z of each component seen
+        """
+        columns = self.columns(componentNames)
+        i = self.count % self.capacity
+        rows = [i, i + self.capacity]
+        self.times[rows] = time
+        self.barycenters[rows] = np.array(barycenter, dtype=float)
+        self.smoothedPoses[rows] = np.array(smoothedPose, dtype=float)
+        self.speeds[rows] = np.array(speed, dtype=float)
+        self.componentPoses[rows] = np.nan
+        if columns:
+            self.componentPoses[i, columns] = self.componentPoses[i + self.capacity, columns] = np.array(componentPoses, dtype=float)
+        self.count += 1
+
+    def resize(self, capacity):
+        """ keep the last capacity samples in buffers of that capacity """
+        last = self.last(capacity)
+        n = len(last.times)
+        K = max(len(self.componentNames), 1)
+        self.times, self.barycenters = np.full(2 * capacity, np.nan), np.full((2 * capacity, 3), np.nan)
+        self.smoothedPoses, self.speeds = np.full((2 * capacity, 3), np.nan), np.full((2 * capacity, 3), np.nan)
+        self.componentPoses = np.full((2 * capacity, K, 3), np.nan)
+        for start in (0, capacity):
+            self.times[start:start + n] = last.times
+            self.barycenters[start:start + n] = last.barycenters
+            self.smoothedPoses[start:start + n] = last.smoothedPoses
+            self.speeds[start:start + n] = last.speeds
+            self.componentPoses[start:start + n, :last.componentPoses.shape[1]] = last.componentPoses
+        self.capacity, self.count = capacity, n
+
+    def last(self, n=None):
+        """ :return: Trajectory of views of the n last samples, oldest first, all of them if None """
+        n = len(self) if n is None else min(n, len(self))
+        end = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else 0
+        start = end - n
+        return Trajectory(self.times[start:end], self.barycenters[start:end], self.smoothedPoses[start:end],
+                          self.speeds[start:end], self.componentPoses[start:end, :len(self.componentNames)],
+                          list(self.componentNames))
+
+    def since(self, time):
+        """ :return: Trajectory of views of the samples from time """
+        times = self.last().times
+        return self.last(len(times) - int(np.searchsorted(times, time, side='left')))
+
+    def lastSeconds(self, seconds):
+        """ :return: Trajectory of views of the samples of the last seconds before the last sample """
+        return self.since(self.last(1).times[0] - seconds) if self.count else self.last(0)
+
+
+class History(object):
+    """
+    TrackHistory of each track ID, recorded by Tracker when history_size is set. At the end of each frame, while the
+    memory of the histories exceeds maxBytes, the tracks not updated by the frame are dropped, least recently updated
+    first, then the buffers of the others are halved, oldest first, and the tracks down to one sample dropped.
+    """
+
+    def __init__(self, capacity=100, maxBytes=None):
+        self.capacity = capacity
+        self.maxBytes = maxBytes
+        self.tracks = collections.OrderedDict()  # ID -> TrackHistory, least recently updated first
+        self.updated = dict()  # ID -> frame of its last update
+        self.frame = 0
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.tracks)
+
+    def __contains__(self, ID):
+        return ID in self.tracks
+
+    def track(self, ID):
+        """ :return: TrackHistory of ID, None if not recorded or dropped """
+        return self.tracks.get(ID)
+
+    def record(self, ID, time, barycenter, smoothedPose, speed, componentNames=(), componentPoses=()):
+        """ append a sample to the history of track ID, see TrackHistory.append """
+        track = self.tracks.pop(ID, None)
+        if track is None:
+            track = TrackHistory(self.capacity, max(len(componentNames), 1))
+            self.bytes += track.nbytes()
+        before = track.nbytes()
+        track.append(time, barycenter, smoothedPose, speed, componentNames, componentPoses)
+        self.bytes += track.nbytes() - before
+        self.tracks[ID] = track
+        self.updated[ID] = self.frame
+
+    def recordItem(self, item, time):
+        names = [name for name, component in item.components.items() if component.status == component.ON_SIGHT]
+        self.record(item.getID(), time, (item.x, item.y, item.z), (item.smoothed_x, item.smoothed_y, item.smoothed_z),
+                    (item.dx, item.dy, item.dz), names,
+                    [(item.components[name].x, item.components[name].y, item.components[name].z) for name in names])
+
+    def endFrame(self):
+        """ evict or shrink the least recently updated tracks until under maxBytes, then start a new frame """
+        while self.maxBytes is not None and self.bytes > self.maxBytes and self.tracks:
+            ID = next(iter(self.tracks))
+            if self.updated[ID] == self.frame:  # the others are more recent
+                self.shrink()
+                break
+            self.drop(ID)
+        self.frame += 1
+
+    def shrink(self):
+        """ halve the buffers of the tracks, oldest first, until under maxBytes, dropping those of one sample """
+        while self.bytes > self.maxBytes and self.tracks:
+            shrunk = False
+            for ID, track in self.tracks.items():
+                if self.bytes <= self.maxBytes:
+                    return
+                if track.capacity > 1:
+                    before = track.nbytes()
+                    track.resize(track.capacity // 2)
+                    self.bytes += track.nbytes() - before
+                    shrunk = True
+            if not shrunk:
+                self.drop(next(iter(self.tracks)))
+
+    def drop(self, ID):
+        self.bytes -= self.tracks.pop(ID).nbytes()
+        del self.updated[ID]
+
+    def clear(self):
+        self.tracks.clear()
+        self.updated.clear()
+        self.bytes = 0
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import itertools
+import math
+import numpy as np
+
+
+class TrackIndex(object):
+    """
+    Tracks of a frame indexed by ID (dict) and by barycenter (hash of uniform grid cells), for lookups by ID and box,
+    radius and nearest queries, optionally restricted to some ItemHandler states. Tracks without barycenter are only
+    found by ID.
+    """
+
+    def __init__(self, tracks, ids, points, states, cellSize=1.):
+        """
+        :param tracks: sequence of the tracks returned by the queries, e.g. Item
+        :param ids: (M,) IDs of the tracks
+        :param points: ndarray (M, 3) of their barycenters, nan if not set
+        :param states: (M,) ItemHandler state of each track
+        :param cellSize: edge of the grid cells, about the radius of the queries
+        """
+        self.tracks = tracks
+        self.ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        self.points = np.asarray(points, dtype=float).reshape(-1, 3)
+        self.states = np.asarray(states, dtype=np.int8).reshape(-1)
+        self.rows = dict(zip(self.ids.tolist(), range(len(self.ids))))
+        self.cellSize = float(cellSize)
+        valid = np.flatnonzero(~np.isnan(self.points).any(axis=1))
+        self.cells = dict()  # (i, j, k) -> rows of the valid points in the cell
+        if len(valid):
+            cells, inverse = np.unique(np.floor(self.points[valid] / self.cellSize).astype(np.int64), axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            order = np.argsort(inverse, kind='stable')
+            bounds = np.searchsorted(inverse[order], np.arange(len(cells) + 1))
+            for cell, start, stop in zip(map(tuple, cells.tolist()), bounds[:-1].tolist(), bounds[1:].tolist()):
+                self.cells[cell] = valid[order[start:stop]]
+        self.valid = valid
+        self.low = self.points[valid].min(axis=0) if len(valid) else np.zeros(3)
+        self.high = self.points[valid].max(axis=0) if len(valid) else np.zeros(3)
+        self.bounds = self.low.tolist(), self.high.tolist()
+
+    @classmethod
+    def fromItems(cls, items, smoothed=False, cellSize=1.):
+        """
+        :param items: list of Item, barycenters already set
+        :param smoothed: index the smoothed barycenters, the barycenter being used where it is not set
+        """
+        points = np.array([(item.x, item.y, item.z) for item in items], dtype=float).reshape(len(items), 3)
+        if smoothed:
+            smoothedPoints = np.array([(item.smoothed_x, item.smoothed_y, item.smoothed_z) for item in items], dtype=float).reshape(len(items), 3)
+            points = np.where(np.isnan(smoothedPoints), points, smoothedPoints)
+        return cls(items, [item.getID() for item in items], points, [item.getState() for item in items], cellSize)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, ID):
+        return ID in self.rows
+
+    def get(self, ID, default=None):
+        """ :return: the track of ID, default if not indexed """
+        row = self.rows.get(ID)
+        return default if row is None else self.tracks[row]
+
+    def select(self, rows, states=None):
+        """ :return: list of the tracks of rows whose state is in states (ItemHandler state or sequence of), all if None """
+        rows = np.asarray(rows, dtype=np.intp)
+        if states is not None:
+            rows = rows[np.isin(self.states[rows], np.atleast_1d(states))]
+        return [self.tracks[row] for row in rows.tolist()]
+
+    def candidates(self, low, high):
+        """ :return: rows of the valid points of the cells overlapping the box [low, high], in tracking order """
+        cellSize = self.cellSize
+        first = [int(math.floor(max(l, b) / cellSize)) for l, b in zip(low, self.bounds[0])]
+        last = [int(math.floor(min(h, b) / cellSize)) for h, b in zip(high, self.bounds[1])]
+        if any(f > l for f, l in zip(first, last)) or not len(self.valid):
+            return np.array([], dtype=np.intp)
+        if (last[0] - first[0] + 1) * (last[1] - first[1] + 1) * (last[2] - first[2] + 1) > len(self.cells):
+            return self.valid  # more cells in the box than occupied ones
+        (i0, j0, k0), (i1, j1, k1) = first, last
+        cells = self.cells
+        found = [cells[cell] for cell in itertools.product(range(i0, i1 + 1), range(j0, j1 + 1), range(k0, k1 + 1)) if cell in cells]
+        if not found:
+            return np.array([], dtype=np.intp)
+        return found[0] if len(found) == 1 else np.sort(np.concatenate(found))
+
+    def boxRows(self, low, high):
+        """ :return: rows of the valid points in the box [low, high], in tracking order """
+        rows = self.candidates(low, high)
+        points = self.points[rows]
+        return rows[((points >= low) & (points <= high)).all(axis=1)]
+
+    def inBox(self, low, high, states=None):
+        """
+        :param low, high: x, y, z corners of an axis aligned box
+        :param states: ItemHandler state or states of the tracks returned, all if None
+        :return: list of the tracks whose barycenter is in the box, in tracking order
+        """
+        return self.select(self.boxRows(low, high), states)
+
+    def radiusRows(self, point, radius, states=None):
+        """ :return: rows of the points closer than radius to point, of state in states, and their distances, closest first """
+        point = np.asarray(point, dtype=float)
+        rows = self.candidates((point - radius).tolist(), (point + radius).tolist())
+        if states is not None:
+            rows = rows[np.isin(self.states[rows], np.atleast_1d(states))]
+        distances = np.sqrt(((self.points[rows] - point) ** 2).sum(axis=1))
+        close = distances <= radius
+        rows, distances = rows[close], distances[close]
+        order = np.argsort(distances, kind='stable')
+        return rows[order], distances[order]
+
+    def inRadius(self, point, radius, states=None):
+        """ :return: list of the tracks whose barycenter is closer than radius to point, closest first """
+        return [self.tracks[row] for row in self.radiusRows(point, radius, states)[0].tolist()]
+
+    def nearest(self, point, k=1, states=None, maxDistance=np.inf):
+        """
+        :param point: x, y, z
+        :param k: number of tracks
+        :param states: ItemHandler state or states of the tracks returned, all if None
+        :param maxDistance: max distance of the tracks returned
+        :return: list of the k tracks closest to point (fewer if there are not as many), closest first
+        """
+        point = np.asarray(point, dtype=float)
+        if not len(self.valid) or k < 1:
+            return []
+        # the k nearest are in the first ball holding k points, or in the ball holding all of them
+        farthest = np.sqrt(np.maximum((point - self.low) ** 2, (point - self.high) ** 2).sum())
+        radius = self.cellSize
+        while True:
+            radius = min(radius, maxDistance, farthest)
+            rows, _ = self.radiusRows(point, radius, states)
+            if len(rows) >= k or radius >= min(maxDistance, farthest):
+                return [self.tracks[row] for row in rows[:k].tolist()]
+            radius *= 2
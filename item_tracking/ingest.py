@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import threading
+
+
+class Inbox(object):
+    """
+    Double buffer of the items added by producer threads while a frame is tracked. Producers append to the back buffer
+    under a lock held for the append only, and the tracker swaps it for an empty one at each frame.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.back = []  # (timestamp, item), in arrival order
+        self.frameTime = None  # time of the last frame taken
+        self.late = 0  # items of the last frame taken, whose timestamp is before the previous frame
+
+    def __len__(self):
+        return len(self.back)
+
+    def put(self, item, timestamp=None):
+        """
+        :param item: Item
+        :param timestamp: time of the detection, for the next frame taken if None
+        """
+        entry = (timestamp, item)
+        with self.lock:
+            self.back.append(entry)
+
+    def take(self, frameTime=None, dropLate=False):
+        """
+        Swap the buffers and return the items of the frame at frameTime.
+        :param frameTime: time of the frame, the items of later timestamps staying for the next frames. All items if None
+        :param dropLate: drop the items of timestamps before the previous frame, instead of tracking them in this one
+        :return: list of Item, in arrival order
+        """
+        with self.lock:
+            front, self.back = self.back, []
+        if frameTime is not None and any(timestamp is not None and timestamp > frameTime for timestamp, _ in front):
+            later = [entry for entry in front if entry[0] is not None and entry[0] > frameTime]
+            front = [entry for entry in front if entry[0] is None or entry[0] <= frameTime]
+            with self.lock:
+                self.back[:0] = later
+        items = [item for _, item in front]
+        self.late = 0
+        if self.frameTime is not None:
+            late = [timestamp is not None and timestamp <= self.frameTime for timestamp, _ in front]
+            self.late = sum(late)
+            if dropLate:
+                items = [item for item, isLate in zip(items, late) if not isLate]
+        if frameTime is not None:
+            self.frameTime = frameTime
+        return items
+
+    def clear(self):
+        with self.lock:
+            self.back = []
@@ -1,12 +1,43 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import collections
+import contextlib
+import logging
+import threading
 import time
 import numpy as np
-from scipy.stats import circmean
+from .circstats import circmean, angleDifference
+from .pointcloud import PointCloud, cloudDistance
+
+
+logger = logging.getLogger(__name__)
+malformed = collections.Counter()  # malformed items and components met by all the threads, by kind
+counting = threading.local()  # counter of the thread, see countMalformed
+
+
+def reportMalformed(kind, message, *args):
+    """ count a malformed item or component of kind ('position', 'orientation', 'smoothing' or 'empty'), log message """
+    malformed[kind] += 1
+    counter = getattr(counting, 'counter', None)
+    if counter is not None:
+        counter[kind] += 1
+    logger.debug(message, *args)
+
+
+@contextlib.contextmanager
+def countMalformed(counter):
+    """ also count in counter the malformed items and components met by this thread in the block, e.g. by a tracker frame """
+    previous = getattr(counting, 'counter', None)
+    counting.counter = counter
+    try:
+        yield counter
+    finally:
+        counting.counter = previous
 
 
 class ItemHandler(object):
+    __slots__ = ('ID', 'lastTimeSeen', 'state')
 
     NEW = 1
     UPDATE = 2
@@ -19,6 +50,9 @@ class ItemHandler(object):
 
 
 class Component(object):
+    __slots__ = ('name', 'x', 'y', 'z', 'rx', 'ry', 'rz', 'size', 'distWeight', 'baryWeight', 'speedWeight',
+                 'smooth_poses', 'smoothing_coeff', 'smoothed_x', 'smoothed_y', 'smoothed_z', 'dx', 'dy', 'dz',
+                 'acceleration', 'status', 'parents')
 
     UNKNOWN = 0
     ON_SIGHT = 1
@@ -61,12 +95,11 @@ class Component(object):
             self.smoothed_y = self.smoothing_coeff*self.y + (1 - self.smoothing_coeff)*other.smoothed_y
             self.smoothed_z = self.smoothing_coeff*self.z + (1 - self.smoothing_coeff)*other.smoothed_z
         except TypeError as e:
-            print("TypeError in updateSmoothedPose::{}".format(e))
             if self.x is None:
                 self.smoothed_x, self.smoothed_y, self.smoothed_z = other.smoothed_x, other.smoothed_y, other.smoothed_z
-                print("     Updating smoothed pose as former smoothed position")
-            if other.smoothed_x is None:
-                print("     Updating smoothed pose as current position")
+                reportMalformed('smoothing', "TypeError in updateSmoothedPose::%s, updating smoothed pose as former smoothed position", e)
+            else:
+                reportMalformed('smoothing', "TypeError in updateSmoothedPose::%s", e)
 
     def updateOrientation(self, rx=None, ry=None, rz=None):
         if rx is not None:
@@ -133,6 +166,9 @@ class Component(object):
 
 
 class Item(Component):
+    __slots__ = ('itemHandler', 'ref', 'components', 'pointCloud', 'other', 'smooth_components_poses',
+                 'components_smoothing_coeff', 'compute_speed_from_components_speeds', 'visibility', 'pool',
+                 'drx', 'dry', 'drz')
 
     COMPONENTS = 1
     POINTCLOUD = 2
@@ -147,6 +183,23 @@ class Item(Component):
         self.smooth_components_poses = False
         self.components_smoothing_coeff = False
         self.compute_speed_from_components_speeds = False
+        self.visibility = None  # bitmask of the on sight components, see distance.itemVisibility
+        self.pool = None  # ItemPool giving the components of setComponent, see recycling.ItemPool
+        self.drx, self.dry, self.drz = None, None, None  # angular speed
+
+    def reset(self, name="", lastTimeSeen=None):
+        """ set back the values of Item(name, lastTimeSeen), keeping its handler and dicts, emptied """
+        Component.__init__(self, name=name)
+        self.itemHandler.__init__(lastTimeSeen=lastTimeSeen)
+        self.ref = self.COMPONENTS
+        self.components.clear()
+        self.pointCloud = None
+        self.other.clear()
+        self.smooth_components_poses = False
+        self.components_smoothing_coeff = False
+        self.compute_speed_from_components_speeds = False
+        self.visibility = None
+        self.drx, self.dry, self.drz = None, None, None
 
     def setID(self, ID):
         self.itemHandler.ID = ID
@@ -171,10 +224,28 @@ class Item(Component):
         :param name: name of the component to add
         :param kwargs: x=0.5, ry=0.11, ...
         """
-        self.components.setdefault(name, Component(name=name)).fullUpdate(**kwargs)
-        self.components[name].smoothing_coeff = self.components_smoothing_coeff
-        self.components[name].smooth_poses = self.smooth_components_poses
-        self.components[name].setSmoothedPose()
+        component = self.components.get(name)
+        if component is None:
+            component = self.components[name] = Component(name=name) if self.pool is None else self.pool.acquireComponent(name)
+        component.fullUpdate(**kwargs)
+        self.visibility = None
+        component.smoothing_coeff = self.components_smoothing_coeff
+        component.smooth_poses = self.smooth_components_poses
+        component.setSmoothedPose()
+
+    def setPointCloud(self, points, voxelSize=None):
+        """
+        Make a POINTCLOUD item of points.
+        :param points: PointCloud, or ndarray (N, 3) not copied when it already is float32
+        :param voxelSize: downsample the points to voxels of this edge, if set
+        """
+        if not isinstance(points, PointCloud):
+            points = PointCloud(points, voxelSize)
+        elif voxelSize is not None:
+            points = points.downsampled(voxelSize)
+        self.ref = self.POINTCLOUD
+        self.pointCloud = points
+        self.visibility = None
 
     def setBarycenter(self):
         if self.ref == self.COMPONENTS and len(self.components):
@@ -196,7 +267,7 @@ class Item(Component):
                         _z += _cz
                         _baryWeight += component.baryWeight
                     except TypeError as e:
-                        print("{} : forgot to setup position of component '{}'".format(e, name))
+                        reportMalformed('position', "%s : forgot to setup position of component '%s'", e, name)
             if _baryWeight != 0:
                 self.x, self.y, self.z = _x, _y, _z
                 self.x /= _baryWeight
@@ -210,14 +281,17 @@ class Item(Component):
                     self.smoothed_z /= _baryWeight
                 if self.smooth_poses:
                     self.setSmoothedPose()
-        elif self.ref == self.POINTCLOUD and self.pointCloud is not None:
-            pass  # TODO
+        elif self.ref == self.POINTCLOUD and self.pointCloud is not None and len(self.pointCloud):
+            self.x, self.y, self.z = self.pointCloud.getCenter().tolist()
+            if self.smooth_poses:
+                self.setSmoothedPose()
         else:
-            print("empty item, fill it first")
+            reportMalformed('empty', "empty item, fill it first")
 
     def setOrientation(self):
         if self.ref == self.COMPONENTS and len(self.components):
             angleList = [[], [], []]
+            weights = []
             for name, component in self.components.items():
                 if component.status == self.ON_SIGHT:
                     try:
@@ -225,21 +299,22 @@ class Item(Component):
                         angleList[0].append(_crx)
                         angleList[1].append(_cry)
                         angleList[2].append(_crz)
+                        weights.append(component.baryWeight)
                     except TypeError as e:
-                        print("{} : forgot to setup orientation of component '{}'".format(e, name))
-            self.rx = circmean(angleList[0])
-            self.ry = circmean(angleList[1])
-            self.rz = circmean(angleList[2])
-        elif self.ref == self.POINTCLOUD and self.pointCloud is not None:
-            pass  # TODO
+                        reportMalformed('orientation', "%s : forgot to setup orientation of component '%s'", e, name)
+            self.rx = circmean(angleList[0], weights)
+            self.ry = circmean(angleList[1], weights)
+            self.rz = circmean(angleList[2], weights)
+        elif self.ref == self.POINTCLOUD and self.pointCloud is not None and len(self.pointCloud):
+            self.rx, self.ry, self.rz = self.pointCloud.getOrientation()
         else:
-            print("empty item, fill it first")
+            reportMalformed('empty', "empty item, fill it first")
 
     def setSize(self):
         pass  # How?
 
     def setSpeed(self, old_body=None):
-        if self.compute_speed_from_components_speeds:
+        if self.compute_speed_from_components_speeds and self.ref != self.POINTCLOUD:  # clouds speed is their barycenter speed
             if self.ref == self.COMPONENTS and len(self.components):
                 _speedWeight = 0
                 _dx, _dy, _dz = 0, 0, 0
@@ -260,10 +335,8 @@ class Item(Component):
                     self.dy /= _speedWeight
                     self.dz /= _speedWeight
                     self.speedWeight = _speedWeight
-            elif self.ref == self.POINTCLOUD and self.pointCloud is not None:
-                pass  # TODO
             else:
-                print("empty item, fill it first")
+                reportMalformed('empty', "empty item, fill it first")
         else:
             dx, dy, dz = self.dist(old_body)
             deltaTime = self.getTime() - old_body.getTime()
@@ -271,6 +344,21 @@ class Item(Component):
                 self.dx = dx / deltaTime
                 self.dy = dy / deltaTime
                 self.dz = dz / deltaTime
+        if old_body is not None:
+            self.setAngularSpeed(old_body)
+
+    def setAngularSpeed(self, old_body):
+        """ speed of the orientation since old_body, across the 0 / 2 pi cut. Needs the orientations of both """
+        if None in (self.rx, self.ry, self.rz, old_body.rx, old_body.ry, old_body.rz):
+            return
+        deltaTime = self.getTime() - old_body.getTime()
+        if deltaTime != 0:
+            self.drx, self.dry, self.drz = (angleDifference((self.rx, self.ry, self.rz),
+                                                            (old_body.rx, old_body.ry, old_body.rz)) / deltaTime).tolist()
+
+    def resetSpeed(self):
+        Component.resetSpeed(self)
+        self.drx, self.dry, self.drz = None, None, None
 
     def resetItemSpeed(self):
         if self.ref == self.COMPONENTS and len(self.components):
@@ -278,9 +366,9 @@ class Item(Component):
             for component in self.components.values():
                 component.resetSpeed()
         elif self.ref == self.POINTCLOUD and self.pointCloud is not None:
-            pass  # TODO
+            self.resetSpeed()
         else:
-            print("empty item, fill it first")
+            reportMalformed('empty', "empty item, fill it first")
 
     def getParents(self):
         if self.ref == self.COMPONENTS and len(self.components):
@@ -295,9 +383,9 @@ class Item(Component):
                         L.setdefault(compName, []).append(parent)
             return L
         elif self.ref == self.POINTCLOUD and self.pointCloud is not None:
-            pass  # TODO
+            return dict()  # points have no parents
         else:
-            print("empty item, fill it first")
+            reportMalformed('empty', "empty item, fill it first")
 
     def __eq__(self, other):
         """
@@ -320,7 +408,10 @@ class Item(Component):
             else:
                 return np.inf
         elif self.ref == self.POINTCLOUD:
-            pass  # TODO
+            self.distWeight = 1.
+            if self.pointCloud is None or other.pointCloud is None:
+                return np.inf
+            return cloudDistance(self.pointCloud, other.pointCloud)
 
     def __lt__(self, other):
         """
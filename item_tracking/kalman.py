@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy as np
+
+
+class KalmanFilter(object):
+    """
+    Constant velocity Kalman filter of the barycenters of all the tracks at once, by track ID.
+    The process noise is a white acceleration and the measurement noise is isotropic, so the x, y and z axes are
+    independent and share their (position, speed) covariance: each track has a state (x, y, z, dx, dy, dz)
+    and a 2x2 covariance (p00, p01, p11).
+    """
+
+    def __init__(self, processNoise=1., measurementNoise=0.01, speedVariance=1.):
+        """
+        :param processNoise: spectral density of the acceleration noise (m^2/s^3)
+        :param measurementNoise: variance of the measured barycenters (m^2)
+        :param speedVariance: variance of the speed of new tracks (m^2/s^2)
+        """
+        self.processNoise = processNoise
+        self.measurementNoise = measurementNoise
+        self.speedVariance = speedVariance
+        self.ids = np.zeros(0, dtype=np.int64)  # sorted
+        self.states = np.zeros((0, 6))
+        self.covariances = np.zeros((0, 3))
+        self.times = np.zeros(0)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def rows(self, ids):
+        """ :return: rows of the ids, -1 if not filtered """
+        ids = np.asarray(ids, dtype=np.int64)
+        if not len(self.ids):
+            return np.full(len(ids), -1, dtype=np.intp)
+        rows = np.minimum(np.searchsorted(self.ids, ids), len(self.ids) - 1)
+        return np.where(self.ids[rows] == ids, rows, -1)
+
+    def propagate(self, rows, now):
+        """ :return: states (R, 6) and covariances (R, 3) of rows predicted at now """
+        dt = now - self.times[rows]
+        q = self.processNoise
+        p00, p01, p11 = self.covariances[rows].T
+        states = self.states[rows].copy()
+        states[:, :3] += dt[:, None] * states[:, 3:]
+        covariances = np.column_stack((p00 + 2 * dt * p01 + dt * dt * p11 + q * dt ** 3 / 3.,
+                                       p01 + dt * p11 + q * dt * dt / 2.,
+                                       p11 + q * dt))
+        return states, covariances
+
+    def predict(self, ids, now):
+        """
+        :param ids: track IDs
+        :param now: time of the prediction
+        :return: predicted positions (N, 3) and variances (N,) of their distance to a measurement, nan if not filtered
+        """
+        rows = self.rows(ids)
+        known = np.flatnonzero(rows >= 0)
+        positions = np.full((len(rows), 3), np.nan)
+        variances = np.full(len(rows), np.nan)
+        states, covariances = self.propagate(rows[known], now)
+        positions[known] = states[:, :3]
+        variances[known] = covariances[:, 0] + self.measurementNoise
+        return positions, variances
+
+    def update(self, ids, measurements, now):
+        """
+        Correct the tracks with their measured barycenters, new IDs starting at rest. nan measurements are ignored.
+        :param ids: track IDs
+        :param measurements: ndarray (N, 3) of the barycenters
+        :param now: time of the measurements
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        measurements = np.asarray(measurements, dtype=float).reshape(len(ids), 3)
+        measured = ~np.isnan(measurements).any(axis=1)
+        ids, measurements = ids[measured], measurements[measured]
+        rows = self.rows(ids)
+        known = rows >= 0
+        states, covariances = self.propagate(rows[known], now)
+        r = self.measurementNoise
+        s = covariances[:, 0] + r
+        k0, k1 = covariances[:, 0] / s, covariances[:, 1] / s
+        innovation = measurements[known] - states[:, :3]
+        states[:, :3] += k0[:, None] * innovation
+        states[:, 3:] += k1[:, None] * innovation
+        covariances = np.column_stack(((1 - k0) * covariances[:, 0], (1 - k0) * covariances[:, 1],
+                                       covariances[:, 2] - k1 * covariances[:, 1]))
+        self.states[rows[known]] = states
+        self.covariances[rows[known]] = covariances
+        self.times[rows[known]] = now
+        new = ~known
+        if new.any():
+            count = int(new.sum())
+            self.insert(ids[new], np.column_stack((measurements[new], np.zeros((count, 3)))),
+                        np.tile([r, 0., self.speedVariance], (count, 1)), np.full(count, float(now)))
+
+    def insert(self, ids, states, covariances, times):
+        ids = np.concatenate((self.ids, ids))
+        order = np.argsort(ids, kind='stable')
+        self.ids = ids[order]
+        self.states = np.concatenate((self.states, states))[order]
+        self.covariances = np.concatenate((self.covariances, covariances))[order]
+        self.times = np.concatenate((self.times, times))[order]
+
+    def retain(self, ids):
+        """ forget the tracks not in ids """
+        keep = np.isin(self.ids, np.asarray(list(ids), dtype=np.int64))
+        self.ids, self.states, self.covariances, self.times = self.ids[keep], self.states[keep], self.covariances[keep], self.times[keep]
+
+    def clear(self):
+        self.retain([])
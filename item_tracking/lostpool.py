@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import collections
+import heapq
+
+
+class LostPool(object):
+    """
+    Lost tracks waiting to be seen again, in a min-heap of their expiry times.
+    Removed tracks are only dropped from the heap when they reach its top.
+    """
+
+    def __init__(self):
+        self.heap = []  # (expiry, key)
+        self.entries = collections.OrderedDict()  # key -> (expiry, item), in loss order
+        self.count = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def push(self, item, expiry):
+        """
+        :param item: lost Item
+        :param expiry: time from which the item is dropped
+        :return: key of the item in the pool
+        """
+        key = self.count
+        self.count += 1
+        self.entries[key] = (expiry, item)
+        heapq.heappush(self.heap, (expiry, key))
+        return key
+
+    def remove(self, key):
+        """ :return: the item of key, no longer in the pool """
+        item = self.entries.pop(key)[1]
+        if len(self.heap) > 2 * len(self.entries) + 16:  # too many removed entries left in the heap
+            self.heap = [(expiry, k) for k, (expiry, _) in self.entries.items()]
+            heapq.heapify(self.heap)
+        return item
+
+    def expire(self, now):
+        """
+        :param now: current time
+        :return: the items whose expiry is reached, no longer in the pool
+        """
+        expired = []
+        while self.heap and self.heap[0][0] <= now:
+            _, key = heapq.heappop(self.heap)
+            entry = self.entries.pop(key, None)
+            if entry is not None:
+                expired.append(entry[1])
+        return expired
+
+    def keys(self):
+        return list(self.entries.keys())
+
+    def items(self):
+        return [item for _, item in self.entries.values()]
+
+    def clear(self):
+        self.heap = []
+        self.entries.clear()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy as np
+
+
+def candidateEdges(distance, thresholdDist):
+    """
+    :param distance: ndarray (new, tracked)
+    :param thresholdDist: pairs further than this can not be matched
+    :return: rows, cols, costs of the pairs closer than thresholdDist, in row major order
+    """
+    rows, cols = np.nonzero(distance < thresholdDist)
+    return rows, cols, distance[rows, cols]
+
+
+def greedyMatch(rows, cols, costs, shape, thresholdDist):
+    """
+    Closest pair first: same matches as repeated argmin over the whole matrix, ties included,
+    but the edges are sorted once.
+    :return: matched rows, matched cols, by increasing cost
+    """
+    order = np.argsort(costs, kind='stable')
+    rowFree = np.ones(shape[0], dtype=bool)
+    colFree = np.ones(shape[1], dtype=bool)
+    left = min(shape)
+    matchedRows, matchedCols = [], []
+    for l, c in zip(rows[order].tolist(), cols[order].tolist()):
+        if rowFree[l] and colFree[c]:
+            rowFree[l] = colFree[c] = False
+            matchedRows.append(l)
+            matchedCols.append(c)
+            left -= 1
+            if not left:
+                break
+    return np.array(matchedRows, dtype=np.intp), np.array(matchedCols, dtype=np.intp)
+
+
+def optimalMatch(rows, cols, costs, shape, thresholdDist):
+    """
+    Minimum total cost assignment (Hungarian), an unmatched item costing thresholdDist.
+    Only rows and cols having an edge enter the assignment problem.
+    :return: matched rows, matched cols, by increasing cost
+    """
+    from scipy.optimize import linear_sum_assignment
+    if not len(costs):
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    usedRows, rowIdx = np.unique(rows, return_inverse=True)
+    usedCols, colIdx = np.unique(cols, return_inverse=True)
+    noEdge = thresholdDist if np.isfinite(thresholdDist) else costs.max() + 1.
+    cost = np.full((len(usedRows), len(usedCols)), noEdge)
+    edge = np.zeros(cost.shape, dtype=bool)
+    cost[rowIdx, colIdx] = costs
+    edge[rowIdx, colIdx] = True
+    l, c = linear_sum_assignment(cost)
+    keep = edge[l, c]
+    l, c = l[keep], c[keep]
+    order = np.argsort(cost[l, c], kind='stable')
+    return usedRows[l[order]], usedCols[c[order]]
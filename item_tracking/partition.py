@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import itertools
+import numpy as np
+from .gating import expandRanges
+
+
+def partition(newPoints, trackedPoints, size, radius):
+    """
+    Split space into cubic tiles. Each new item goes to the tile of its barycenter, each tracked item to every tile
+    closer than radius, so that the pairs closer than radius are all in the tile of their new item.
+    :param newPoints: ndarray (N, 3), nan rows are ignored
+    :param trackedPoints: ndarray (M, 3), nan rows are ignored
+    :param size: tile edge, at least radius
+    :param radius: max distance of the pairs
+    :return: list of (new items indexes, tracked items indexes) of the tiles having both
+    """
+    size = max(float(size), radius)
+    newRows = np.flatnonzero(~np.isnan(newPoints).any(axis=1))
+    trackedRows = np.flatnonzero(~np.isnan(trackedPoints).any(axis=1))
+    if not len(newRows) or not len(trackedRows):
+        return []
+    newTiles = np.floor(newPoints[newRows] / size).astype(np.int64)
+    trackedTiles = np.floor(trackedPoints[trackedRows] / size).astype(np.int64)
+    low = np.minimum(newTiles.min(axis=0), trackedTiles.min(axis=0)) - 1
+    dims = np.maximum(newTiles.max(axis=0), trackedTiles.max(axis=0)) + 1 - low + 1
+
+    def keys(tiles):
+        tiles = tiles - low
+        return (tiles[:, 0] * dims[1] + tiles[:, 1]) * dims[2] + tiles[:, 2]
+
+    # tracked items in their tile and in the neighbour tiles closer than radius
+    haloKeys, haloRows = [], []
+    position = trackedPoints[trackedRows] / size - trackedTiles  # in [0, 1) within the tile
+    for offset in itertools.product((-1, 0, 1), repeat=3):
+        offset = np.array(offset)
+        gap = np.where(offset < 0, position, np.where(offset > 0, 1 - position, 0)) * size
+        close = (gap ** 2).sum(axis=1) <= radius * radius
+        haloKeys.append(keys(trackedTiles[close] + offset))
+        haloRows.append(trackedRows[close])
+    haloKeys, haloRows = np.concatenate(haloKeys), np.concatenate(haloRows)
+
+    newKeys = keys(newTiles)
+    newOrder, haloOrder = np.argsort(newKeys, kind='stable'), np.lexsort((haloRows, haloKeys))
+    newKeys, haloKeys, haloRows = newKeys[newOrder], haloKeys[haloOrder], haloRows[haloOrder]
+    tiles, starts = np.unique(newKeys, return_index=True)
+    ends = np.append(starts[1:], len(newKeys))
+    haloStarts = np.searchsorted(haloKeys, tiles, side='left')
+    haloEnds = np.searchsorted(haloKeys, tiles, side='right')
+    return [(newRows[newOrder[start:end]], haloRows[haloStart:haloEnd])
+            for start, end, haloStart, haloEnd in zip(starts, ends, haloStarts, haloEnds) if haloEnd > haloStart]
+
+
+def tilePairs(tiles):
+    """
+    :param tiles: list of (new items indexes, tracked items indexes)
+    :return: rows, cols of every (new, tracked) pair of each tile
+    """
+    if not tiles:
+        return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+    rows = np.concatenate([tile[0] for tile in tiles])
+    cols = np.concatenate([tile[1] for tile in tiles])
+    rowCounts = np.array([len(tile[0]) for tile in tiles])
+    colCounts = np.array([len(tile[1]) for tile in tiles])
+    pairCounts = np.repeat(colCounts, rowCounts)
+    return np.repeat(rows, pairCounts), cols[expandRanges(np.repeat(np.cumsum(colCounts) - colCounts, rowCounts), pairCounts)]
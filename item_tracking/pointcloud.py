@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import numpy as np
+
+
+CHAMFER = 1
+HAUSDORFF = 2
+
+
+def voxelDownsample(points, voxelSize):
+    """
+    :param points: ndarray (N, 3)
+    :param voxelSize: edge of the voxels
+    :return: contiguous float32 ndarray (V, 3) of the centroid of the points of each voxel, in voxel order
+    """
+    points = np.asarray(points, dtype=np.float32)
+    if not len(points):
+        return np.ascontiguousarray(points.reshape(0, 3))
+    voxels = np.floor(points / voxelSize).astype(np.int64)
+    voxels -= voxels.min(axis=0)
+    dims = voxels.max(axis=0) + 1
+    keys = (voxels[:, 0] * dims[1] + voxels[:, 1]) * dims[2] + voxels[:, 2]
+    _, labels, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    labels = labels.reshape(-1)
+    sums = np.column_stack([np.bincount(labels, weights=points[:, axis], minlength=len(counts)) for axis in range(3)])
+    return np.ascontiguousarray(sums / counts[:, None], dtype=np.float32)
+
+
+def principalOrientation(points, center):
+    """
+    :param points: ndarray (N, 3)
+    :param center: centroid of points
+    :return: rx, ry, rz (rad), xyz Euler angles of the principal axes of the points, the main one being x.
+             Each axis points to the side of its largest coordinate, so that the orientation is stable from frame to frame
+    """
+    centered = np.asarray(points, dtype=float) - center
+    covariance = np.dot(centered.T, centered) / max(len(centered), 1)
+    _, vectors = np.linalg.eigh(covariance)
+    axes = vectors[:, ::-1]  # decreasing variance
+    axes *= np.where(axes[np.abs(axes).argmax(axis=0), range(3)] < 0, -1., 1.)
+    axes[:, 2] = np.cross(axes[:, 0], axes[:, 1])  # right handed
+    return (float(np.arctan2(axes[2, 1], axes[2, 2])), float(np.arcsin(-np.clip(axes[2, 0], -1., 1.))),
+            float(np.arctan2(axes[1, 0], axes[0, 0])))
+
+
+class PointCloud(object):
+    """
+    Points of an Item.POINTCLOUD item, as a float32 ndarray (N, 3), with its centroid, bounding ball, orientation and
+    KD-tree (scipy) computed once, when first needed. The centroid of a downsampled cloud is the one of all its points.
+    """
+
+    __slots__ = ('points', 'center', 'bounds', 'orientation', 'tree')
+
+    def __init__(self, points, voxelSize=None):
+        """
+        :param points: ndarray (N, 3), not copied when it already is float32
+        :param voxelSize: downsample the points to the centroids of voxels of this edge, if set
+        """
+        points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+        self.center = None
+        if voxelSize is not None:
+            self.center = points.mean(axis=0, dtype=np.float64) if len(points) else None
+            points = voxelDownsample(points, voxelSize)
+        self.points = points
+        self.bounds = None
+        self.orientation = None
+        self.tree = None
+
+    @classmethod
+    def fromBuffer(cls, buffer, pointStep=12, offset=0, count=None, voxelSize=None):
+        """
+        Points read without copy from a buffer of float32 x, y, z, e.g. the data of a ROS PointCloud2
+        (PointCloud.fromBuffer(msg.data, msg.point_step, x_field.offset)). Little endian is assumed.
+        :param buffer: bytes, bytearray, memoryview or ndarray
+        :param pointStep: bytes between two points
+        :param offset: bytes before the x of the first point
+        :param count: number of points, all those of the buffer if None
+        :param voxelSize: downsample the points, see __init__
+        """
+        size = memoryview(buffer).nbytes
+        if count is None:
+            count = (size - offset + pointStep - 12) // pointStep if size >= offset + 12 else 0
+        points = np.ndarray((count, 3), dtype='<f4', buffer=buffer, offset=offset, strides=(pointStep, 4))
+        return cls(points, voxelSize)
+
+    def __len__(self):
+        return len(self.points)
+
+    def getCenter(self):
+        if self.center is None:
+            self.center = self.points.mean(axis=0, dtype=np.float64)
+        return self.center
+
+    def getBounds(self):
+        """ :return: mean of the points and their max distance to it """
+        if self.bounds is None:
+            mean = self.points.mean(axis=0, dtype=np.float64)
+            self.bounds = mean, float(np.sqrt(((self.points - mean) ** 2).sum(axis=1).max()))
+        return self.bounds
+
+    def getOrientation(self):
+        if self.orientation is None:
+            self.orientation = principalOrientation(self.points, self.getCenter())
+        return self.orientation
+
+    def getTree(self):
+        if self.tree is None:
+            from scipy.spatial import cKDTree
+            self.tree = cKDTree(self.points)
+        return self.tree
+
+    def downsampled(self, voxelSize):
+        cloud = PointCloud(voxelDownsample(self.points, voxelSize))
+        cloud.center = self.getCenter() if len(self) else None
+        return cloud
+
+
+def cloudDistance(cloud, other, metric=CHAMFER, offset=None):
+    """
+    :param cloud, other: PointCloud
+    :param metric: CHAMFER (mean of the nearest neighbours distances of both clouds, halved) or HAUSDORFF (max of them)
+    :param offset: x, y, z added to the points of other, e.g. its predicted motion
+    :return: symmetric distance of the clouds, np.inf if one is empty
+    """
+    if not len(cloud) or not len(other):
+        return np.inf
+    offset = np.zeros(3) if offset is None else np.asarray(offset, dtype=float)
+    forward = other.getTree().query(cloud.points - offset)[0]  # other + offset nearest to each point of cloud
+    backward = cloud.getTree().query(other.points + offset)[0]
+    if metric == HAUSDORFF:
+        return float(max(forward.max(), backward.max()))
+    return float((forward.mean() + backward.mean()) / 2.)
+
+
+def cloudBounds(clouds):
+    """ :return: means (N, 3) and radii (N,) of the points of clouds, nan for None or empty clouds """
+    bounds = [cloud.getBounds() if cloud is not None and len(cloud) else ((np.nan,) * 3, np.nan) for cloud in clouds]
+    return np.array([mean for mean, _ in bounds], dtype=float).reshape(len(clouds), 3), np.array([radius for _, radius in bounds], dtype=float)
+
+
+def cloudDistances(clouds, others, rows, cols, maxDistance=np.inf, metric=CHAMFER, offsets=None):
+    """
+    Distances of the (clouds[rows[p]], others[cols[p]]) pairs. The mean of the neighbours distances from a cloud is at
+    least the distance of the mean of its points to the other cloud ball, so a pair whose means are farther than
+    maxDistance plus half of the radii of both clouds is left to np.inf without searching any neighbour.
+    :param clouds, others: lists of PointCloud, or None
+    :param rows, cols: pairs indexes
+    :param maxDistance: distance over which pairs are not computed
+    :param metric: CHAMFER or HAUSDORFF
+    :param offsets: ndarray (len(others), 3) added to the points of others
+    :return: distances (P,)
+    """
+    distances = np.full(len(rows), np.inf)
+    centers, radii = cloudBounds(clouds)
+    otherCenters, otherRadii = cloudBounds(others)
+    if offsets is not None:
+        otherCenters = otherCenters + offsets
+    with np.errstate(invalid='ignore'):
+        gap = np.sqrt(((centers[rows] - otherCenters[cols]) ** 2).sum(axis=1)) - (radii[rows] + otherRadii[cols]) / 2.
+    for p in np.flatnonzero(gap < maxDistance).tolist():
+        distances[p] = cloudDistance(clouds[rows[p]], others[cols[p]], metric, None if offsets is None else offsets[cols[p]])
+    return distances
+
+
+def packClouds(clouds):
+    """
+    :param clouds: list of PointCloud, or None
+    :return: points count of each cloud (N,) int64, -1 for None, their centers (N, 3) float64, nan if not computed,
+             and their points one after the other (P, 3) float32
+    """
+    counts = np.array([-1 if cloud is None else len(cloud) for cloud in clouds], dtype=np.int64)
+    centers = np.array([(np.nan,) * 3 if cloud is None or cloud.center is None else cloud.center for cloud in clouds],
+                       dtype=float).reshape(len(clouds), 3)
+    points = np.concatenate([cloud.points for cloud in clouds if cloud is not None] + [np.zeros((0, 3), dtype=np.float32)])
+    return counts, centers, points.astype(np.float32, copy=False)
+
+
+def unpackClouds(counts, centers, points):
+    """ :return: list of the PointCloud (None for a -1 count) packed by packClouds, viewing points without copy """
+    offsets = np.concatenate(([0], np.cumsum(np.maximum(counts, 0)))).tolist()
+    clouds = []
+    for i, (count, center) in enumerate(zip(np.asarray(counts).tolist(), np.asarray(centers))):
+        cloud = None
+        if count >= 0:
+            cloud = PointCloud(points[offsets[i]:offsets[i + 1]])
+            cloud.center = None if np.isnan(center).any() else center
+        clouds.append(cloud)
+    return clouds
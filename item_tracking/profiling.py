@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import bisect
+import collections
+import time
+import numpy as np
+from . import item
+
+
+clock = getattr(time, 'perf_counter', time.time)
+
+
+class Histogram(object):
+    """ Counts of durations in log spaced bins, 10 per decade from 1 us to 100 s """
+
+    EDGES = np.logspace(-6, 2, 81).tolist()
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES) + 1)
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+
+    def add(self, value):
+        self.counts[bisect.bisect_right(self.EDGES, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def percentile(self, q):
+        """ :return: upper edge of the bin holding the q-th percentile, max for the last bin """
+        if not self.count:
+            return np.nan
+        rank = np.ceil(q / 100. * self.count)
+        b = int(np.searchsorted(np.cumsum(self.counts), max(rank, 1)))
+        return min(self.EDGES[b], self.max) if b < len(self.EDGES) else self.max
+
+
+class RingBuffer(object):
+    """ Sink keeping the capacity last frame records """
+
+    def __init__(self, capacity=1000):
+        self.buffer = collections.deque(maxlen=capacity)
+
+    def __call__(self, record):
+        self.buffer.append(record)
+
+    def __len__(self):
+        return len(self.buffer)
+
+    def records(self):
+        return list(self.buffer)
+
+
+class Profiler(object):
+    """
+    Instrumentation of Tracker.updateTracking and Tracker.updateFromArrays, given with tracker.setParams(profiler=Profiler()).
+    Each frame gives a record dict to the sink:
+    - 'frame', 'start': frame number and clock at its start
+    - 'stages': wall time (s) of each stage run by updateTracking, and of the whole 'frame'
+    - 'newItems', 'trackedItems': distance matrix size, 'pairs': compared pairs, 'candidates': pairs under thresholdDist
+    - 'new', 'updated', 'lost', 'lostPool': tracks added, updated, unmatched this frame and in the lost pool
+    - 'late': items added with a timestamp before the previous frame
+    - 'level': degradation level of the frame, with frame_budget_ms (see budget)
+    - 'malformed': malformed components met during the frame, by kind
+    """
+
+    COUNTERS = ('newItems', 'trackedItems', 'pairs', 'candidates', 'new', 'updated', 'lost', 'lostPool', 'late', 'level')
+
+    def __init__(self, sink=None):
+        """
+        :param sink: callable taking the record of each frame, a RingBuffer of 1000 records if None
+        """
+        self.sink = RingBuffer() if sink is None else sink
+        self.histograms = collections.OrderedDict()
+        self.totals = collections.Counter()
+        self.malformed = collections.Counter()
+        self.frames = 0
+        self.record = None
+        self.malformedCounter = None
+        self.malformedStart = None
+
+    def startFrame(self, malformed=None):
+        """ :param malformed: Counter of the malformed components of the frame, e.g. tracker.malformed, item.malformed if None """
+        self.record = {'frame': self.frames, 'start': clock(), 'stages': collections.OrderedDict(), 'malformed': {}}
+        self.malformedCounter = item.malformed if malformed is None else malformed
+        self.malformedStart = collections.Counter(self.malformedCounter)
+
+    def stage(self, name, function, *args):
+        """ :return: function(*args), its wall time being recorded as stage name """
+        start = clock()
+        result = function(*args)
+        elapsed = clock() - start
+        self.record['stages'][name] = self.record['stages'].get(name, 0.) + elapsed
+        return result
+
+    def count(self, name, value):
+        self.record[name] = self.record.get(name, 0) + value
+
+    def endFrame(self):
+        record = self.record
+        record['stages']['frame'] = clock() - record['start']
+        for name, elapsed in record['stages'].items():
+            self.histograms.setdefault(name, Histogram()).add(elapsed)
+        for name in self.COUNTERS:
+            if name in record:
+                self.totals[name] += record[name]
+        malformed = collections.Counter(self.malformedCounter)
+        malformed.subtract(self.malformedStart)
+        record['malformed'] = dict((kind, count) for kind, count in malformed.items() if count)
+        self.malformed.update(record['malformed'])
+        self.frames += 1
+        self.record = None
+        self.sink(record)
+
+    def summary(self):
+        """ :return: report of the stage times (ms) and of the counters over every frame """
+        lines = ["{} frames".format(self.frames),
+                 "{:<24} {:>8} {:>10} {:>10} {:>10} {:>10}".format("stage", "runs", "mean", "p50", "p99", "max")]
+        for name, histogram in self.histograms.items():
+            lines.append("{:<24} {:>8} {:>10.3f} {:>10.3f} {:>10.3f} {:>10.3f}".format(
+                name, histogram.count, histogram.mean() * 1e3, histogram.percentile(50) * 1e3,
+                histogram.percentile(99) * 1e3, histogram.max * 1e3))
+        for name in self.COUNTERS:
+            if name in self.totals:
+                lines.append("{:<24} {:>8} total {:>10.1f} per frame".format(
+                    name, self.totals[name], self.totals[name] / float(max(self.frames, 1))))
+        for kind, count in sorted(self.malformed.items()):
+            lines.append("malformed {:<14} {:>8}".format(kind, count))
+        return "\n".join(lines)
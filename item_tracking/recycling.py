@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+from .item import Item, Component
+
+
+class ItemPool(object):
+    """
+    Free lists of Item and Component, reset when acquired, so that a tracker fed with new items at each frame reuses
+    the ones of the tracks it replaced or dropped instead of allocating (and garbage collecting) new ones.
+    Components set on an acquired item are taken from the pool too.
+    """
+
+    def __init__(self, capacity=1000, componentsCapacity=None):
+        """
+        :param capacity: max number of free items kept, the others being left to the garbage collector
+        :param componentsCapacity: max number of free components kept, 16 per item if None
+        """
+        self.capacity = capacity
+        self.componentsCapacity = 16 * capacity if componentsCapacity is None else componentsCapacity
+        self.freeItems = []
+        self.freeComponents = []
+        self.hits = 0  # items acquired from the free list
+        self.misses = 0  # items allocated
+        self.componentHits = 0
+        self.componentMisses = 0
+        self.released = 0
+        self.componentsReleased = 0
+        self.discarded = 0  # items and components released to a full free list
+
+    def __len__(self):
+        return len(self.freeItems)
+
+    def acquireItem(self, name="", lastTimeSeen=None):
+        """ :return: Item as Item(name, lastTimeSeen), from the free list if possible """
+        if self.freeItems:
+            self.hits += 1
+            item = self.freeItems.pop()
+            item.reset(name, lastTimeSeen)
+        else:
+            self.misses += 1
+            item = Item(name, lastTimeSeen)
+        item.pool = self
+        return item
+
+    def acquireComponent(self, name=""):
+        """ :return: Component as Component(name), from the free list if possible """
+        if self.freeComponents:
+            self.componentHits += 1
+            component = self.freeComponents.pop()
+            Component.__init__(component, name)
+            return component
+        self.componentMisses += 1
+        return Component(name)
+
+    def releaseComponent(self, component):
+        self.componentsReleased += 1
+        if len(self.freeComponents) < self.componentsCapacity:
+            self.freeComponents.append(component)
+        else:
+            self.discarded += 1
+
+    def release(self, item, keep=None):
+        """
+        Give back an item no longer referenced, with its components.
+        :param item: Item, acquired from this pool or not
+        :param keep: components dict of the item it was replaced by, whose components taken from item are not released
+        """
+        if type(item) is not Item:  # e.g. ItemView
+            return
+        for name, component in item.components.items():
+            if keep is None or keep.get(name) is not component:
+                self.releaseComponent(component)
+        item.components.clear()
+        item.pointCloud = None
+        item.other.clear()
+        item.pool = None
+        self.released += 1
+        if len(self.freeItems) < self.capacity:
+            self.freeItems.append(item)
+        else:
+            self.discarded += 1
+
+    def clear(self):
+        self.freeItems = []
+        self.freeComponents = []
+
+    def stats(self):
+        """
+        :return: dict of the hits and misses of the items and components acquired, the live ones (acquired and not
+                 released, released items not being necessarily acquired from the pool) and the free ones
+        """
+        return dict(hits=self.hits, misses=self.misses, live=self.hits + self.misses - self.released,
+                    free=len(self.freeItems), componentHits=self.componentHits, componentMisses=self.componentMisses,
+                    liveComponents=self.componentHits + self.componentMisses - self.componentsReleased,
+                    freeComponents=len(self.freeComponents), discarded=self.discarded)
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Append-only binary log of the frames given to a Tracker, and replay of this log as fast as possible,
+e.g. to search the parameters in several processes.
+
+Log layout: 'ITRK' + version (uint32), then for each frame a header (timestamp float64, N, K, flags, names bytes uint32)
+followed by poses (N, K, 3) float64, orientations (N, K, 3) float64 if flags & 1, visibility (N, K) uint8
+and the JSON component names. Frames of Item (flags & 2) then hold the rank of each component in its item (N, K) int32,
+-1 if the item has no such component, their distWeight,
+baryWeight and speedWeight (N, K, 3) float64, and the point clouds: points count of each item (N,) int64, -1 without
+cloud, centers (N, 3) float64 and points (P, 3) float32. Each block is padded to 8 bytes. A frame partly written is ignored.
+"""
+
+import json
+import os
+import struct
+import time
+import numpy as np
+from .item import Item, Component
+from .pointcloud import packClouds, unpackClouds
+
+
+MAGIC = b'ITRK'
+VERSION = 2  # 2: frames of Item
+FILE_HEADER = struct.Struct('<4sI')
+FRAME_HEADER = struct.Struct('<dIIII')
+WITH_ORIENTATIONS = 1
+FROM_ITEMS = 2
+WEIGHTS = ('distWeight', 'baryWeight', 'speedWeight')
+ITEM_BLOCKS = ('order', 'weights', 'cloud_counts', 'cloud_centers', 'cloud_points')
+
+
+def padded(size):
+    return -(-size // 8) * 8
+
+
+def itemsArrays(items):
+    """
+    :param items: list of Item
+    :return: poses (N, K, 3), orientations (N, K, 3), visibility (N, K), the K component names, the rank of the
+             components in their item (N, K), -1 for the missing ones, and their weights (N, K, 3), nan when not set
+    """
+    names = []
+    index = dict()
+    for item in items:
+        for name in item.components:
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+    poses = np.full((len(items), len(names), 3), np.nan)
+    orientations = np.full(poses.shape, np.nan)
+    weights = np.full(poses.shape, np.nan)
+    visibility = np.zeros(poses.shape[:2], dtype=bool)
+    order = np.full(poses.shape[:2], -1, dtype=np.int32)
+    for i, item in enumerate(items):
+        for rank, (name, component) in enumerate(item.components.items()):
+            k = index[name]
+            poses[i, k] = component.x, component.y, component.z
+            orientations[i, k] = component.rx, component.ry, component.rz
+            weights[i, k] = component.distWeight, component.baryWeight, component.speedWeight
+            visibility[i, k] = component.status == Component.ON_SIGHT
+            order[i, k] = rank
+    return poses, orientations, visibility, names, order, weights
+
+
+class Recorder(object):
+    """ Appends frames to a log, e.g. with tracker.setParams(recorder=Recorder(path)) """
+
+    def __init__(self, path, flush=True):
+        """
+        :param path: log file, appended if it exists
+        :param flush: flush each frame, so that a crash only loses the frame being written
+        """
+        self.path = path
+        self.flush = flush
+        self.file = open(path, 'ab')
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION))
+        else:
+            with open(path, 'rb') as f:
+                magic, version = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+            if magic != MAGIC or version > VERSION:
+                raise ValueError("{} is not a tracker log of version {} or older".format(path, VERSION))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def recordArrays(self, timestamp, poses, orientations=None, visibility=None, component_names=None):
+        """ append a frame given as Tracker.updateFromArrays arguments """
+        self.write(timestamp, poses, orientations, visibility, component_names)
+
+    def recordItems(self, timestamp, items):
+        """ append a frame of Item: their components poses, orientations, status and weights, and their point clouds """
+        poses, orientations, visibility, names, order, weights = itemsArrays(items)
+        clouds = packClouds([item.pointCloud for item in items])
+        self.write(timestamp, poses, orientations, visibility, names, FROM_ITEMS, (order, weights) + clouds)
+
+    def write(self, timestamp, poses, orientations, visibility, component_names, flags=0, blocks=()):
+        """ append a frame of updateFromArrays arguments, followed by the blocks of flags """
+        poses = np.ascontiguousarray(poses, dtype=np.float64)
+        if poses.shape[2] == 6:
+            if orientations is None:
+                orientations = poses[..., 3:]
+            poses = np.ascontiguousarray(poses[..., :3])
+        N, K = poses.shape[:2]
+        visibility = np.ones((N, K), dtype=np.uint8) if visibility is None else np.asarray(visibility, dtype=np.uint8)
+        names = json.dumps(None if component_names is None else list(component_names)).encode('utf-8')
+        flags |= 0 if orientations is None else WITH_ORIENTATIONS
+        chunks = [FRAME_HEADER.pack(timestamp, N, K, flags, len(names)), poses.tobytes()]
+        if orientations is not None:
+            chunks.append(np.ascontiguousarray(orientations, dtype=np.float64).tobytes())
+        for data in [visibility.tobytes(), names] + [np.ascontiguousarray(block).tobytes() for block in blocks]:
+            chunks.append(data + b'\0' * (padded(len(data)) - len(data)))
+        self.file.write(b''.join(chunks))
+        if self.flush:
+            self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Replay(object):
+    """ Frames of a log, read through a memory map without copy """
+
+    def __init__(self, path):
+        self.path = path
+        self.offsets = []  # frame headers offsets
+        self.data = None
+        self.refresh()
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __iter__(self):
+        for f in range(len(self)):
+            yield self.frame(f)
+
+    def refresh(self):
+        """ index the frames appended since the log was opened """
+        size = os.path.getsize(self.path)
+        if not size:
+            return
+        self.data = np.memmap(self.path, dtype=np.uint8, mode='r', shape=(size,))
+        magic, version = FILE_HEADER.unpack(self.data[:FILE_HEADER.size].tobytes())
+        if magic != MAGIC or version > VERSION:
+            raise ValueError("{} is not a tracker log of version {} or older".format(self.path, VERSION))
+        offset = self.offsets[-1] + self.frameSize(self.offsets[-1]) if self.offsets else FILE_HEADER.size
+        while offset + FRAME_HEADER.size <= size and self.frameSize(offset) is not None:
+            self.offsets.append(offset)
+            offset += self.frameSize(offset)
+
+    def header(self, offset):
+        return FRAME_HEADER.unpack(self.data[offset:offset + FRAME_HEADER.size].tobytes())
+
+    def blocks(self, offset):
+        """ :return: dict of the arrays of the frame at offset, read only views, and its size, None if it is partly written """
+        timestamp, N, K, flags, namesSize = self.header(offset)
+        layout = [('poses', np.float64, (N, K, 3))]
+        if flags & WITH_ORIENTATIONS:
+            layout.append(('orientations', np.float64, (N, K, 3)))
+        layout += [('visibility', np.bool_, (N, K)), ('component_names', np.uint8, (namesSize,))]
+        if flags & FROM_ITEMS:
+            layout += [('order', np.int32, (N, K)), ('weights', np.float64, (N, K, 3)), ('cloud_counts', np.int64, (N,)),
+                       ('cloud_centers', np.float64, (N, 3)), ('cloud_points', np.float32, None)]
+        arrays = dict()
+        end = offset + FRAME_HEADER.size
+        for name, dtype, shape in layout:
+            if shape is None:  # points of all the clouds
+                shape = (int(np.maximum(arrays['cloud_counts'], 0).sum()), 3)
+            count = int(np.prod(shape))
+            size = count * np.dtype(dtype).itemsize
+            if end + padded(size) > len(self.data):
+                return arrays, None
+            arrays[name] = np.frombuffer(self.data, dtype, count, end).reshape(shape)
+            end += padded(size)
+        return arrays, end - offset
+
+    def frameSize(self, offset):
+        return self.blocks(offset)[1]
+
+    def frame(self, f):
+        """
+        :return: dict of the updateFromArrays arguments of frame f, timestamp included, arrays being read only views.
+                 A frame of Item also has 'items', dict of its ITEM_BLOCKS arrays
+        """
+        arrays, _ = self.blocks(self.offsets[f])
+        frame = dict(timestamp=self.header(self.offsets[f])[0])
+        for name in ('poses', 'orientations', 'visibility'):
+            if name in arrays:
+                frame[name] = arrays[name]
+        frame['component_names'] = json.loads(arrays['component_names'].tobytes().decode('utf-8'))
+        if 'order' in arrays:
+            frame['items'] = dict((name, arrays[name]) for name in ITEM_BLOCKS)
+        return frame
+
+
+def frameArrays(frame):
+    """ :return: updateFromArrays arguments of a Replay frame """
+    return dict((name, value) for name, value in frame.items() if name != 'items')
+
+
+def frameItems(frame):
+    """
+    :return: list of Item of a Replay frame, with their components values not nan: the components of a frame of Item
+             in their recorded order, with their status and weights, and its point clouds, or the visible components of
+             a frame of arrays
+    """
+    names = frame['component_names'] or range(frame['poses'].shape[1])
+    values = frame['poses'] if 'orientations' not in frame else np.concatenate((frame['poses'], frame['orientations']), axis=2)
+    keys = ('x', 'y', 'z', 'rx', 'ry', 'rz')
+    visibility = frame['visibility'].tolist()
+    recorded = frame.get('items')
+    if recorded is None:
+        order = np.where(frame['visibility'], np.arange(values.shape[1]), -1).tolist()
+        weights, clouds = [None] * len(values), [None] * len(values)
+    else:
+        order, weights = recorded['order'].tolist(), recorded['weights'].tolist()
+        clouds = unpackClouds(recorded['cloud_counts'], recorded['cloud_centers'], recorded['cloud_points'])
+    names = list(names)
+    items = []
+    for rows, visibleRow, orderRow, weightRows, cloud in zip(values.tolist(), visibility, order, weights, clouds):
+        item = Item()
+        for k in sorted((k for k, rank in enumerate(orderRow) if rank >= 0), key=orderRow.__getitem__):
+            kwargs = dict((key, value) for key, value in zip(keys, rows[k]) if value == value)
+            if weightRows is not None:
+                kwargs.update(zip(WEIGHTS, weightRows[k]))
+            item.setComponent(names[k], **kwargs)
+            if not visibleRow[k]:
+                item.components[names[k]].status = Component.UNKNOWN
+        if cloud is not None:
+            item.setPointCloud(cloud)
+        items.append(item)
+    return items
+
+
+def checkArrays(tracker, frame):
+    """ raise ValueError if tracker.updateFromArrays would not track frame as tracker.updateTracking does """
+    unsupported = [name for name in ('with_lost_pool', 'partition_size', 'frame_budget_ms') if getattr(tracker, name)]
+    recorded = frame.get('items')
+    if recorded is not None:  # frame of Item
+        known = recorded['order'] >= 0
+        weights = recorded['weights'][known]
+        for name, used in (('point clouds', (recorded['cloud_counts'] >= 0).any()),
+                           ('components not on sight', (known != frame['visibility']).any()),
+                           ('component weights', (weights != 1.).any()),
+                           ('with_components_pose_smoothing', tracker.with_components_pose_smoothing)):
+            if used:
+                unsupported.append(name)
+    if unsupported:
+        raise ValueError("updateFromArrays does not support {}, replay the frames as Item".format(", ".join(unsupported)))
+
+
+def replay(tracker, log, items=None):
+    """
+    Track the frames of a log with a virtual clock: tracker.now() is the timestamp of the frame being tracked, until the
+    generator is exhausted or closed.
+    :param tracker: Tracker
+    :param log: Replay or path of a log
+    :param items: give the frames to updateTracking as Item (True) or to updateFromArrays (False), each frame being
+                  given as it was recorded if None. ValueError is raised for the frames and parameters that
+                  updateFromArrays does not support
+    :return: generator of the FrameResult of each frame
+    """
+    log = log if isinstance(log, Replay) else Replay(log)
+    clock = [0.]
+    now, tracker.now = tracker.now, lambda: clock[0]
+    try:
+        for frame in log:
+            clock[0] = frame['timestamp']
+            if items or (items is None and 'items' in frame):
+                yield tracker.trackFrame(frameItems(frame))
+            else:
+                checkArrays(tracker, frame)
+                yield tracker.trackFrame(frameArrays(frame))
+    finally:
+        tracker.now = now
+
+
+def defaultScore(results):
+    """ :return: dict of the frames, births, deaths and mean tracks not lost of the results """
+    frames = births = deaths = tracks = 0
+    for result in results:
+        frames += 1
+        births += len(result.births)
+        deaths += len(result.deaths)
+        tracks += len(result.tracks.ids) if hasattr(result.tracks, 'ids') else len(result.tracks)
+    return dict(frames=frames, births=births, deaths=deaths, meanTracks=tracks / float(max(frames, 1)))
+
+
+def evaluate(job):
+    """ replay a log with a set of params, in a worker process """
+    from .tracker import Tracker
+    path, params, items, score = job
+    tracker = Tracker()
+    tracker.setParams(**params)
+    start = time.time()
+    result = score(replay(tracker, path, items))
+    return params, result, time.time() - start
+
+
+def sweep(path, paramsList, score=defaultScore, processes=None, items=None):
+    """
+    Replay the log once per set of params, in processes sharing the memory map of the log.
+    :param path: log file
+    :param paramsList: list of dict of Tracker.setParams arguments
+    :param score: picklable function of the results generator of a replay, defaultScore if None
+    :param processes: number of processes, the number of cpus if None, no process if 1
+    :param items: replay the frames as Item, or as they were recorded if None, see replay
+    :return: list of (params, score, seconds), in paramsList order
+    """
+    jobs = [(path, params, items, score or defaultScore) for params in paramsList]
+    if processes == 1:
+        return [evaluate(job) for job in jobs]
+    import multiprocessing
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(evaluate, jobs)
+    finally:
+        pool.close()
+        pool.join()
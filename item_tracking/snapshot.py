@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Columnar snapshot of a Tracker state in a .npz file, see Tracker.saveState and Tracker.loadState.
+"""
+
+import json
+import numpy as np
+from .item import Item, Component
+from .pointcloud import packClouds, unpackClouds
+from .batch import gather
+from .store import TrackStore
+from .kalman import KalmanFilter
+
+
+VERSION = 2  # 2: Kalman filter, items references, point clouds and angular speeds
+
+COMPONENT_ATTRIBUTES = ('x', 'y', 'z', 'rx', 'ry', 'rz', 'smoothed_x', 'smoothed_y', 'smoothed_z', 'dx', 'dy', 'dz',
+                        'distWeight', 'baryWeight', 'speedWeight', 'smoothing_coeff', 'smooth_poses', 'status')
+ITEM_ATTRIBUTES = COMPONENT_ATTRIBUTES + ('components_smoothing_coeff', 'smooth_components_poses',
+                                          'compute_speed_from_components_speeds')
+HANDLER_ATTRIBUTES = ('ID', 'lastTimeSeen', 'state')
+ANGULAR_SPEED_ATTRIBUTES = ('drx', 'dry', 'drz')
+FLAGS = ('smooth_poses', 'smooth_components_poses', 'compute_speed_from_components_speeds')
+INTEGERS = ('status', 'ID', 'state')
+KALMAN_FIELDS = ('ids', 'states', 'covariances', 'times')
+
+
+def packItems(items, prefix, names):
+    """
+    :param items: list of Item with components or point clouds
+    :param prefix: prefix of the arrays names
+    :param names: dict component name -> index, new names being added
+    :return: dict of arrays: attributes of the items and of their components, in their iteration order, and the points
+             of their clouds one after the other (-1 points for items without cloud)
+    """
+    components = [component for item in items for component in item.components.values()]
+    for component in components:
+        names.setdefault(component.name, len(names))
+    cloudCounts, cloudCenters, cloudPoints = packClouds([item.pointCloud for item in items])
+    return {
+        prefix + 'items': gather(items, ITEM_ATTRIBUTES).reshape(len(items), len(ITEM_ATTRIBUTES)),
+        prefix + 'handlers': gather([item.itemHandler for item in items], HANDLER_ATTRIBUTES).reshape(len(items), len(HANDLER_ATTRIBUTES)),
+        prefix + 'counts': np.array([len(item.components) for item in items], dtype=np.int64),
+        prefix + 'columns': np.array([names[component.name] for component in components], dtype=np.int64),
+        prefix + 'components': gather(components, COMPONENT_ATTRIBUTES).reshape(len(components), len(COMPONENT_ATTRIBUTES)),
+        prefix + 'refs': np.array([item.ref for item in items], dtype=np.int64),
+        prefix + 'angular_speeds': gather(items, ANGULAR_SPEED_ATTRIBUTES).reshape(len(items), len(ANGULAR_SPEED_ATTRIBUTES)),
+        prefix + 'cloud_counts': cloudCounts,
+        prefix + 'cloud_centers': cloudCenters,
+        prefix + 'cloud_points': cloudPoints,
+    }
+
+
+def pythonRows(values, attributes):
+    """ :return: list of the rows of values as tuples of python values, None for nan, bool flags and int states """
+    columns = []
+    for name, column in zip(attributes, values.T):
+        if name in FLAGS:
+            columns.append([bool(value) for value in column.tolist()])
+        elif name in INTEGERS:
+            converted = np.where(np.isnan(column), 0, column).astype(np.int64).astype(object)
+            converted[np.isnan(column)] = None
+            columns.append(converted.tolist())
+        else:
+            converted = column.astype(object)
+            converted[np.isnan(column)] = None
+            columns.append(converted.tolist())
+    return list(zip(*columns)) if columns else []
+
+
+def unpackItems(arrays, prefix, names):
+    """ :return: list of the Item packed by packItems, COMPONENTS items without cloud nor angular speed for version 1 arrays """
+    items = []
+    count = len(arrays[prefix + 'counts'])
+    refs = arrays.get(prefix + 'refs', np.full(count, Item.COMPONENTS)).tolist()
+    clouds = [None] * count
+    angularSpeeds = [(None, None, None)] * count
+    if prefix + 'angular_speeds' in arrays:
+        angularSpeeds = pythonRows(arrays[prefix + 'angular_speeds'], ANGULAR_SPEED_ATTRIBUTES)
+    if prefix + 'cloud_counts' in arrays:
+        clouds = unpackClouds(arrays[prefix + 'cloud_counts'], arrays[prefix + 'cloud_centers'], arrays[prefix + 'cloud_points'])
+    components = iter(zip(arrays[prefix + 'columns'].tolist(),
+                          pythonRows(arrays[prefix + 'components'], COMPONENT_ATTRIBUTES)))
+    for i, (values, handler, count) in enumerate(zip(pythonRows(arrays[prefix + 'items'], ITEM_ATTRIBUTES),
+                                                     pythonRows(arrays[prefix + 'handlers'], HANDLER_ATTRIBUTES),
+                                                     arrays[prefix + 'counts'].tolist())):
+        item = Item()
+        for name, value in zip(ITEM_ATTRIBUTES, values):
+            setattr(item, name, value)
+        item.itemHandler.ID, item.itemHandler.lastTimeSeen, item.itemHandler.state = handler
+        item.ref, item.pointCloud = refs[i], clouds[i]
+        item.drx, item.dry, item.drz = angularSpeeds[i]
+        for _ in range(count):
+            column, componentValues = next(components)
+            component = Component(name=names[column])
+            for name, value in zip(COMPONENT_ATTRIBUTES, componentValues):
+                setattr(component, name, value)
+            item.components[component.name] = component
+        items.append(item)
+    return items
+
+
+def saveState(tracker, path, params):
+    """
+    :param tracker: Tracker
+    :param path: file or path of the .npz file
+    :param params: names of the parameters to save
+    """
+    names = dict()
+    arrays = packItems(tracker.trackedItems, 'tracked_', names)
+    lostItems = tracker.lostTracks.items()
+    arrays.update(packItems(lostItems, 'lost_', names))
+    arrays['lost_expiry'] = np.array([expiry for expiry, _ in tracker.lostTracks.entries.values()], dtype=float)
+    store = tracker.store
+    K = len(tracker.componentNames)
+    for field in TrackStore.ITEM_FIELDS:
+        arrays['store_' + field] = getattr(store, field)[store.slots]
+    for field in TrackStore.COMPONENT_FIELDS:
+        arrays['store_' + field] = getattr(store, field)[store.slots, :K]
+    if tracker.kalman is not None:
+        for field in KALMAN_FIELDS:
+            arrays['kalman_' + field] = getattr(tracker.kalman, field)
+    header = dict(version=VERSION, maxID=tracker.maxID,
+                  params=dict((name, getattr(tracker, name)) for name in params),
+                  names=sorted(names, key=names.get), storeNames=tracker.componentNames)
+    arrays['header'] = np.frombuffer(json.dumps(header).encode('utf-8'), dtype=np.uint8)
+    np.savez(path, **arrays)
+
+
+def loadState(tracker, path, withParams=True):
+    """
+    Restore in tracker the state saved by saveState.
+    :param withParams: also restore the saved parameters
+    """
+    with np.load(path) as arrays:
+        arrays = dict(arrays.items())
+    header = json.loads(arrays['header'].tobytes().decode('utf-8'))
+    if header['version'] > VERSION:
+        raise ValueError("tracker state version {} is newer than the supported version {}".format(header['version'], VERSION))
+    if withParams:
+        tracker.setParams(**header['params'])
+    tracker.maxID = header['maxID']
+    tracker.newItems = []
+    tracker.trackedItems = unpackItems(arrays, 'tracked_', header['names'])
+    tracker.lostTracks.clear()
+    for item, expiry in zip(unpackItems(arrays, 'lost_', header['names']), arrays['lost_expiry'].tolist()):
+        tracker.lostTracks.push(item, expiry)
+
+    tracker.componentNames = list(header['storeNames'])
+    tracker.componentIndex = dict((name, k) for k, name in enumerate(tracker.componentNames))
+    N, K = len(arrays['store_ids']), len(tracker.componentNames)
+    store = tracker.store = TrackStore(N, K)
+    for field in TrackStore.ITEM_FIELDS:
+        getattr(store, field)[...] = arrays['store_' + field]
+    for field in TrackStore.COMPONENT_FIELDS:
+        getattr(store, field)[...] = arrays['store_' + field]
+    store.slots = np.arange(N, dtype=np.intp)
+    store.used = N
+
+    tracker.kalman = None
+    if tracker.with_kalman:
+        tracker.kalman = KalmanFilter(tracker.kalman_process_noise, tracker.kalman_measurement_noise)
+        if 'kalman_ids' in arrays:  # filtered tracks of version 2
+            for field in KALMAN_FIELDS:
+                setattr(tracker.kalman, field, arrays['kalman_' + field])
@@ -0,0 +1,258 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import collections
+import heapq
+import numpy as np
+from .item import Item, ItemHandler, Component
+
+
+ArrayTracks = collections.namedtuple('ArrayTracks', ['ids', 'states', 'times', 'barycenters', 'speeds'])
+
+
+class TrackStore(object):
+    """
+    Columnar state of the items tracked by Tracker.updateFromArrays.
+    Each item owns a row (slot) of preallocated arrays, each interned component a column,
+    and both grow by doubling. None values are stored as nan.
+    """
+
+    ITEM_FIELDS = ('ids', 'states', 'times', 'status', 'barycenters', 'smoothedBarycenters',
+                   'baryWeights', 'speedWeights', 'speeds')
+    COMPONENT_FIELDS = ('poses', 'smoothedPoses', 'orientations', 'componentSpeeds', 'weights', 'known', 'onSight')
+    WEIGHTS = ('distWeight', 'baryWeight', 'speedWeight')  # order of the last axis of weights
+
+    def __init__(self, capacity=0, components=0):
+        self.slots = np.arange(0, dtype=np.intp)  # slots of the tracked items, in tracking order
+        self.used = 0  # slots under used are allocated or free
+        self.free = []  # heap of free slots under used
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.states = np.zeros(capacity, dtype=np.int8)
+        self.times = np.zeros(capacity)
+        self.status = np.zeros(capacity, dtype=np.int8)
+        self.barycenters = np.zeros((capacity, 3))
+        self.smoothedBarycenters = np.zeros((capacity, 3))
+        self.baryWeights = np.zeros(capacity)
+        self.speedWeights = np.zeros(capacity)
+        self.speeds = np.zeros((capacity, 3))
+        self.poses = np.zeros((capacity, components, 3))
+        self.smoothedPoses = np.zeros((capacity, components, 3))
+        self.orientations = np.zeros((capacity, components, 3))
+        self.componentSpeeds = np.zeros((capacity, components, 3))
+        self.weights = np.zeros((capacity, components, 3))
+        self.known = np.zeros((capacity, components), dtype=bool)
+        self.onSight = np.zeros((capacity, components), dtype=bool)
+        self.reset(np.arange(capacity))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def capacity(self):
+        return len(self.ids)
+
+    def componentsCount(self):
+        return self.known.shape[1]
+
+    def nbytes(self):
+        return sum([getattr(self, name).nbytes for name in self.ITEM_FIELDS + self.COMPONENT_FIELDS])
+
+    def reset(self, slots):
+        """ default values of new items, as Item.__init__ """
+        self.ids[slots] = 0
+        self.states[slots] = ItemHandler.NEW
+        self.times[slots] = np.nan
+        self.status[slots] = Component.ON_SIGHT
+        self.barycenters[slots] = np.nan
+        self.smoothedBarycenters[slots] = np.nan
+        self.baryWeights[slots] = 1.
+        self.speedWeights[slots] = 1.
+        self.speeds[slots] = np.nan
+        for name in ('poses', 'smoothedPoses', 'orientations', 'componentSpeeds'):
+            getattr(self, name)[slots] = np.nan
+        self.weights[slots] = 1.
+        self.known[slots] = False
+        self.onSight[slots] = False
+
+    def grow(self, capacity=None, components=None):
+        """ reallocate to at least capacity slots and components columns """
+        capacity = max(capacity or 0, self.capacity())
+        components = max(components or 0, self.componentsCount())
+        if capacity == self.capacity() and components == self.componentsCount():
+            return
+        if capacity > self.capacity():
+            capacity = max(capacity, 2 * self.capacity())
+        if components > self.componentsCount():
+            components = max(components, 2 * self.componentsCount())
+        other = TrackStore(capacity, components)
+        N, K = self.capacity(), self.componentsCount()
+        for name in self.ITEM_FIELDS:
+            getattr(other, name)[:N] = getattr(self, name)
+        for name in self.COMPONENT_FIELDS:
+            getattr(other, name)[:N, :K] = getattr(self, name)
+        for name in self.ITEM_FIELDS + self.COMPONENT_FIELDS:
+            setattr(self, name, getattr(other, name))
+
+    def allocate(self, n):
+        """
+        :param n: number of slots
+        :return: reset slots, lowest free ones first
+        """
+        n = int(n)
+        reused = [heapq.heappop(self.free) for _ in range(min(n, len(self.free)))]
+        fresh = np.arange(self.used, self.used + n - len(reused))
+        self.used += len(fresh)
+        self.grow(capacity=self.used)
+        slots = np.concatenate((np.array(reused, dtype=np.intp), fresh)).astype(np.intp)
+        self.reset(slots)
+        return slots
+
+    def release(self, slots):
+        self.reset(slots)
+        for slot in np.asarray(slots).tolist():
+            heapq.heappush(self.free, slot)
+
+    def tracks(self):
+        slots = self.slots
+        return ArrayTracks(self.ids[slots], self.states[slots], self.times[slots],
+                           self.barycenters[slots], self.speeds[slots])
+
+    def item(self, slot, componentNames):
+        """
+        :param slot: slot of a tracked item
+        :param componentNames: name of each component column
+        :return: ItemView reading and writing the store
+        """
+        return ItemView(self, slot, componentNames)
+
+    def items(self, componentNames, rows=None):
+        """
+        :param componentNames: name of each component column
+        :param rows: indexes of the tracked items, all if None
+        :return: list of ItemView
+        """
+        slots = self.slots if rows is None else self.slots[rows]
+        return [ItemView(self, slot, componentNames) for slot in np.asarray(slots).tolist()]
+
+
+class ItemViews(object):
+    """ Sequence of the ItemView of slots of a TrackStore, each one created when read """
+
+    def __init__(self, store, slots, componentNames):
+        self.store = store
+        self.slots = np.asarray(slots).tolist()
+        self.componentNames = componentNames
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __getitem__(self, row):
+        return ItemView(self.store, self.slots[row], self.componentNames)
+
+
+class StoreField(object):
+    """ Descriptor of a view attribute stored in field[slot, (column,) axis] of a TrackStore, nan meaning None """
+
+    def __init__(self, field, axis=None, cast=float):
+        self.field = field
+        self.axis = axis
+        self.cast = cast
+
+    def index(self, view):
+        index = (view._slot,) if view._column is None else (view._slot, view._column)
+        return index if self.axis is None else index + (self.axis,)
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        value = getattr(view._store, self.field)[self.index(view)]
+        if self.cast is float:
+            return None if np.isnan(value) else float(value)
+        return self.cast(value)
+
+    def __set__(self, view, value):
+        getattr(view._store, self.field)[self.index(view)] = np.nan if value is None else value
+
+
+class StatusField(StoreField):
+    """ Component.status stored as the onSight bool of a component, or as the status of an item """
+
+    def __get__(self, view, owner=None):
+        if view is None:
+            return self
+        if view._column is None:
+            return int(view._store.status[view._slot])
+        return Component.ON_SIGHT if view._store.onSight[view._slot, view._column] else Component.UNKNOWN
+
+    def __set__(self, view, value):
+        if view._column is None:
+            view._store.status[view._slot] = value
+        else:
+            view._store.onSight[view._slot, view._column] = value == Component.ON_SIGHT
+
+
+class HandlerView(ItemHandler):
+    __slots__ = ('_store', '_slot', '_column')
+
+    ID = StoreField('ids', cast=int)
+    lastTimeSeen = StoreField('times')
+    state = StoreField('states', cast=int)
+
+    def __init__(self, store, slot):
+        self._store, self._slot, self._column = store, slot, None
+
+
+class ComponentView(Component):
+    __slots__ = ('_store', '_slot', '_column')
+
+    x, y, z = [StoreField('poses', axis) for axis in range(3)]
+    smoothed_x, smoothed_y, smoothed_z = [StoreField('smoothedPoses', axis) for axis in range(3)]
+    rx, ry, rz = [StoreField('orientations', axis) for axis in range(3)]
+    dx, dy, dz = [StoreField('componentSpeeds', axis) for axis in range(3)]
+    distWeight, baryWeight, speedWeight = [StoreField('weights', axis) for axis in range(3)]
+    status = StatusField('onSight')
+
+    def __init__(self, store, slot, column, name=""):
+        self._store, self._slot, self._column = store, slot, column
+        self.name = name
+        self.size = None
+        self.smooth_poses = False
+        self.smoothing_coeff = 1.
+        self.acceleration = None
+        self.parents = []
+
+
+class ItemView(Item):
+    """ Item reading and writing the slot of a TrackStore. Valid until the slot is released. """
+    __slots__ = ('_store', '_slot', '_column')
+
+    x, y, z = [StoreField('barycenters', axis) for axis in range(3)]
+    smoothed_x, smoothed_y, smoothed_z = [StoreField('smoothedBarycenters', axis) for axis in range(3)]
+    dx, dy, dz = [StoreField('speeds', axis) for axis in range(3)]
+    baryWeight = StoreField('baryWeights')
+    speedWeight = StoreField('speedWeights')
+    status = StatusField('status')
+
+    def __init__(self, store, slot, componentNames=()):
+        self._store, self._slot, self._column = store, slot, None
+        self.name = ""
+        self.rx = self.ry = self.rz = None
+        self.size = None
+        self.distWeight = 1.
+        self.smooth_poses = False
+        self.smoothing_coeff = 1.
+        self.acceleration = None
+        self.parents = []
+        self.itemHandler = HandlerView(store, slot)
+        self.ref = self.COMPONENTS
+        self.components = dict()
+        for k in np.flatnonzero(store.known[slot]).tolist():
+            self.components[componentNames[k]] = ComponentView(store, slot, k, componentNames[k])
+        self.pointCloud = None
+        self.other = dict()
+        self.smooth_components_poses = False
+        self.components_smoothing_coeff = 1.
+        self.compute_speed_from_components_speeds = False
+        self.visibility = None
+        self.pool = None
+        self.drx, self.dry, self.drz = None, None, None
+
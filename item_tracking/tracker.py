@@ -1,18 +1,72 @@
 #!/usr/bin/env python
 # coding: utf-8
 
+import collections
 import time
 import numpy as np
-from .item import Item, ItemHandler
+from .item import Item, ItemHandler, countMalformed
+from .distance import (itemVisibility, visibilityWords, overlapping, packComponents, shiftPacked, distanceMatrix, otherDistances,
+                       pairDistances, denseDistances, barycenterDistances)
+from .matching import candidateEdges, greedyMatch, optimalMatch
+from .gating import barycenterArray, UniformGrid, kdtreePairs
+from .store import TrackStore, ArrayTracks, ItemViews
+from .batch import barycenters, smoothedUpdate, setBarycenters, setOrientations, updateFromElders
+from .lostpool import LostPool
+from .partition import partition, tilePairs
+from .history import History
+from .ingest import Inbox
+from .kalman import KalmanFilter
+from .recycling import ItemPool
+from .index import TrackIndex
+from .events import EventBatch, BORN, CONFIRMED, LOST, FOUND, DROPPED
+from .budget import FrameBudget, FULL, GREEDY, NARROW_GATE, BARYCENTERS, DEFER_LOST
+from . import pointcloud
+
+
+FrameResult = collections.namedtuple('FrameResult', ['tracks', 'births', 'deaths', 'level'])
 
 
 class Tracker(object):
 
+    GREEDY = 1
+    OPTIMAL = 2
+
+    GRID = 1
+    KDTREE = 2
+
+    CHAMFER = pointcloud.CHAMFER
+    HAUSDORFF = pointcloud.HAUSDORFF
+
+    SAVED_PARAMS = ('thresholdDist', 'time_add', 'time_del', 'compute_speed_from_components_speeds',
+                    'with_items_pose_smoothing', 'with_components_pose_smoothing', 'components_pose_smoothing_coeff',
+                    'items_pose_smoothing_coeff', 'matching', 'gating', 'gate_radius', 'compute_items_orientation',
+                    'with_lost_pool', 'partition_size', 'partition_workers', 'history_size', 'history_max_bytes',
+                    'drop_late_items', 'with_kalman', 'kalman_process_noise', 'kalman_measurement_noise', 'kalman_gate',
+                    'voxel_size', 'cloud_metric', 'item_pool_size', 'frame_budget_ms')
+
     def __init__(self):
         self.trackedItems = []
         self.newItems = []
+        self.inbox = Inbox()  # items of addItem, taken by updateTracking
         self.distance = []
+        self.pairs = None
+        self.edges = None  # (rows, cols, costs) under thresholdDist, partitioned mode only
+        self.partitionPool = None  # (partition_workers, ThreadPool)
+        self.history = None  # History of the tracks, when history_size is set
+        self.kalman = None  # KalmanFilter of the tracks barycenters, when with_kalman is set
+        self.itemPool = None  # ItemPool of acquireItem, when item_pool_size is set
+        self.replaced = []  # (elder, youngster) of the frame, reclaimed by the item pool
+        self.trackIndex = None  # TrackIndex of the last frame, built by getIndex
+        self.budget = None  # FrameBudget of updateTracking, when frame_budget_ms is set
+        self.level = FULL  # degradation level of the last frame, see budget
         self.maxID = 1
+        self.malformed = collections.Counter()  # malformed items and components met by the frames, by kind
+        self.frameEvents = EventBatch(None)  # lifecycle events of the last frame
+        self.lostTracks = LostPool()  # lost items of updateTracking, with_lost_pool only
+        self.store = TrackStore()  # tracked items of updateFromArrays
+        self.componentIndex = dict()  # component name -> store column
+        self.componentNames = []
+        self.componentIds = dict()  # component name -> bit of the visibility of the items, interned by updateTracking
         # default args
         self.thresholdDist = 1.
         self.time_add = 1.
@@ -23,8 +77,32 @@ class Tracker(object):
         self.with_components_pose_smoothing = False
         self.components_pose_smoothing_coeff = 1.
         self.items_pose_smoothing_coeff = 1.
+        self.matching = self.GREEDY
+        self.gating = None
+        self.gate_radius = None
+        self.compute_items_orientation = False
+        self.with_lost_pool = False
+        self.profiler = None  # profiling.Profiler
+        self.recorder = None  # replay.Recorder of the frames
+        self.events = None  # events.EventStream of the lifecycle events of each frame
+        self.partition_size = None
+        self.partition_workers = 1
+        self.history_size = None
+        self.history_max_bytes = None
+        self.drop_late_items = False
+        self.with_kalman = False
+        self.kalman_process_noise = 1.
+        self.kalman_measurement_noise = 0.01
+        self.kalman_gate = None
+        self.voxel_size = None
+        self.cloud_metric = self.CHAMFER
+        self.item_pool_size = None
+        self.frame_budget_ms = None
 
     def setParams(self, **kwargs):
+        gate_radius = kwargs.get('gate_radius', self.gate_radius)
+        if gate_radius is not None and not gate_radius > 0:
+            raise ValueError("gate_radius must be positive, or None to gate at thresholdDist")
         self.thresholdDist = kwargs.get('thresholdDist', self.thresholdDist)
         self.time_add = kwargs.get('time_add', self.time_add)
         self.time_del = kwargs.get('time_del', self.time_del)
@@ -34,81 +112,393 @@ class Tracker(object):
         self.with_items_pose_smoothing = kwargs.get('with_items_pose_smoothing', self.with_items_pose_smoothing)
         self.with_components_pose_smoothing = kwargs.get('with_components_pose_smoothing', self.with_components_pose_smoothing)
         self.compute_speed_from_components_speeds = kwargs.get('compute_speed_from_components_speeds', self.compute_speed_from_components_speeds)
+        self.matching = kwargs.get('matching', self.matching)
+        self.gating = kwargs.get('gating', self.gating)
+        self.gate_radius = kwargs.get('gate_radius', self.gate_radius)
+        self.compute_items_orientation = kwargs.get('compute_items_orientation', self.compute_items_orientation)
+        self.with_lost_pool = kwargs.get('with_lost_pool', self.with_lost_pool)
+        self.profiler = kwargs.get('profiler', self.profiler)
+        self.recorder = kwargs.get('recorder', self.recorder)
+        self.events = kwargs.get('events', self.events)
+        self.partition_size = kwargs.get('partition_size', self.partition_size)
+        self.partition_workers = kwargs.get('partition_workers', self.partition_workers)
+        self.history_size = kwargs.get('history_size', self.history_size)
+        self.history_max_bytes = kwargs.get('history_max_bytes', self.history_max_bytes)
+        self.drop_late_items = kwargs.get('drop_late_items', self.drop_late_items)
+        self.with_kalman = kwargs.get('with_kalman', self.with_kalman)
+        self.kalman_process_noise = kwargs.get('kalman_process_noise', self.kalman_process_noise)
+        self.kalman_measurement_noise = kwargs.get('kalman_measurement_noise', self.kalman_measurement_noise)
+        self.kalman_gate = kwargs.get('kalman_gate', self.kalman_gate)
+        self.voxel_size = kwargs.get('voxel_size', self.voxel_size)
+        self.cloud_metric = kwargs.get('cloud_metric', self.cloud_metric)
+        self.item_pool_size = kwargs.get('item_pool_size', self.item_pool_size)
+        self.frame_budget_ms = kwargs.get('frame_budget_ms', self.frame_budget_ms)
+        if not self.history_size:
+            self.history = None
+        elif self.history is None or self.history.capacity != self.history_size:
+            self.history = History(self.history_size, self.history_max_bytes)
+        else:
+            self.history.maxBytes = self.history_max_bytes
+        if not self.with_kalman:
+            self.kalman = None
+        elif self.kalman is None:
+            self.kalman = KalmanFilter(self.kalman_process_noise, self.kalman_measurement_noise)
+        else:
+            self.kalman.processNoise, self.kalman.measurementNoise = self.kalman_process_noise, self.kalman_measurement_noise
+        if not self.item_pool_size:
+            self.itemPool = None
+        elif self.itemPool is None:
+            self.itemPool = ItemPool(self.item_pool_size)
+        else:
+            self.itemPool.capacity, self.itemPool.componentsCapacity = self.item_pool_size, 16 * self.item_pool_size
+        if not self.frame_budget_ms:
+            self.budget = None
+            self.level = FULL
+        elif self.budget is None:
+            self.budget = FrameBudget(self.frame_budget_ms / 1000.)
+        else:
+            self.budget.budget = self.frame_budget_ms / 1000.
+
+    def acquireItem(self, name="", lastTimeSeen=None):
+        """
+        :return: new Item, reused from the items of the dropped and replaced tracks when item_pool_size is set.
+                 Items of the previous frames are then only valid until the frame their track is updated or dropped
+        """
+        if self.itemPool is None:
+            return Item(name, lastTimeSeen)
+        return self.itemPool.acquireItem(name, lastTimeSeen)
 
     def nowTime(self):
         return time.time()
 
-    def addItem(self, item):
+    def addItem(self, item, timestamp=None):
+        """
+        Add a detection to the next frame, safe to call from other threads than the one of updateTracking.
+        :param item: Item
+        :param timestamp: time of the detection, tracked by the first updateTracking of a later or equal time
+        """
+        self.inbox.put(self.prepareItem(item), timestamp)
+
+    def prepareItem(self, item, smoothPose=True):
+        """ set the tracker parameters of item, and its smoothed pose unless smoothPose is False """
         item.smoothing_coeff = self.items_pose_smoothing_coeff
         item.smooth_poses = self.with_items_pose_smoothing
         item.smooth_components_poses = self.with_components_pose_smoothing
         item.components_smoothing_coeff = self.components_pose_smoothing_coeff
-        item.speed_from_component_speed = self.compute_speed_from_components_speeds
-        item.setSmoothedPose()
-        self.newItems.append(item)
-
-    def updateTracking(self):
-        self.barycenters()
-        self.distanceCompute()
-        new, updating, lost = self.matchingDistanceDecider()
-        self.addTracks(new)
-        self.updateTracks(updating)
-        self.deleteTracks(lost)
+        item.compute_speed_from_components_speeds = self.compute_speed_from_components_speeds
+        if self.voxel_size and item.ref == Item.POINTCLOUD and item.pointCloud is not None:
+            item.pointCloud = item.pointCloud.downsampled(self.voxel_size)
+        if smoothPose:
+            item.setSmoothedPose()
+        return item
+
+    def updateTracking(self, timestamp=None):
+        """
+        Track the items added since the last frame.
+        :param timestamp: time of the frame, self.now() of the frame if set. Items added with a later timestamp are kept
+        for the next frames, and items added with a timestamp before the previous frame are tracked in this one, or
+        dropped with drop_late_items
+        """
+        items = self.inbox.take(timestamp, self.drop_late_items)
+        for item in items:  # in the tracking thread only, as it interns new names
+            itemVisibility(item, self.componentIds)
+        self.newItems.extend(items)
+        now = self.now
+        if timestamp is not None:
+            self.now = lambda: timestamp
+        try:
+            with countMalformed(self.malformed):
+                self.trackNewItems()
+        finally:
+            self.now = now
+
+    def trackNewItems(self):
+        if self.recorder is not None:
+            self.recorder.recordItems(self.now(), self.newItems)
+        profiler = self.profiler
+        if profiler is None:
+            stage = self.runStage
+        else:
+            profiler.startFrame(self.malformed)
+            stage = profiler.stage
+        detections, tracked = len(self.newItems), len(self.trackedItems)
+        self.frameEvents = EventBatch(self.now())
+        if self.budget is not None:
+            self.level = self.budget.startFrame(len(self.newItems) + len(self.trackedItems))
+        stage('barycenters', self.barycenters)
+        stage('distanceCompute', self.distanceCompute)
+        new, updating, lost = stage('matchingDistanceDecider', self.matchingDistanceDecider)
+        found = []
+        if self.with_lost_pool:
+            new, found, foundItems = stage('reidentify', self.reidentify, new)
+            stage('updateTracks', self.updateTracks, found, foundItems)
+        stage('addTracks', self.addTracks, new)
+        stage('updateTracks', self.updateTracks, updating)
+        dropped = stage('deleteTracks', self.deleteTracks, lost)
+        if self.kalman is not None:
+            stage('kalman', self.kalmanUpdate, self.newItems[:detections])
+        if self.itemPool is not None:
+            stage('reclaim', self.reclaim, dropped)
+        if self.budget is not None:
+            self.budget.endFrame()
+            self.level = self.budget.level
+        if profiler is not None:
+            pairs = np.size(self.distance) if self.pairs is None else len(self.pairs[0])
+            for name, value in (('newItems', detections), ('trackedItems', tracked), ('pairs', pairs),
+                                ('new', len(new)), ('updated', len(updating) + len(found)), ('lost', len(lost)),
+                                ('lostPool', len(self.lostTracks)), ('late', self.inbox.late), ('level', self.level)):
+                profiler.count(name, value)
+            profiler.endFrame()
+        if self.history is not None:
+            self.history.endFrame()
         self.trackedItems = self.newItems
         self.newItems = []
+        self.trackIndex = None
+        if self.events is not None:
+            self.events.publish(self.frameEvents)
+
+    def reclaim(self, dropped):
+        """ give the items replaced by their youngsters, but not their components kept by them, and the dropped items back to the item pool """
+        for elder, youngster in self.replaced:
+            self.itemPool.release(elder, youngster.components)
+        for item in dropped:
+            self.itemPool.release(item)
+        self.replaced = []
+
+    def kalmanUpdate(self, detections):
+        """ correct the Kalman filter with the barycenters of the detections, forgetting the dropped tracks """
+        self.kalman.update([item.getID() for item in detections], barycenterArray(detections), self.now())
+        self.kalman.retain([item.getID() for item in self.newItems] + [item.getID() for item in self.lostTracks.items()])
+
+    @staticmethod
+    def runStage(name, function, *args):
+        return function(*args)
 
     def barycenters(self):
-        for item in self.newItems:
-            item.setBarycenter()
+        setBarycenters(self.newItems)
+        if self.compute_items_orientation:
+            setOrientations(self.newItems)
+
+    def gate(self, newPoints, trackedPoints, gating=None, radius=None):
+        """
+        :param newPoints: ndarray (N, 3) of the new items barycenters
+        :param trackedPoints: ndarray (M, 3) of the tracked items barycenters
+        :param gating: GRID or KDTREE, self.gating if None
+        :param radius: gate radius, gate_radius or thresholdDist if None
+        :return: (rows, cols) of the new and tracked items whose barycenters are within the gate radius
+        """
+        if radius is None:
+            radius = (self.thresholdDist if self.gate_radius is None else self.gate_radius) * self.gateScale()
+        if not np.isfinite(radius):
+            return None
+        if not radius > 0:  # thresholdDist <= 0, nothing is matched
+            return np.array([], dtype=np.intp), np.array([], dtype=np.intp)
+        if (gating or self.gating) == self.KDTREE:
+            return kdtreePairs(newPoints, trackedPoints, radius)
+        return UniformGrid(trackedPoints, cellSize=radius).queryRadius(newPoints, radius)
+
+    def gateScale(self):
+        """ :return: factor of the gate radius at the degradation level of the frame """
+        return self.budget.gateScale if self.level >= NARROW_GATE else 1.
+
+    def frameGating(self):
+        """ :return: gating of the frame, GRID if none is set and the frame is degraded to NARROW_GATE """
+        return self.gating or (self.GRID if self.level >= NARROW_GATE else None)
 
     def distanceCompute(self):
-        self.distance = []
-        for newItem in self.newItems:
-            self.distance.append([])
-            for oldItem in self.trackedItems:
-                self.distance[-1].append(newItem == oldItem)
+        if self.partition_size:
+            self.distance = None
+            self.pairs, self.edges = self.partitionedEdges()
+            return
+        self.edges = None
+        newPoints, trackedPoints = barycenterArray(self.newItems), barycenterArray(self.trackedItems)
+        offsets = None
+        if self.kalman is not None:
+            trackedPoints, variances, offsets = self.kalmanPrediction([item.getID() for item in self.trackedItems], trackedPoints, self.now())
+            self.pairs = self.kalmanGate(newPoints, trackedPoints, variances)
+        else:
+            self.pairs = self.gate(newPoints, trackedPoints) if self.frameGating() else None
+        if self.level >= BARYCENTERS:
+            self.distance = barycenterDistances(newPoints, trackedPoints, self.pairs)
+            return
+        self.distance = distanceMatrix(self.newItems, self.trackedItems, self.pairs, self.componentIds, offsets,
+                                       self.thresholdDist, self.cloud_metric)
 
-    def matchingDistanceDecider(self):
-        toUpdate = []
-        checked = [[], []]  # first list for old ones, second for new ones
+    def kalmanPrediction(self, trackedIds, trackedPoints, now):
+        """
+        :return: tracked barycenters predicted by the Kalman filter (M, 3), variances of their distance to a measurement (M,),
+                 offsets (M, 3) from the tracked barycenters. Tracks not filtered yet are predicted where they are,
+                 with the variance of an euclidean gate of the gate radius
+        """
+        predicted, variances = self.kalman.predict(trackedIds, now)
+        unknown = np.isnan(predicted).any(axis=1)
+        predicted[unknown] = trackedPoints[unknown]
+        radius = self.thresholdDist if self.gate_radius is None else self.gate_radius
+        variances[unknown] = radius * radius / float(self.kalman_gate or 1.)
+        return predicted, variances, np.where(np.isnan(predicted), 0., predicted - trackedPoints)
+
+    def kalmanGate(self, newPoints, predicted, variances):
+        """
+        :return: pairs (rows, cols) whose squared Mahalanobis distance of the new barycenter to the predicted one is under
+                 kalman_gate, or within the gate radius of the predicted barycenter if kalman_gate is None (None if no gating)
+        """
+        if self.kalman_gate is None:
+            return self.gate(newPoints, predicted) if self.frameGating() else None
+        if not len(variances) or not np.isfinite(variances.max()):
+            return None
+        threshold = self.kalman_gate * self.gateScale() ** 2
+        rows, cols = self.gate(newPoints, predicted, gating=self.gating or self.GRID, radius=np.sqrt(threshold * variances.max()))
+        close = ((newPoints[rows] - predicted[cols]) ** 2).sum(axis=1) <= threshold * variances[cols]
+        return rows[close], cols[close]
+
+    def partitionedEdges(self):
+        """
+        Distances of the pairs within the gate radius of each tile (see partition.partition), without any (new, tracked)
+        matrix. The tiles are shared between partition_workers threads.
+        :return: (rows, cols) of the compared pairs, (rows, cols, costs) of the pairs under thresholdDist, in row major order
+        """
+        radius = self.thresholdDist if self.gate_radius is None else self.gate_radius
+        if not np.isfinite(radius):
+            raise ValueError("partition_size needs a finite gate_radius or thresholdDist")
+        radius *= self.gateScale()
+        barycentersOnly = self.level >= BARYCENTERS
+        newPoints, trackedPoints = barycenterArray(self.newItems), barycenterArray(self.trackedItems)
+        index = self.componentIds
+        newWords, trackedWords = visibilityWords(self.newItems, index), visibilityWords(self.trackedItems, index)
+        newPacked, trackedPacked = packComponents(self.newItems, index), packComponents(self.trackedItems, index)[:4]
+        offsets = None
+        if self.kalman is not None:  # tiles of the predicted barycenters
+            trackedPoints, _, offsets = self.kalmanPrediction([item.getID() for item in self.trackedItems], trackedPoints, self.now())
+            trackedPacked = shiftPacked(trackedPacked, offsets)
+        newComponents = np.array([item.ref == Item.COMPONENTS for item in self.newItems], dtype=bool)
+        trackedComponents = np.array([item.ref == Item.COMPONENTS for item in self.trackedItems], dtype=bool)
+
+        def groupEdges(tiles):
+            rows, cols = tilePairs(tiles)
+            squared = ((newPoints[rows] - trackedPoints[cols]) ** 2).sum(axis=1)
+            close = squared <= radius * radius
+            rows, cols = rows[close], cols[close]
+            if barycentersOnly:
+                return rows, cols, np.sqrt(squared[close])
+            close = overlapping(newWords, trackedWords, rows, cols) | ~(newComponents[rows] & trackedComponents[cols])
+            rows, cols = rows[close], cols[close]
+            return rows, cols, pairDistances(newPacked, trackedPacked, rows, cols)[0]
+
+        tiles = partition(newPoints, trackedPoints, self.partition_size, radius)
+        groups = [tiles[g::self.partition_workers] for g in range(self.partition_workers)]
+        if len(groups) > 1 and len(tiles) > 1:
+            if self.partitionPool is None or self.partitionPool[0] != self.partition_workers:
+                from multiprocessing.pool import ThreadPool
+                self.partitionPool = (self.partition_workers, ThreadPool(self.partition_workers))
+            results = self.partitionPool[1].map(groupEdges, groups)
+        else:
+            results = [groupEdges(tiles)]
+        rows, cols, costs = [np.concatenate([result[k] for result in results] + [np.array([], dtype=dtype)])
+                             for k, dtype in enumerate((np.intp, np.intp, float))]
+        order = np.lexsort((cols, rows))  # stitch the tiles in row major order, as candidateEdges
+        rows, cols, costs = rows[order], cols[order], costs[order]
+        other = np.flatnonzero(~(newComponents[rows] & trackedComponents[cols]))
+        if len(other) and not barycentersOnly:  # other references keep the item to item distance
+            costs[other] = otherDistances(self.newItems, self.trackedItems, rows[other], cols[other], self.thresholdDist,
+                                          self.cloud_metric, offsets)
+        close = costs < self.thresholdDist
+        return (rows, cols), (rows[close], cols[close], costs[close])
 
-        # min matching ("greedy" algorithm, not "optimal" algorithm)
+    def matchPairs(self, distance):
+        """
+        :param distance: ndarray (new, tracked)
+        :return: matched new items indexes, matched tracked items indexes
+        """
+        rows, cols, costs = candidateEdges(distance, self.thresholdDist)
+        return self.matchEdges(rows, cols, costs, distance.shape)
+
+    def matchEdges(self, rows, cols, costs, shape):
+        """
+        :param rows, cols, costs: pairs under thresholdDist, in row major order
+        :param shape: (new, tracked) items count
+        :return: matched new items indexes, matched tracked items indexes
+        """
+        if self.profiler is not None:
+            self.profiler.count('candidates', len(costs))
+        if self.matching == self.OPTIMAL and self.budget is not None and self.budget.start is not None \
+                and self.budget.elapsed() > self.budget.budget / 2:  # about to exceed the budget
+            self.budget.raiseLevel(GREEDY)
+            self.level = max(self.level, GREEDY)
+        if self.matching == self.OPTIMAL and self.level < GREEDY:
+            matcher = optimalMatch
+        else:  # min matching ("greedy" algorithm, not "optimal" algorithm)
+            matcher = greedyMatch
+        return matcher(rows, cols, costs, shape, self.thresholdDist)
+
+    def matchingDistanceDecider(self):
         lSize = len(self.newItems)
         cSize = len(self.trackedItems)
-        if lSize * cSize:
-            mini = np.nanmin(self.distance)
-            while mini < self.thresholdDist:  # not too far matching (later -> time/size relation?)
-                p = np.argmin(self.distance)
-                l, c = p//cSize, p % cSize  # new skeletton l, old skeletton c
-                toUpdate.append([c, l])
-                checked[0].append(c)
-                checked[1].append(l)
-                for i in range(cSize):  # avoid using same new skeletton twice
-                    self.distance[l][i] = np.inf
-                for j in range(lSize):  # avoid using same old skeletton twice
-                    self.distance[j][c] = np.inf
-                mini = np.nanmin(self.distance)
+        if self.edges is not None:
+            l, c = self.matchEdges(*self.edges, shape=(lSize, cSize))
+        else:
+            l, c = self.matchPairs(np.asarray(self.distance).reshape(lSize, cSize))
+        toUpdate = [[old, new] for new, old in zip(l.tolist(), c.tolist())]  # old skeletton c, new skeletton l
 
         # no matching skelettons
-        toDelete = [elem for elem in range(cSize) if elem not in checked[0]]
-        toAdd = [elem for elem in range(lSize) if elem not in checked[1]]
+        checked = [np.zeros(cSize, dtype=bool), np.zeros(lSize, dtype=bool)]  # first for old ones, second for new ones
+        checked[0][c] = True
+        checked[1][l] = True
+        toDelete = np.flatnonzero(~checked[0]).tolist()
+        toAdd = np.flatnonzero(~checked[1]).tolist()
 
         return toAdd, toUpdate, toDelete
 
+    def reidentify(self, toAdd):
+        """
+        Match the new items left unmatched with the lost tracks whose barycenters, predicted by the Kalman filter with
+        with_kalman, are within the gate radius.
+        :param toAdd: indexes of the unmatched new items
+        :return: indexes of the new items still unmatched, [[lost, new]] indexes of the found tracks, their lost items
+        """
+        if not toAdd or not len(self.lostTracks):
+            return toAdd, [], []
+        keys, lostItems = self.lostTracks.keys(), self.lostTracks.items()
+        newItems = [self.newItems[new] for new in toAdd]
+        newPoints, lostPoints = barycenterArray(newItems), barycenterArray(lostItems)
+        offsets = None
+        if self.kalman is not None:
+            lostPoints, variances, offsets = self.kalmanPrediction([item.getID() for item in lostItems], lostPoints, self.now())
+        if self.kalman is not None and self.kalman_gate is not None:
+            pairs = self.kalmanGate(newPoints, lostPoints, variances)
+        else:
+            pairs = self.gate(newPoints, lostPoints, gating=self.gating or self.GRID)
+        if self.level >= BARYCENTERS:
+            distance = barycenterDistances(newPoints, lostPoints, pairs)
+        else:
+            distance = distanceMatrix(newItems, lostItems, pairs, self.componentIds, offsets, self.thresholdDist, self.cloud_metric)
+        l, c = self.matchPairs(distance)
+        found = [[lost, toAdd[new]] for new, lost in zip(l.tolist(), c.tolist())]
+        for lost in c.tolist():
+            self.lostTracks.remove(keys[lost])
+        unmatched = np.ones(len(toAdd), dtype=bool)
+        unmatched[l] = False
+        return [toAdd[new] for new in np.flatnonzero(unmatched).tolist()], found, lostItems
+
     def addTracks(self, toAdd):
         for newTrack in toAdd:
             self.newItems[newTrack].setID(self.maxID)
             self.newItems[newTrack].setTime(self.now())
+            self.frameEvents.add(BORN, self.maxID)
             self.maxID += 1
+            if self.history is not None:
+                self.history.recordItem(self.newItems[newTrack], self.now())
 
-    def updateTracks(self, toUpdate):
+    def updateTracks(self, toUpdate, trackedItems=None):
+        trackedItems = self.trackedItems if trackedItems is None else trackedItems
+        elders, youngsters = [], []
         for old, new in toUpdate:
-            elder, youngster = self.trackedItems[old], self.newItems[new]
+            elder, youngster = trackedItems[old], self.newItems[new]
             if elder.getState() == ItemHandler.NEW:
                 now = self.now()
                 if (now - elder.getTime()) >= self.time_add:
                     youngster.setTime(now)
                     youngster.setState(ItemHandler.UPDATE)
+                    self.frameEvents.add(CONFIRMED, elder.getID())
                 else:
                     youngster.setTime(elder.getTime())
             elif elder.getState() == ItemHandler.UPDATE:
@@ -117,23 +507,293 @@ class Tracker(object):
             else:
                 youngster.setState(ItemHandler.UPDATE)
                 youngster.setTime(self.now())
-            _ = elder > youngster
-            youngster.setSpeed(old_body=elder)
+                self.frameEvents.add(FOUND, elder.getID())
+            elders.append(elder)
+            youngsters.append(youngster)
+        updateFromElders(youngsters, elders)  # _ = elder > youngster ; youngster.setSpeed(old_body=elder)
+        if self.itemPool is not None:
+            self.replaced.extend(zip(elders, youngsters))
+        if self.history is not None:
+            now = self.now()
+            for youngster in youngsters:
+                self.history.recordItem(youngster, now)
 
     def deleteTracks(self, toDelete):
+        """ :return: the items dropped, lost for longer than time_del or never confirmed """
+        dropped = self.lostTracks.expire(self.now()) if self.with_lost_pool else []
         for old in toDelete:
             delItem = self.trackedItems[old]
-            delItem.resetItemSpeed()
+            if self.level < DEFER_LOST:
+                delItem.resetItemSpeed()
             if delItem.getState() == ItemHandler.NEW:  # ADD case : suppress entry
                 delItem.setState(ItemHandler.LOST)
                 delItem.status = Item.UNKNOWN
+                dropped.append(delItem)
             elif delItem.getState() == ItemHandler.UPDATE:  # UPDATE case : change status
                 delItem.setState(ItemHandler.LOST)
                 delItem.status = Item.UNKNOWN
-                self.addItem(delItem)
+                self.keepLost(delItem)
+                self.frameEvents.add(LOST, delItem.getID())
             else:  # DELETE case : if gone for too long, suppress entry
                 if (self.now() - delItem.getTime()) < self.time_del:
-                    self.addItem(delItem)
+                    self.keepLost(delItem)
+                else:
+                    dropped.append(delItem)
+        self.frameEvents.extend(DROPPED, [item.getID() for item in dropped])
+        return dropped
+
+    def keepLost(self, item):
+        """ track item until time_del, in the lost pool or as a new item """
+        if self.with_lost_pool:
+            if self.level < DEFER_LOST:
+                item.setSmoothedPose()
+            self.lostTracks.push(item, item.getTime() + self.time_del)
+        else:
+            self.newItems.append(self.prepareItem(item, smoothPose=self.level < DEFER_LOST))
+
+    def internComponents(self, names):
+        """
+        :param names: component names
+        :return: ndarray of the store columns of names, new names being appended
+        """
+        for name in names:
+            if name not in self.componentIndex:
+                self.componentIndex[name] = len(self.componentNames)
+                self.componentNames.append(name)
+        return np.array([self.componentIndex[name] for name in names], dtype=np.intp)
+
+    def updateFromArrays(self, poses, orientations=None, visibility=None, component_names=None, timestamp=None):
+        """
+        Same tracking as addItem for each item then updateTracking, on columnar data.
+        Each item is a row, each component a column, and weights are 1.
+        :param poses: ndarray (N, K, 3) of components x, y, z, or (N, K, 6) followed by rx, ry, rz
+        :param orientations: ndarray (N, K, 3) of components rx, ry, rz
+        :param visibility: bool ndarray (N, K) of the components on sight, all of them if None
+        :param component_names: the K components names, 0 to K-1 if None
+        :param timestamp: time of the frame, self.now() if None
+        :return: ArrayTracks of the tracked items, the N first rows being the given items
+        """
+        if self.recorder is not None:
+            timestamp = self.now() if timestamp is None else timestamp
+            self.recorder.recordArrays(timestamp, poses, orientations, visibility, component_names)
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.startFrame(self.malformed)
+        self.level = FULL  # no frame budget in array mode
+        poses = np.asarray(poses, dtype=float)
+        N, K = poses.shape[:2]
+        if poses.shape[2] == 6:
+            if orientations is None:
+                orientations = poses[..., 3:]
+            poses = poses[..., :3]
+        visible = ~np.isnan(poses).any(axis=2)
+        if visibility is not None:
+            visible &= np.asarray(visibility, dtype=bool)
+        columns = self.internComponents(range(K) if component_names is None else component_names)
+        now = self.now() if timestamp is None else timestamp
+        smoothComponents = self.with_components_pose_smoothing
+        smoothItems = self.with_items_pose_smoothing
+
+        # new items, as built by Item.setComponent and Tracker.barycenters
+        K = len(self.componentNames)
+        frame = TrackStore(N, K)
+        frame.poses[:, columns] = np.where(visible[..., None], poses, np.nan)
+        if orientations is not None:
+            frame.orientations[:, columns] = np.where(visible[..., None], orientations, np.nan)
+        frame.known[:, columns] = frame.onSight[:, columns] = visible
+        frame.smoothedPoses[...] = frame.poses
+        frame.barycenters, baryWeights = barycenters(frame.poses, frame.onSight, frame.weights[..., 1])
+        frame.baryWeights = np.where(baryWeights != 0, baryWeights, 1.)
+        if smoothComponents or smoothItems:
+            frame.smoothedBarycenters[...] = frame.barycenters
+
+        # distances and matching, on the store arrays
+        store = self.store
+        store.grow(components=K)
+        slots = store.slots
+        M = len(slots)
+        newPacked = (frame.poses, frame.smoothedPoses, frame.onSight, frame.weights[..., 0],
+                     np.full(frame.known.shape, bool(smoothComponents)), np.tile(np.arange(K), (N, 1)))
+        trackedPacked = (store.poses[:, :K], store.smoothedPoses[:, :K], store.onSight[:, :K], store.weights[:, :K, 0])
+        if self.kalman is not None:
+            predicted, variances, offsets = self.kalmanPrediction(store.ids[slots], store.barycenters[slots], now)
+            slotOffsets = np.zeros((store.capacity(), 3))
+            slotOffsets[slots] = offsets
+            trackedPacked = shiftPacked(trackedPacked, slotOffsets)
+            pairs = self.kalmanGate(frame.barycenters, predicted, variances)
+        else:
+            pairs = self.gate(frame.barycenters, store.barycenters[slots]) if self.gating else None
+        if pairs is None:
+            used = slots.max() + 1 if M else 0
+            distance = denseDistances(newPacked, [field[:used] for field in trackedPacked])[0][:, slots]
+        else:
+            rows, cols = pairs
+            distance = np.full((N, M), np.inf)
+            distance[rows, cols] = pairDistances(newPacked, trackedPacked, rows, slots[cols])[0]
+        l, c = self.matchPairs(distance)
+        c = slots[c]  # elders slots
+
+        # addTracks
+        toAdd = np.ones(N, dtype=bool)
+        toAdd[l] = False
+        toAdd = np.flatnonzero(toAdd)
+        frame.ids[toAdd] = self.maxID + np.arange(len(toAdd))
+        frame.times[toAdd] = now
+        self.maxID += len(toAdd)
+        events = self.frameEvents = EventBatch(now)
+        events.extend(BORN, frame.ids[toAdd].tolist())
+
+        # updateTracks
+        elderTimes = store.times[c]
+        elderStates = store.states[c]
+        confirmed = (elderStates != ItemHandler.NEW) | (now - elderTimes >= self.time_add)
+        for kind, changed in ((CONFIRMED, (elderStates == ItemHandler.NEW) & confirmed), (FOUND, elderStates == ItemHandler.LOST)):
+            events.extend(kind, store.ids[c[changed]].tolist())
+        frame.states[l] = np.where(confirmed, ItemHandler.UPDATE, ItemHandler.NEW)
+        frame.times[l] = np.where(confirmed, now, elderTimes)
+        frame.ids[l] = store.ids[c]
+        deltaTime = frame.times[l] - elderTimes
+        moved = deltaTime != 0
+        if smoothItems:
+            frame.smoothedBarycenters[l] = smoothedUpdate(frame.barycenters[l], store.smoothedBarycenters[c],
+                                                          frame.smoothedBarycenters[l], self.items_pose_smoothing_coeff)
+        youngKnown, elderKnown, elderOnSight = frame.known[l], store.known[c, :K], store.onSight[c, :K]
+        both = youngKnown & elderKnown
+        if smoothComponents:
+            smoothed = smoothedUpdate(frame.poses[l], store.smoothedPoses[c, :K], frame.smoothedPoses[l], self.components_pose_smoothing_coeff)
+            frame.smoothedPoses[l] = np.where((both & elderOnSight)[..., None], smoothed, frame.smoothedPoses[l])
+        reference = frame.smoothedPoses if smoothComponents else frame.poses
+        elderReference = store.smoothedPoses if smoothComponents else store.poses
+        with np.errstate(invalid='ignore', divide='ignore'):
+            componentSpeeds = (reference[l] - elderReference[c, :K]) / deltaTime[:, None, None]
+        componentSpeeds = np.where((both & elderOnSight & moved[:, None])[..., None], componentSpeeds, frame.componentSpeeds[l])
+        frame.componentSpeeds[l] = np.where((both & ~elderOnSight)[..., None], np.nan, componentSpeeds)
+        graft = elderKnown & ~youngKnown  # keep track record even if lost
+        for name in ('poses', 'smoothedPoses', 'orientations', 'componentSpeeds', 'weights'):
+            getattr(frame, name)[l] = np.where(graft[..., None], getattr(store, name)[c, :K], getattr(frame, name)[l])
+        frame.known[l] = youngKnown | graft
+        if self.compute_speed_from_components_speeds:
+            speeds, speedWeights = barycenters(frame.componentSpeeds[l], frame.onSight[l], frame.weights[l][..., 2])
+            frame.speeds[l] = np.where(speedWeights[:, None] != 0, speeds, frame.speeds[l])
+            frame.speedWeights[l] = np.where(speedWeights != 0, speedWeights, frame.speedWeights[l])
+        else:
+            bary = frame.smoothedBarycenters if smoothItems else frame.barycenters
+            elderBary = store.smoothedBarycenters if smoothItems else store.barycenters
+            with np.errstate(invalid='ignore', divide='ignore'):
+                frame.speeds[l] = np.where(moved[:, None], (bary[l] - elderBary[c]) / deltaTime[:, None], frame.speeds[l])
+
+        # deleteTracks
+        lost = slots[np.isin(slots, c, invert=True)]  # keep tracking order
+        store.speeds[lost] = np.nan
+        store.componentSpeeds[lost] = np.nan
+        states = store.states[lost]
+        keep = (states == ItemHandler.UPDATE) | ((states == ItemHandler.LOST) & (now - store.times[lost] < self.time_del))
+        store.status[lost[states != ItemHandler.LOST]] = Item.UNKNOWN
+        store.states[lost] = ItemHandler.LOST
+        events.extend(LOST, store.ids[lost[states == ItemHandler.UPDATE]].tolist())
+        events.extend(DROPPED, store.ids[lost[~keep]].tolist())
+        store.release(lost[~keep])
+        lost = lost[keep]
+        store.smoothedBarycenters[lost] = np.where(np.isnan(store.barycenters[lost]), store.smoothedBarycenters[lost], store.barycenters[lost])
+
+        # new items take the slots of their elders
+        youngSlots = np.empty(N, dtype=np.intp)
+        youngSlots[l] = c
+        youngSlots[toAdd] = store.allocate(len(toAdd))
+        for name in TrackStore.ITEM_FIELDS:
+            getattr(store, name)[youngSlots] = getattr(frame, name)
+        for name in TrackStore.COMPONENT_FIELDS:
+            getattr(store, name)[youngSlots, :K] = getattr(frame, name)
+        store.slots = np.concatenate((youngSlots, lost))
+        if self.kalman is not None:
+            self.kalman.update(frame.ids, frame.barycenters, now)
+            self.kalman.retain(store.ids[store.slots])
+        if self.history is not None:
+            for slot in youngSlots.tolist():
+                seen = np.flatnonzero(store.onSight[slot, :K])
+                self.history.record(int(store.ids[slot]), now, store.barycenters[slot], store.smoothedBarycenters[slot],
+                                    store.speeds[slot], [self.componentNames[k] for k in seen.tolist()], store.poses[slot, seen])
+            self.history.endFrame()
+        if profiler is not None:
+            for name, value in (('newItems', N), ('trackedItems', M), ('pairs', N * M if pairs is None else len(pairs[0])),
+                                ('new', len(toAdd)), ('updated', len(l)), ('lost', M - len(l))):
+                profiler.count(name, value)
+            profiler.endFrame()
+        self.trackIndex = None
+        if self.events is not None:
+            self.events.publish(events)
+        return store.tracks()
+
+    def saveState(self, path):
+        """
+        Save the tracked items, lost pool, array mode store, Kalman filter, maxID and SAVED_PARAMS in a versioned .npz file.
+        Component names must be str or int. Items other dict, sizes and components parents are not saved.
+        :param path: file or path
+        """
+        from .snapshot import saveState
+        saveState(self, path, self.SAVED_PARAMS)
+
+    def loadState(self, path, with_params=True):
+        """
+        Restore the state saved by saveState, tracks keeping their IDs, states and times.
+        :param path: file or path
+        :param with_params: also restore the saved parameters
+        """
+        from .snapshot import loadState
+        loadState(self, path, with_params)
+        self.trackIndex = None
+        self.frameEvents = EventBatch(None)
+
+    def getIndex(self):
+        """
+        :return: TrackIndex of the tracks of the last frame, by ID and by barycenter (smoothed barycenter with
+                 with_items_pose_smoothing): tracked and lost items, or ItemView of the tracks of updateFromArrays.
+                 Built at the first call after each frame, with cells of the gate radius
+        """
+        if self.trackIndex is None:
+            cellSize = self.thresholdDist if self.gate_radius is None else self.gate_radius
+            cellSize = cellSize if np.isfinite(cellSize) and cellSize > 0 else 1.
+            if len(self.store) and not self.trackedItems:
+                store, slots = self.store, self.store.slots
+                points = store.barycenters[slots]
+                if self.with_items_pose_smoothing:
+                    points = np.where(np.isnan(store.smoothedBarycenters[slots]), points, store.smoothedBarycenters[slots])
+                self.trackIndex = TrackIndex(ItemViews(store, slots, self.componentNames), store.ids[slots], points, store.states[slots], cellSize)
+            else:
+                self.trackIndex = TrackIndex.fromItems(self.trackedItems + self.lostTracks.items(), self.with_items_pose_smoothing, cellSize)
+        return self.trackIndex
+
+    def trackFrame(self, detections):
+        """
+        :param detections: list of Item, or dict of updateFromArrays arguments
+        :return: FrameResult of the tracks not lost (list of Item, or ArrayTracks), the IDs born and dropped by this frame
+                 and its degradation level
+        """
+        if isinstance(detections, dict):
+            tracks = self.updateFromArrays(**detections)
+            tracks = ArrayTracks(*[field[tracks.states != ItemHandler.LOST] for field in tracks])
+        else:
+            for item in detections:
+                self.addItem(item)
+            self.updateTracking()
+            tracks = [item for item in self.trackedItems if item.getState() != ItemHandler.LOST]
+        return FrameResult(tracks, sorted(self.frameEvents.ids(BORN)), sorted(self.frameEvents.ids(DROPPED)), self.level)
+
+    def track(self, frames):
+        """
+        Track the frames one at a time, as they are read.
+        :param frames: iterable of detections, see trackFrame
+        :return: generator of the FrameResult of each frame
+        """
+        for detections in frames:
+            yield self.trackFrame(detections)
+
+    def arrayItems(self, rows=None):
+        """
+        :param rows: indexes of the tracked items of updateFromArrays, all if None
+        :return: list of ItemView, Item reading and writing the tracker store until their track is dropped
+        """
+        return self.store.items(self.componentNames, rows)
 
 
 if __name__ == "__main__":
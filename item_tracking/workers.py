@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Trackers of independent scenes run in worker processes, frames and results going through shared memory (python 3.8+).
+"""
+
+import multiprocessing
+import traceback
+import numpy as np
+from .store import ArrayTracks
+from .tracker import Tracker
+
+
+FRAME_FIELDS = (('poses', np.float64, 3), ('orientations', np.float64, 3), ('visibility', np.bool_, 0))
+TRACK_FIELDS = (('ids', np.int64, 0), ('states', np.int8, 0), ('times', np.float64, 0),
+                ('barycenters', np.float64, 3), ('speeds', np.float64, 3))
+
+
+def layout(fields, shape):
+    """
+    :param fields: (name, dtype, last axis size or 0) of each array
+    :param shape: leading shape of every array
+    :return: [(name, dtype, shape, offset)], total bytes, offsets being 8 bytes aligned
+    """
+    arrays, offset = [], 0
+    for name, dtype, last in fields:
+        fieldShape = tuple(shape) + ((last,) if last else ())
+        arrays.append((name, dtype, fieldShape, offset))
+        offset += -(-int(np.prod(fieldShape)) * np.dtype(dtype).itemsize // 8) * 8
+    return arrays, offset
+
+
+def views(buffer, fields, shape):
+    """ :return: dict of the arrays of layout(fields, shape) over buffer """
+    return dict((name, np.ndarray(fieldShape, dtype, buffer=buffer, offset=offset))
+                for name, dtype, fieldShape, offset in layout(fields, shape)[0])
+
+
+def createMemory(size):
+    from multiprocessing import shared_memory
+    return shared_memory.SharedMemory(create=True, size=max(size, 8))
+
+
+def attachMemory(name):
+    """ attach to the shared memory of another process, which is in charge of unlinking it """
+    from multiprocessing import shared_memory, resource_tracker
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # python 3.13+
+    except TypeError:
+        memory = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(memory._name, 'shared_memory')
+        return memory
+
+
+class SharedBuffers(object):
+    """ Shared memories by key, replaced by larger ones when needed. Created ones are unlinked by close. """
+
+    def __init__(self):
+        self.memories = dict()
+        self.attached = dict()  # key -> memory of another process
+
+    def ensure(self, key, size):
+        """ :return: memory of key of at least size bytes """
+        memory = self.memories.get(key)
+        if memory is None or memory.size < size:
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+            memory = self.memories[key] = createMemory(2 * size)
+        return memory
+
+    def attach(self, key, name):
+        """ :return: memory name of another process, the former memory of key being closed """
+        memory = self.attached.get(key)
+        if memory is None or memory.name != name:
+            if memory is not None:
+                memory.close()
+            memory = self.attached[key] = attachMemory(name)
+        return memory
+
+    def close(self):
+        for memory in self.attached.values():
+            memory.close()
+        for memory in self.memories.values():
+            memory.close()
+            memory.unlink()
+        self.attached, self.memories = dict(), dict()
+
+
+def serve(commands, results):
+    """
+    Worker loop: run the messages of commands in order, for the trackers of its scenes.
+    ('params', scene, kwargs) sets the params of a scene tracker, ('frame', scene, memory name, N, K, has orientations,
+    has visibility, component names, timestamp) gives a frame to updateFromArrays and puts
+    (scene, memory name, M, error) in results, the M tracks being in the memory.
+    """
+    trackers, buffers = dict(), SharedBuffers()
+    try:
+        while True:
+            message = commands.get()
+            if message[0] == 'close':
+                break
+            scene = message[1]
+            tracker = trackers.setdefault(scene, Tracker())
+            if message[0] == 'params':
+                tracker.setParams(**message[2])
+                continue
+            name, N, K, withOrientations, withVisibility, componentNames, timestamp = message[2:]
+            try:
+                frame = views(buffers.attach(scene, name).buf, FRAME_FIELDS, (N, K))
+                tracks = tracker.updateFromArrays(frame['poses'], frame['orientations'] if withOrientations else None,
+                                                  frame['visibility'] if withVisibility else None, componentNames, timestamp)
+                M = len(tracks.ids)
+                memory = buffers.ensure(scene, layout(TRACK_FIELDS, (M,))[1])
+                output = views(memory.buf, TRACK_FIELDS, (M,))
+                for field in TRACK_FIELDS:
+                    output[field[0]][...] = getattr(tracks, field[0])
+                del frame, output
+                results.put((scene, memory.name, M, None))
+            except Exception:
+                results.put((scene, None, 0, traceback.format_exc()))
+    finally:
+        buffers.close()
+
+
+class TrackerPool(object):
+    """
+    Trackers of independent scenes (cameras, zones) sharded over worker processes. Each scene is tracked
+    by updateFromArrays in a single worker, so that its frames and params are applied in order.
+    """
+
+    def __init__(self, scenes, workers=None, **params):
+        """
+        :param scenes: names of the scenes
+        :param workers: number of processes, the number of cpus (at most one per scene) if None
+        :param params: Tracker.setParams arguments of every scene, picklable (no nowTime, frames give their timestamp)
+        """
+        self.scenes = list(scenes)
+        workers = min(workers or multiprocessing.cpu_count(), len(self.scenes)) or 1
+        self.results = multiprocessing.Queue()
+        self.commands = [multiprocessing.Queue() for _ in range(workers)]
+        self.workerOf = dict((scene, s % workers) for s, scene in enumerate(self.scenes))
+        self.processes = [multiprocessing.Process(target=serve, args=(commands, self.results)) for commands in self.commands]
+        for process in self.processes:
+            process.daemon = True
+            process.start()
+        self.buffers = SharedBuffers()
+        if params:
+            for scene in self.scenes:
+                self.setParams(scene, **params)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def setParams(self, scene, **kwargs):
+        """ Tracker.setParams of scene, applied before its next frames """
+        self.commands[self.workerOf[scene]].put(('params', scene, kwargs))
+
+    def update(self, frames):
+        """
+        Track a frame of some scenes, in parallel.
+        :param frames: dict scene -> dict of updateFromArrays arguments (poses, orientations, visibility,
+                       component_names, timestamp)
+        :return: dict scene -> ArrayTracks
+        """
+        for scene, frame in frames.items():
+            poses = np.asarray(frame['poses'], dtype=float)
+            N, K = poses.shape[:2]
+            orientations, visibility = frame.get('orientations'), frame.get('visibility')
+            if poses.shape[2] == 6:
+                orientations = poses[..., 3:] if orientations is None else orientations
+                poses = poses[..., :3]
+            memory = self.buffers.ensure(scene, layout(FRAME_FIELDS, (N, K))[1])
+            shared = views(memory.buf, FRAME_FIELDS, (N, K))
+            shared['poses'][...] = poses
+            if orientations is not None:
+                shared['orientations'][...] = orientations
+            if visibility is not None:
+                shared['visibility'][...] = visibility
+            del shared
+            self.commands[self.workerOf[scene]].put(('frame', scene, memory.name, N, K, orientations is not None,
+                                                     visibility is not None, frame.get('component_names'),
+                                                     frame.get('timestamp')))
+        tracks, errors = dict(), []
+        for _ in range(len(frames)):
+            scene, name, M, error = self.results.get()
+            if error is not None:
+                errors.append("scene {}:\n{}".format(scene, error))
+                continue
+            output = views(self.buffers.attach(scene, name).buf, TRACK_FIELDS, (M,))
+            tracks[scene] = ArrayTracks(*[output[field[0]].copy() for field in TRACK_FIELDS])
+            del output
+        if errors:
+            raise RuntimeError("\n".join(errors))
+        return tracks
+
+    def close(self):
+        for commands in self.commands:
+            commands.put(('close',))
+        for process in self.processes:
+            process.join()
+        self.buffers.close()
+        self.processes = []
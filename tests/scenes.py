@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+"""
+Seeded scenes of the tests: items moving on a plane, each with K components seen or not at each frame.
+"""
+
+import random
+import numpy as np
+from item_tracking import Item
+from item_tracking.item import Component
+
+
+K = 6
+NAMES = ["c%d" % k for k in range(K)]
+
+
+def crowdFrames(seed, count=20, frames=40, size=6., dt=0.1):
+    """
+    :return: list of (time, poses (N, K, 6), visibility (N, K)) of the items seen in each frame, some of them missing
+    """
+    rng = random.Random(seed)
+    objects = [[rng.uniform(0, size), rng.uniform(0, size), rng.uniform(-.5, .5), rng.uniform(-.5, .5)] for _ in range(count)]
+    result = []
+    for f in range(frames):
+        poses, visibility = [], []
+        for o in objects:
+            o[0] += o[2] * dt
+            o[1] += o[3] * dt
+            if rng.random() < 0.15:
+                continue
+            p = np.zeros((K, 6))
+            v = np.zeros(K, dtype=bool)
+            for k in range(K):
+                v[k] = rng.random() > 0.25
+                p[k] = o[0] + k * .1 + rng.gauss(0, .02), o[1] + rng.gauss(0, .02), k * .3, rng.random(), rng.random(), rng.random()
+            if v.any():
+                poses.append(p)
+                visibility.append(v)
+        result.append((f * dt, np.array(poses).reshape(-1, K, 6), np.array(visibility).reshape(-1, K)))
+    return result
+
+
+def frameItems(poses, visibility, tracker=None):
+    """
+    :return: list of Item of a frame of crowdFrames, with the visible components. The smoothing and speed parameters of
+             tracker are set before the components, which copy them
+    """
+    items = []
+    for p, v in zip(poses, visibility):
+        item = Item()
+        if tracker is not None:
+            item.smooth_components_poses = tracker.with_components_pose_smoothing
+            item.components_smoothing_coeff = tracker.components_pose_smoothing_coeff
+            item.compute_speed_from_components_speeds = tracker.compute_speed_from_components_speeds
+        for k in np.flatnonzero(v).tolist():
+            item.setComponent(NAMES[k], x=p[k, 0], y=p[k, 1], z=p[k, 2], rx=p[k, 3], ry=p[k, 4], rz=p[k, 5])
+        items.append(item)
+    return items
+
+
+def randomItems(seed, count, smooth=False):
+    """ :return: list of Item with random components, weights and status, the same for the same seed """
+    rng = random.Random(seed)
+    items = []
+    for _ in range(count):
+        item = Item()
+        item.smooth_components_poses = smooth
+        item.components_smoothing_coeff = 0.4
+        x, y = rng.uniform(0, 3), rng.uniform(0, 3)
+        for name in rng.sample(NAMES, rng.randint(1, K)):
+            item.setComponent(name, x=x + rng.gauss(0, .3), y=y + rng.gauss(0, .3), z=rng.uniform(0, 2),
+                              rx=rng.uniform(0, 6.3), ry=rng.uniform(0, 6.3), rz=rng.uniform(0, 6.3),
+                              distWeight=rng.uniform(.5, 2), baryWeight=rng.uniform(.5, 2), speedWeight=rng.uniform(.5, 2))
+            component = item.components[name]
+            if smooth:
+                component.smoothed_x, component.smoothed_y, component.smoothed_z = x, y, 1.
+            if len(item.components) > 1 and rng.random() < 0.2:
+                component.status = Component.UNKNOWN
+        items.append(item)
+    return items
+
+
+def nan(value):
+    return np.nan if value is None else value
+
+
+def trackState(items):
+    """ :return: list of the ID, state, time, barycenter, smoothed barycenter and speed of items, nan for None """
+    return [(item.getID(), item.getState(), item.getTime(), nan(item.x), nan(item.y), nan(item.z), nan(item.smoothed_x),
+             nan(item.smoothed_y), nan(item.dx), nan(item.dy), nan(item.dz)) for item in items]
+
+
+def track(tracker, frames, clock):
+    """ :return: trackState of each frame of crowdFrames tracked by tracker, clock being the time of its nowTime """
+    states = []
+    for time, poses, visibility in frames:
+        clock[0] = time
+        states.append(trackState(tracker.trackFrame(frameItems(poses, visibility, tracker)).tracks))
+    return states
+
+
+def assertSameStates(expected, actual):
+    """ assert that two lists of the trackState of each frame are equal, nan included """
+    assert len(expected) == len(actual), "{} frames instead of {}".format(len(actual), len(expected))
+    for f, (e, a) in enumerate(zip(expected, actual)):
+        np.testing.assert_array_equal(np.array(a, dtype=float).reshape(-1, 11), np.array(e, dtype=float).reshape(-1, 11),
+                                      err_msg="frame {}".format(f))
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking import Tracker
+from .scenes import NAMES, crowdFrames, frameItems, nan
+
+
+class ArrayModeTest(unittest.TestCase):
+    """ updateFromArrays tracks a frame as addItem then updateTracking do """
+
+    def compare(self, params, seed, frames=40):
+        clock = [0.]
+        objects, arrays = Tracker(), Tracker()
+        for tracker in (objects, arrays):
+            tracker.setParams(nowTime=lambda: clock[0], thresholdDist=0.8, time_add=0.25, time_del=0.5,
+                              items_pose_smoothing_coeff=0.6, components_pose_smoothing_coeff=0.4, **params)
+        for f, (time, poses, visibility) in enumerate(crowdFrames(seed, frames=frames)):
+            clock[0] = time
+            for item in frameItems(poses, visibility, objects):
+                objects.addItem(item)
+            objects.updateTracking()
+            tracks = arrays.updateFromArrays(poses, visibility=visibility, component_names=NAMES)
+            items = objects.trackedItems
+            message = "{} frame {}".format(params, f)
+            np.testing.assert_array_equal(tracks.ids, [item.getID() for item in items], message)
+            np.testing.assert_array_equal(tracks.states, [item.getState() for item in items], message)
+            np.testing.assert_array_equal(tracks.times, [item.getTime() for item in items], message)
+            np.testing.assert_array_equal(tracks.barycenters.reshape(-1, 3),
+                                          np.array([[nan(item.x), nan(item.y), nan(item.z)] for item in items], dtype=float).reshape(-1, 3), message)
+            np.testing.assert_array_equal(tracks.speeds.reshape(-1, 3),
+                                          np.array([[nan(item.dx), nan(item.dy), nan(item.dz)] for item in items], dtype=float).reshape(-1, 3), message)
+            for item, view in zip(items, arrays.arrayItems()):
+                self.assertEqual(sorted(item.components), sorted(view.components), message)
+                for name, component in item.components.items():
+                    other = view.components[name]
+                    np.testing.assert_array_equal([nan(component.x), nan(component.smoothed_x), nan(component.dx), component.status],
+                                                  [nan(other.x), nan(other.smoothed_x), nan(other.dx), other.status], message)
+
+    def test_default(self):
+        self.compare({}, 0)
+
+    def test_smoothing(self):
+        self.compare(dict(with_items_pose_smoothing=True, with_components_pose_smoothing=True), 1)
+
+    def test_components_speeds(self):
+        self.compare(dict(compute_speed_from_components_speeds=True, with_items_pose_smoothing=True), 2)
+
+    def test_gating_optimal(self):
+        self.compare(dict(gating=Tracker.GRID, matching=Tracker.OPTIMAL, with_components_pose_smoothing=True), 3)
+
+    def test_views(self):
+        """ the views read as the Item of a new track, slots included """
+        tracker = Tracker()
+        _, poses, visibility = crowdFrames(4, frames=1)[0]
+        tracker.updateFromArrays(poses, visibility=visibility, component_names=NAMES)
+        for view, v in zip(tracker.arrayItems(), visibility):
+            self.assertIsNone(view.visibility)
+            self.assertIsNone(view.pool)
+            self.assertEqual(sorted(view.components), [NAMES[k] for k in np.flatnonzero(v)])
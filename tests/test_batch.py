@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking import Item
+from item_tracking.batch import setBarycenters, setOrientations, updateFromElders
+from .scenes import randomItems
+
+
+class BatchTest(unittest.TestCase):
+    """ the batched barycenter, orientation and update stage sets the values of the Item methods """
+
+    attributes = ('x', 'y', 'z', 'smoothed_x', 'smoothed_y', 'smoothed_z', 'rx', 'ry', 'rz', 'dx', 'dy', 'dz', 'drx', 'dry', 'drz',
+                  'baryWeight', 'speedWeight')
+
+    def values(self, items):
+        return [[getattr(item, name) for name in self.attributes] +
+                [(name, component.status, component.dx, component.dy, component.dz, component.smoothed_x)
+                 for name, component in sorted(item.components.items())] for item in items]
+
+    def test_barycenters_orientations(self):
+        for smooth in (False, True):
+            expected = randomItems(7, 50, smooth)
+            for item in expected:
+                item.setBarycenter()
+                item.setOrientation()
+            items = randomItems(7, 50, smooth)
+            setBarycenters(items)
+            setOrientations(items)
+            self.assertEqual(self.values(items), self.values(expected))
+
+    def pairs(self, smooth, fromComponents):
+        elders, youngsters = randomItems(8, 30, smooth), randomItems(9, 30, smooth)
+        for p, (elder, youngster) in enumerate(zip(elders, youngsters)):
+            for item, time in ((elder, 1.), (youngster, 1.2 if p % 5 else 1.)):
+                item.setBarycenter()
+                if p % 3:  # the others have no orientation, nor angular speed
+                    item.setOrientation()
+                item.setTime(time)
+                item.smooth_poses = smooth
+                item.smoothing_coeff = 0.6
+                item.compute_speed_from_components_speeds = fromComponents
+                item.setSmoothedPose()
+            elder.setID(p)
+        return elders, youngsters
+
+    def test_update_from_elders(self):
+        for smooth in (False, True):
+            for fromComponents in (False, True):
+                elders, expected = self.pairs(smooth, fromComponents)
+                for elder, youngster in zip(elders, expected):
+                    _ = elder > youngster
+                    youngster.setSpeed(old_body=elder)
+                elders, youngsters = self.pairs(smooth, fromComponents)
+                updateFromElders(youngsters, elders)
+                self.assertEqual(self.values(youngsters), self.values(expected))
+                self.assertEqual([item.getID() for item in youngsters], list(range(len(youngsters))))
+
+    def test_angular_speed(self):
+        """ the angular speeds are the shortest turn across the 0 / 2 pi cut """
+        elder, youngster = Item(), Item()
+        for item, (time, rz) in ((elder, (1., 6.2)), (youngster, (1.5, 0.1))):
+            item.setComponent("c0", x=0., y=0., z=0., rx=0., ry=np.pi, rz=rz)
+            item.setBarycenter()
+            item.setOrientation()
+            item.setTime(time)
+        updateFromElders([youngster], [elder])
+        np.testing.assert_allclose([youngster.drx, youngster.dry, youngster.drz], [0., 0., (0.1 - 6.2 + 2 * np.pi) / 0.5], atol=1e-12)
+        youngster.resetItemSpeed()
+        self.assertEqual((youngster.drx, youngster.dry, youngster.drz), (None, None, None))
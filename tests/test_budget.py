@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+from item_tracking import Tracker, Item, budget
+from item_tracking.budget import FrameBudget, FULL, GREEDY, NARROW_GATE, BARYCENTERS, DEFER_LOST
+from .scenes import crowdFrames, frameItems
+
+
+class FrameBudgetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.time = [0.]  # clock of the budget
+        self.clock, budget.clock = budget.clock, lambda: self.time[0]
+
+    def tearDown(self):
+        budget.clock = self.clock
+
+    def frame(self, frameBudget, size, elapsed):
+        """ :return: level of a frame of size items lasting elapsed """
+        self.time[0] = 0.
+        level = frameBudget.startFrame(size)
+        self.time[0] = elapsed
+        self.assertEqual(frameBudget.endFrame(), elapsed)
+        return level
+
+    def test_costs(self):
+        """ moving average of the time per item of each level """
+        frameBudget = FrameBudget(1., smoothing=0.5)
+        self.frame(frameBudget, 10, 0.1)
+        self.assertEqual(frameBudget.predict(FULL, 20), 0.2)
+        self.frame(frameBudget, 10, 0.3)
+        self.assertAlmostEqual(frameBudget.costs[FULL], 0.02)
+        self.assertIsNone(frameBudget.predict(GREEDY, 20))
+        self.frame(frameBudget, 0, 0.)
+        self.assertAlmostEqual(frameBudget.costs[FULL], 0.01)
+
+    def test_levels(self):
+        """ raised while over budget, up to the first level never used, and lowered one step per frame under headroom """
+        frameBudget = FrameBudget(1., headroom=0.5)
+        self.assertEqual(self.frame(frameBudget, 100, 0.02 * 100), FULL)
+        self.assertEqual([self.frame(frameBudget, 100, cost * 100) for cost in (0.015, 0.011, 0.009)],
+                         [GREEDY, NARROW_GATE, BARYCENTERS])
+        self.assertEqual(self.frame(frameBudget, 100, 0.009 * 100), BARYCENTERS)  # under budget, not under headroom
+        self.assertEqual(self.frame(frameBudget, 200, 0.009 * 200), DEFER_LOST)  # over budget at every used level
+        self.assertEqual(self.frame(frameBudget, 200, 0.004 * 200), DEFER_LOST)
+        self.assertEqual([self.frame(frameBudget, 20, 0.) for _ in range(6)],
+                         [BARYCENTERS, NARROW_GATE, GREEDY, FULL, FULL, FULL])
+
+    def test_raise_level(self):
+        """ a level raised during a frame is the level of its cost, and the next frames start from it """
+        frameBudget = FrameBudget(1.)
+        frameBudget.startFrame(10)
+        frameBudget.raiseLevel(GREEDY)
+        frameBudget.raiseLevel(FULL)
+        self.time[0] = 0.5
+        frameBudget.endFrame()
+        self.assertEqual(frameBudget.costs[:2], [None, 0.05])
+        self.assertEqual(frameBudget.startFrame(10), GREEDY)
+
+
+class TrackerBudgetTest(unittest.TestCase):
+
+    def test_degradation(self):
+        """ a tracker over budget degrades each frame up to DEFER_LOST, and recovers step by step when under budget """
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], thresholdDist=0.8, time_add=0.25, time_del=0.5, frame_budget_ms=1e-6)
+        levels = []
+        for f, (time, poses, visibility) in enumerate(crowdFrames(0, frames=16)):
+            if f == 8:
+                tracker.setParams(frame_budget_ms=1e6)
+            clock[0] = time
+            result = tracker.trackFrame(frameItems(poses, visibility, tracker))
+            self.assertEqual(result.level, tracker.budget.level)
+            self.assertEqual(len(result.tracks), len([item for item in tracker.trackedItems if item.getState() != item.itemHandler.LOST]))
+            levels.append(result.level)
+        self.assertEqual(levels, [FULL, GREEDY, NARROW_GATE, BARYCENTERS] + [DEFER_LOST] * 4 +
+                         [BARYCENTERS, NARROW_GATE, GREEDY] + [FULL] * 5)
+        tracker.setParams(frame_budget_ms=None)
+        self.assertIsNone(tracker.budget)
+        self.assertEqual(tracker.level, FULL)
+
+
+class DeferLostTest(unittest.TestCase):
+
+    def lostItem(self, tracker, level):
+        item = Item()
+        item.setComponent("c0", x=1., y=2., z=3., rx=0., ry=0., rz=0.)
+        item.setBarycenter()
+        item.smoothed_x, item.smoothed_y, item.smoothed_z = 0., 0., 0.
+        tracker.level = level
+        tracker.keepLost(item)
+        return item
+
+    def test_parameters(self):
+        """ lost tracks get the tracker parameters at every level, and a new smoothed pose below DEFER_LOST """
+        tracker = Tracker()
+        tracker.setParams(with_items_pose_smoothing=True, items_pose_smoothing_coeff=0.3, with_components_pose_smoothing=True,
+                          components_pose_smoothing_coeff=0.4, compute_speed_from_components_speeds=True)
+        for level, smoothed in ((FULL, (1., 2., 3.)), (DEFER_LOST, (0., 0., 0.))):
+            item = self.lostItem(tracker, level)
+            self.assertIs(tracker.newItems[-1], item)
+            self.assertEqual((item.smooth_poses, item.smoothing_coeff, item.smooth_components_poses, item.components_smoothing_coeff,
+                              item.compute_speed_from_components_speeds), (True, 0.3, True, 0.4, True))
+            self.assertEqual((item.smoothed_x, item.smoothed_y, item.smoothed_z), smoothed)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking.circstats import TWO_PI, circmean, circmeans, raggedCircmeans, angleDifference
+
+
+class CircmeanTest(unittest.TestCase):
+
+    def test_scipy(self):
+        """ unweighted means are bitwise equal to scipy.stats.circmean """
+        rng = np.random.RandomState(0)
+        for size in (1, 2, 5, 30):
+            angles = rng.uniform(0, TWO_PI, size)
+            self.assertEqual(circmean(angles), circmean(angles, scipy=True))
+        self.assertTrue(np.isnan(circmean([])))
+
+    def test_weights(self):
+        self.assertAlmostEqual(circmean([0.1, TWO_PI - 0.1], [1., 1.]), 0.)
+        self.assertAlmostEqual(circmean([0., np.pi / 2], [1., 0.]), 0.)
+        self.assertAlmostEqual(circmean([0., np.pi / 2], [1., 1.]), np.pi / 4)
+
+
+class BatchedCircmeansTest(unittest.TestCase):
+    """ the means of many rows at once are bitwise equal to circmean of each row """
+
+    def rows(self, seed):
+        rng = np.random.RandomState(seed)
+        lengths = rng.randint(0, 6, 40)
+        return [rng.uniform(0, TWO_PI, (n, 3)) for n in lengths], [rng.uniform(.5, 2., n) for n in lengths]
+
+    def expected(self, rows, weights=None):
+        return np.array([[circmean(row[:, a], None if weights is None else w) for a in range(3)]
+                         for row, w in zip(rows, weights or rows)])
+
+    def test_masked(self):
+        rows, weights = self.rows(1)
+        angles = np.zeros((len(rows), 5, 3))
+        used = np.zeros((len(rows), 5), dtype=bool)
+        paddedWeights = np.zeros(used.shape)
+        for r, (row, w) in enumerate(zip(rows, weights)):
+            angles[r, :len(row)], used[r, :len(row)], paddedWeights[r, :len(row)] = row, True, w
+        np.testing.assert_array_equal(circmeans(angles, used), self.expected(rows))
+        np.testing.assert_array_equal(circmeans(angles, used, paddedWeights), self.expected(rows, weights))
+        angles[~used] = np.nan
+        np.testing.assert_array_equal(circmeans(angles), self.expected(rows))
+
+    def test_ragged(self):
+        rows, weights = self.rows(2)
+        lengths = [len(row) for row in rows]
+        np.testing.assert_array_equal(raggedCircmeans(np.concatenate(rows), lengths), self.expected(rows))
+        np.testing.assert_array_equal(raggedCircmeans(np.concatenate(rows), lengths, np.concatenate(weights)),
+                                      self.expected(rows, weights))
+        np.testing.assert_array_equal(raggedCircmeans(np.concatenate(rows)[:, 0], lengths), self.expected(rows)[:, 0])
+        self.assertEqual(raggedCircmeans(np.zeros(0), []).shape, (0,))
+
+
+class AngleDifferenceTest(unittest.TestCase):
+
+    def test_wrap(self):
+        np.testing.assert_allclose(angleDifference([0.1, TWO_PI - 0.1, 3., 0.], [TWO_PI - 0.1, 0.1, -3., np.pi]),
+                                   [0.2, -0.2, 6. - TWO_PI, -np.pi])
+        rng = np.random.RandomState(3)
+        angles, others = rng.uniform(-10, 10, 100), rng.uniform(-10, 10, 100)
+        difference = angleDifference(angles, others)
+        self.assertTrue(((difference >= -np.pi) & (difference < np.pi)).all())
+        np.testing.assert_allclose(np.cos(difference), np.cos(angles - others), atol=1e-12)
+        np.testing.assert_allclose(np.sin(difference), np.sin(angles - others), atol=1e-12)
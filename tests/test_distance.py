@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking.distance import distanceMatrix
+from .scenes import randomItems
+
+
+def itemDistances(newItems, trackedItems):
+    return np.array([[new == tracked for tracked in trackedItems] for new in newItems], dtype=float)
+
+
+class DistanceMatrixTest(unittest.TestCase):
+    """ the vectorized distances are bitwise equal to Item.__eq__ """
+
+    def test_dense(self):
+        for smooth in (False, True):
+            expected = itemDistances(randomItems(1, 30, smooth), randomItems(2, 25, smooth))
+            np.testing.assert_array_equal(distanceMatrix(randomItems(1, 30, smooth), randomItems(2, 25, smooth)), expected)
+
+    def test_visibility_index(self):
+        expected = itemDistances(randomItems(3, 40), randomItems(4, 35))
+        index = dict()
+        np.testing.assert_array_equal(distanceMatrix(randomItems(3, 40), randomItems(4, 35), index=index), expected)
+        self.assertTrue(index)
+
+    def test_pairs(self):
+        expected = itemDistances(randomItems(5, 20), randomItems(6, 20))
+        rows, cols = np.nonzero(np.random.RandomState(0).rand(20, 20) < 0.3)
+        distance = distanceMatrix(randomItems(5, 20), randomItems(6, 20), (rows, cols), dict())
+        np.testing.assert_array_equal(distance[rows, cols], expected[rows, cols])
+        unpaired = np.ones(distance.shape, dtype=bool)
+        unpaired[rows, cols] = False
+        self.assertTrue(np.isinf(distance[unpaired]).all())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+from item_tracking import Tracker
+from item_tracking.item import ItemHandler
+from item_tracking.events import BORN, CONFIRMED, LOST, FOUND, DROPPED, EventStream
+from .scenes import NAMES, crowdFrames, frameItems
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5)
+KINDS = (BORN, CONFIRMED, LOST, FOUND, DROPPED)
+
+
+def diff(previous, current):
+    """
+    :param previous, current: dict ID -> ItemHandler state of the tracks of consecutive frames
+    :return: dict kind -> sorted IDs of the events between the two frames
+    """
+    events = dict((kind, []) for kind in KINDS)
+    for ID, state in current.items():
+        before = previous.get(ID)
+        if before is None:
+            events[BORN].append(ID)
+        elif before == ItemHandler.NEW and state == ItemHandler.UPDATE:
+            events[CONFIRMED].append(ID)
+        elif before != ItemHandler.LOST and state == ItemHandler.LOST:
+            events[LOST].append(ID)
+        elif before == ItemHandler.LOST and state == ItemHandler.UPDATE:
+            events[FOUND].append(ID)
+    events[DROPPED] = [ID for ID in previous if ID not in current]
+    return dict((kind, sorted(ids)) for kind, ids in events.items())
+
+
+def batchEvents(batch):
+    return dict((kind, sorted(batch.ids(kind))) for kind in KINDS)
+
+
+class EventsTest(unittest.TestCase):
+    """ the events of each frame are the changes of the tracks since the previous frame """
+
+    def check(self, frames, updateFrame, **params):
+        stream = EventStream(maxsize=len(frames), emptyBatches=True)
+        received = []
+        stream.subscribe(received.append)
+        tracker = Tracker()
+        tracker.setParams(events=stream, **dict(PARAMS, **params))
+        previous, counts = dict(), dict((kind, 0) for kind in KINDS)
+        for f, frame in enumerate(frames):
+            current = updateFrame(tracker, frame)
+            events = batchEvents(tracker.frameEvents)
+            self.assertEqual(events, diff(previous, current), "frame {}".format(f))
+            self.assertEqual(sum(len(ids) for ids in events.values()), len(tracker.frameEvents))  # each event once
+            self.assertEqual(tracker.frameEvents.time, frame[0])
+            for kind in KINDS:
+                counts[kind] += len(events[kind])
+            previous = current
+        self.assertEqual(len(received), len(frames))
+        self.assertEqual([batch.events for batch in stream.drain()], [batch.events for batch in received])
+        for kind in KINDS:
+            self.assertGreater(counts[kind], 0, kind)
+
+    def test_items(self):
+        def updateFrame(tracker, frame):
+            time, poses, visibility = frame
+            for item in frameItems(poses, visibility, tracker):
+                tracker.addItem(item)
+            tracker.updateTracking(time)
+            return dict((item.getID(), item.getState()) for item in tracker.trackedItems + tracker.lostTracks.items())
+
+        frames = crowdFrames(0, frames=40)
+        self.check(frames, updateFrame)
+        self.check(frames, updateFrame, with_lost_pool=True)
+
+    def test_arrays(self):
+        def updateFrame(tracker, frame):
+            time, poses, visibility = frame
+            tracks = tracker.updateFromArrays(poses, visibility=visibility, component_names=NAMES, timestamp=time)
+            return dict(zip(tracks.ids.tolist(), tracks.states.tolist()))
+
+        self.check(crowdFrames(1, frames=40), updateFrame)
+
+    def test_listener_failure(self):
+        """ a failing listener is logged, the others and the queue still get the batch """
+        stream = EventStream(maxsize=2)
+        received = []
+        stream.subscribe(lambda batch: 1 / 0)
+        stream.subscribe(received.append)
+        tracker = Tracker()
+        tracker.setParams(events=stream, **PARAMS)
+        with self.assertLogs('item_tracking.events'):
+            for time, poses, visibility in crowdFrames(2, frames=4):
+                tracker.updateFromArrays(poses, visibility=visibility, component_names=NAMES, timestamp=time)
+        self.assertEqual(len(received), 4)
+        self.assertEqual(stream.drain(), received[-2:])
+        self.assertEqual(stream.overflows, 2)
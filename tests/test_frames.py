@@ -0,0 +1,134 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import asyncio
+import unittest
+import numpy as np
+from item_tracking import Tracker, aio
+from .scenes import NAMES, crowdFrames, frameItems, trackState, assertSameStates
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5, with_items_pose_smoothing=True)
+
+
+class TimedFrame(list):
+    """ items of a frame, setting the clock of the tracker when trackFrame reads them, whatever the thread """
+
+    def __init__(self, items, time, clock):
+        list.__init__(self, items)
+        self.time, self.clock = time, clock
+
+    def __iter__(self):
+        self.clock[0] = self.time
+        return list.__iter__(self)
+
+
+def newTracker(clock):
+    tracker = Tracker()
+    tracker.setParams(nowTime=lambda: clock[0], **PARAMS)
+    return tracker
+
+
+def updateTracking(frames):
+    """ :return: trackState of the tracks not lost of each frame, tracked with addItem and updateTracking """
+    clock = [0.]
+    tracker = newTracker(clock)
+    states = []
+    for time, poses, visibility in frames:
+        clock[0] = time
+        for item in frameItems(poses, visibility, tracker):
+            tracker.addItem(item)
+        tracker.updateTracking()
+        states.append(trackState([item for item in tracker.trackedItems if item.getState() != item.itemHandler.LOST]))
+    return states
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class TrackTest(unittest.TestCase):
+    """ Tracker.track and aio.track give the tracks of addItem then updateTracking """
+
+    def test_generator(self):
+        frames = crowdFrames(0, frames=20)
+        clock = [0.]
+        tracker = newTracker(clock)
+        read = []
+
+        def detections():
+            for time, poses, visibility in frames:
+                read.append(time)
+                yield TimedFrame(frameItems(poses, visibility, tracker), time, clock)
+
+        states = []
+        for f, result in enumerate(tracker.track(detections())):
+            self.assertEqual(len(read), f + 1)  # frames are read one at a time
+            states.append(trackState(result.tracks))
+        assertSameStates(updateTracking(frames), states)
+
+    def test_aio(self):
+        frames = crowdFrames(1, frames=20)
+        clock = [0.]
+        tracker = newTracker(clock)
+
+        def summary(result):  # the items may already be updated by the next frames, their IDs are not
+            return [item.getID() for item in result.tracks], result.births, result.deaths
+
+        async def detections():
+            for time, poses, visibility in frames:
+                yield TimedFrame(frameItems(poses, visibility, tracker), time, clock)
+
+        async def consume():
+            return [summary(result) async for result in aio.track(tracker, detections())]
+
+        results = run(consume())
+        serial = newTracker(clock)
+        self.assertEqual(results, [summary(result) for result in serial.track(
+            TimedFrame(frameItems(poses, visibility, serial), time, clock) for time, poses, visibility in frames)])
+        self.assertEqual([ids for ids, _, _ in results], [[state[0] for state in states] for states in updateTracking(frames)])
+
+    def test_aio_arrays(self):
+        frames = crowdFrames(2, frames=20)
+        tracker = Tracker()
+        tracker.setParams(**PARAMS)
+        expected = [tracker.trackFrame(dict(poses=poses, visibility=visibility, component_names=NAMES, timestamp=time)).tracks
+                    for time, poses, visibility in frames]
+        tracker = Tracker()
+        tracker.setParams(**PARAMS)
+
+        async def detections():
+            for time, poses, visibility in frames:
+                yield dict(poses=poses, visibility=visibility, component_names=NAMES, timestamp=time)
+
+        async def consume():
+            return [result.tracks async for result in aio.track(tracker, detections(), maxsize=1)]
+
+        results = run(consume())
+        self.assertEqual(len(results), len(expected))
+        for tracks, expectedTracks in zip(results, expected):
+            for field, expectedField in zip(tracks, expectedTracks):
+                np.testing.assert_array_equal(field, expectedField)
+
+    def test_aio_failure(self):
+        """ an error reading the frames is raised to the consumer, after the results of the frames read before """
+        frames = crowdFrames(3, frames=3)
+        tracker = Tracker()
+        results = []
+
+        async def detections():
+            for time, poses, visibility in frames:
+                yield dict(poses=poses, visibility=visibility, component_names=NAMES, timestamp=time)
+            raise KeyError("camera")
+
+        async def consume():
+            async for result in aio.track(tracker, detections()):
+                results.append(result)
+
+        with self.assertRaises(KeyError):
+            run(consume())
+        self.assertEqual(len(results), 3)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking import Tracker
+from item_tracking.gating import UniformGrid
+from .scenes import crowdFrames, track, assertSameStates
+
+
+class UniformGridTest(unittest.TestCase):
+
+    def test_brute_force(self):
+        """ the grid pairs are the pairs within the radius, nan points left out """
+        rng = np.random.RandomState(0)
+        points, queries = rng.uniform(-3, 3, (200, 3)), rng.uniform(-3, 3, (150, 3))
+        points[::17], queries[::13] = np.nan, np.nan
+        for cellSize, radius in ((0.5, 0.5), (0.2, 0.5), (1., 0.3)):
+            rows, cols = UniformGrid(points, cellSize).queryRadius(queries, radius)
+            close = ((queries[:, None] - points[None]) ** 2).sum(axis=2) <= radius * radius
+            expectedRows, expectedCols = np.nonzero(close)
+            np.testing.assert_array_equal(rows, expectedRows)
+            np.testing.assert_array_equal(cols, expectedCols)
+
+
+class GatingTest(unittest.TestCase):
+
+    def runTracker(self, frames, **params):
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], time_add=0.25, time_del=0.5, **params)
+        return track(tracker, frames, clock)
+
+    def test_wide_radius(self):
+        """ a gate wider than the scene tracks as comparing every pair """
+        frames = crowdFrames(7, count=40, frames=20, size=8.)
+        expected = self.runTracker(frames, thresholdDist=0.5)
+        for gating in (Tracker.GRID, Tracker.KDTREE):
+            assertSameStates(expected, self.runTracker(frames, thresholdDist=0.5, gating=gating, gate_radius=100.))
+
+    def test_non_positive_radius(self):
+        tracker = Tracker()
+        for radius in (0, 0., -1.):
+            with self.assertRaises(ValueError):
+                tracker.setParams(gating=Tracker.GRID, gate_radius=radius)
+        self.assertIsNone(tracker.gate_radius)
+
+    def test_zero_threshold(self):
+        """ nothing is matched, as without gating """
+        frames = crowdFrames(8, frames=10)
+        assertSameStates(self.runTracker(frames, thresholdDist=0.), self.runTracker(frames, thresholdDist=0., gating=Tracker.GRID))
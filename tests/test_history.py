@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking import Tracker
+from item_tracking.history import TrackHistory, History
+from .scenes import crowdFrames, track
+
+
+def sample(t):
+    return t, (t, 0., 0.), (t, 1., 0.), (1., 0., 0.), ["a", "b"] if t % 2 else ["b"], [(t, 2., 0.), (t, 3., 0.)] if t % 2 else [(t, 3., 0.)]
+
+
+class TrackHistoryTest(unittest.TestCase):
+
+    def history(self, count, capacity=5):
+        history = TrackHistory(capacity)
+        for t in range(count):
+            history.append(*sample(t))
+        return history
+
+    def test_views(self):
+        """ the last samples, oldest first, are slices of the ring buffers """
+        for count in (0, 3, 5, 12):
+            history = self.history(count)
+            last = history.last()
+            expected = list(range(max(count - 5, 0), count))
+            self.assertEqual(last.times.tolist(), expected)
+            self.assertEqual(last.barycenters[:, 0].tolist(), expected)
+            self.assertEqual(last.smoothedPoses[:, 1].tolist(), [1.] * len(expected))
+            self.assertEqual(history.last(2).times.tolist(), expected[-2:])
+            if count:
+                self.assertTrue(np.shares_memory(last.times, history.times))
+                self.assertTrue(np.shares_memory(last.componentPoses, history.componentPoses))
+
+    def test_components(self):
+        last = self.history(12).last()
+        self.assertEqual(last.componentNames, ["b", "a"])  # in order of appearance
+        b, a = last.componentPoses[:, 0, 1], last.componentPoses[:, 1, 1]
+        np.testing.assert_array_equal(a, [2. if t % 2 else np.nan for t in range(7, 12)])
+        np.testing.assert_array_equal(b, [3.] * 5)
+
+    def test_seconds(self):
+        history = self.history(12)
+        self.assertEqual(history.lastSeconds(2.).times.tolist(), [9, 10, 11])
+        self.assertEqual(history.since(10.5).times.tolist(), [11])
+        self.assertEqual(len(TrackHistory(5).lastSeconds(2.).times), 0)
+
+    def test_resize(self):
+        """ a smaller buffer keeps the last samples and goes on recording """
+        for count, capacity in ((12, 2), (3, 2), (3, 4), (0, 2)):
+            history = self.history(count)
+            expected = history.last(capacity)
+            expected = [field.copy() if isinstance(field, np.ndarray) else field for field in expected]
+            history.resize(capacity)
+            self.assertEqual(history.nbytes(), sum(getattr(history, name).nbytes for name in TrackHistory.FIELDS))
+            for field, value in zip(history.last(), expected):
+                np.testing.assert_array_equal(field, value)
+            history.append(*sample(count))
+            self.assertEqual(history.last().times.tolist(), list(range(max(count + 1 - capacity, 0), count + 1)))
+
+
+class HistoryTest(unittest.TestCase):
+
+    def test_lru(self):
+        """ the tracks not updated by the frame are dropped first, least recently updated first """
+        history = History(capacity=4)
+        for ID in range(3):
+            history.record(ID, 0., (0., 0., 0.), (0., 0., 0.), (0., 0., 0.))
+        history.endFrame()
+        history.record(0, 1., (0., 0., 0.), (0., 0., 0.), (0., 0., 0.))
+        history.maxBytes = 2 * history.track(0).nbytes()
+        history.endFrame()
+        self.assertEqual(list(history.tracks), [2, 0])
+        self.assertEqual(len(history.track(0)), 2)
+
+    def test_max_bytes(self):
+        """ the histories of a tracker stay under history_max_bytes at the end of each frame """
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], thresholdDist=0.8, time_add=0.25, time_del=0.5, history_size=50,
+                          history_max_bytes=20000)
+        history = tracker.history
+        for frame in crowdFrames(0, count=30, frames=40):
+            track(tracker, [frame], clock)
+            self.assertLessEqual(history.bytes, 20000)
+            self.assertEqual(history.bytes, sum(trackHistory.nbytes() for trackHistory in history.tracks.values()))
+        self.assertTrue(len(history))
+        for item in tracker.trackedItems:
+            if item.getID() in history:
+                self.assertEqual(history.track(item.getID()).last(1).times.tolist(), [item.getTime()])
@@ -0,0 +1,30 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = ("import json, sys, time\n"
+          "clock = getattr(time, 'perf_counter', time.time)\n"
+          "start = clock()\n"
+          "import item_tracking\n"
+          "elapsed = clock() - start\n"
+          "print(json.dumps(dict(seconds=elapsed, scipy=sorted(m for m in sys.modules if m.split('.')[0] == 'scipy'))))\n")
+
+
+class ImportTest(unittest.TestCase):
+    """ import item_tracking in fresh interpreters, see benchmarks/import_benchmark.py """
+
+    BUDGET = 0.5  # s, of the fastest of 3 imports
+
+    def test_import(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT] + [p for p in [os.environ.get('PYTHONPATH')] if p]))
+        runs = [json.loads(subprocess.check_output([sys.executable, "-c", SCRIPT], cwd=ROOT, env=env).decode('utf-8'))
+                for _ in range(3)]
+        self.assertEqual(runs[0]['scipy'], [])
+        self.assertLess(min(run['seconds'] for run in runs), self.BUDGET)
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking import Tracker
+from item_tracking.index import TrackIndex
+from item_tracking.item import ItemHandler
+from .scenes import NAMES, crowdFrames, track
+
+
+STATES = [ItemHandler.NEW, ItemHandler.UPDATE, ItemHandler.LOST]
+
+
+def randomIndex(seed, count, cellSize):
+    """ :return: TrackIndex of count random points, some of them nan, whose tracks are their rows """
+    rng = np.random.RandomState(seed)
+    points = rng.uniform(-3., 3., (count, 3)) * [1., 1., .2]
+    points[rng.rand(count) < 0.1] = np.nan
+    states = rng.choice(STATES, count)
+    return TrackIndex(list(range(count)), np.arange(count) + 10, points, states, cellSize), points, states
+
+
+class TrackIndexTest(unittest.TestCase):
+    """ the queries of the index give the tracks of a brute force search """
+
+    def queries(self, seed):
+        rng = np.random.RandomState(seed)
+        for _ in range(30):
+            yield rng.uniform(-4., 4., 3) * [1., 1., .2], rng.uniform(0., 3.), [None, ItemHandler.UPDATE, STATES[:2]][rng.randint(3)]
+
+    def test_box(self):
+        for cellSize in (0.3, 1., 10.):
+            index, points, states = randomIndex(0, 200, cellSize)
+            for center, size, queryStates in self.queries(1):
+                low, high = center - size / 2, center + size
+                inside = ((points >= low) & (points <= high)).all(axis=1)
+                if queryStates is not None:
+                    inside &= np.isin(states, queryStates)
+                self.assertEqual(index.inBox(low, high, queryStates), np.flatnonzero(inside).tolist())
+
+    def test_radius(self):
+        for cellSize in (0.3, 1., 10.):
+            index, points, states = randomIndex(2, 200, cellSize)
+            for center, radius, queryStates in self.queries(3):
+                distances = np.sqrt(((points - center) ** 2).sum(axis=1))
+                close = distances <= radius
+                if queryStates is not None:
+                    close &= np.isin(states, queryStates)
+                rows = np.flatnonzero(close)
+                self.assertEqual(index.inRadius(center, radius, queryStates), rows[np.argsort(distances[rows], kind='stable')].tolist())
+
+    def test_nearest(self):
+        for cellSize in (0.1, 1., 10.):
+            index, points, states = randomIndex(4, 100, cellSize)
+            for center, maxDistance, queryStates in self.queries(5):
+                distances = np.sqrt(((points - center) ** 2).sum(axis=1))
+                selected = ~np.isnan(distances)
+                if queryStates is not None:
+                    selected &= np.isin(states, queryStates)
+                rows = np.flatnonzero(selected)
+                rows = rows[np.argsort(distances[rows], kind='stable')]
+                for k in (1, 5, 500):
+                    self.assertEqual(index.nearest(center, k, queryStates), rows[:k].tolist())
+                    self.assertEqual(index.nearest(center, k, queryStates, maxDistance),
+                                     [row for row in rows[:k].tolist() if distances[row] <= maxDistance])
+
+    def test_ids(self):
+        index, points, _ = randomIndex(6, 50, 1.)
+        self.assertEqual(len(index), 50)
+        self.assertEqual([index.get(ID) for ID in range(10, 60)], list(range(50)))  # nan points included
+        self.assertNotIn(60, index)
+        self.assertEqual(index.get(60, "none"), "none")
+        self.assertEqual(TrackIndex([], [], np.zeros((0, 3)), []).nearest((0., 0., 0.)), [])
+
+
+class TrackerIndexTest(unittest.TestCase):
+
+    def test_items(self):
+        """ the index of a tracker holds its tracked and lost items, at their smoothed barycenter """
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], thresholdDist=0.8, time_add=0.25, time_del=0.5, with_lost_pool=True,
+                          with_items_pose_smoothing=True)
+        for frame in crowdFrames(0, frames=20):
+            track(tracker, [frame], clock)
+            index = tracker.getIndex()
+            self.assertIs(tracker.getIndex(), index)
+            items = tracker.trackedItems + tracker.lostTracks.items()
+            self.assertEqual(sorted(index.ids.tolist()), sorted(item.getID() for item in items))
+            for item in items:
+                self.assertIs(index.get(item.getID()), item)
+                near = index.inRadius((item.smoothed_x, item.smoothed_y, item.smoothed_z), 1e-9)
+                self.assertIn(item, near)
+
+    def test_arrays(self):
+        tracker = Tracker()
+        tracker.setParams(thresholdDist=0.8, time_add=0.25, time_del=0.5)
+        for time, poses, visibility in crowdFrames(1, frames=10):
+            tracks = tracker.updateFromArrays(poses, visibility=visibility, component_names=NAMES, timestamp=time)
+        index = tracker.getIndex()
+        self.assertEqual(sorted(index.ids.tolist()), sorted(tracks.ids.tolist()))
+        point = tracks.barycenters[0]
+        nearest = index.nearest(point, 3)
+        distances = np.sqrt(((tracks.barycenters - point) ** 2).sum(axis=1))
+        self.assertEqual([view.getID() for view in nearest], tracks.ids[np.argsort(distances, kind='stable')[:3]].tolist())
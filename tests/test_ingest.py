@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import random
+import threading
+import unittest
+from item_tracking import Tracker
+from item_tracking.ingest import Inbox
+from .scenes import crowdFrames, frameItems, trackState, assertSameStates
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5)
+
+
+def unordered(states):
+    """ :return: trackState of each frame with IDs 0, sorted, as they depend on the order of the items """
+    return [sorted((0,) + state[1:] for state in frame) for frame in states]
+
+
+class InboxTest(unittest.TestCase):
+
+    def test_frame_time(self):
+        """ the items after the frame time wait for the next frames, in arrival order """
+        inbox = Inbox()
+        for item, timestamp in (("a", 0.2), ("b", 0.1), ("c", None), ("d", 0.3), ("e", 0.1)):
+            inbox.put(item, timestamp)
+        self.assertEqual(inbox.take(0.1), ["b", "c", "e"])
+        inbox.put("f", 0.2)
+        self.assertEqual(inbox.take(0.2), ["a", "f"])
+        self.assertEqual(len(inbox), 1)
+        self.assertEqual(inbox.take(), ["d"])
+
+    def test_late(self):
+        """ items before the previous frame are counted as late, and tracked or dropped """
+        for dropLate, expected in ((False, ["a", "b", "c"]), (True, ["b", "c"])):
+            inbox = Inbox()
+            inbox.take(1.)
+            self.assertEqual(inbox.late, 0)
+            inbox.put("a", 0.5)
+            inbox.put("b", 1.5)
+            inbox.put("c")
+            self.assertEqual(inbox.take(2., dropLate), expected)
+            self.assertEqual(inbox.late, 1)
+            self.assertEqual(inbox.take(3., dropLate), [])
+            self.assertEqual(inbox.late, 0)
+
+
+class TimestampTest(unittest.TestCase):
+    """ items added out of order, from other threads, are tracked in the frame of their timestamp """
+
+    def serial(self, frames):
+        tracker = Tracker()
+        tracker.setParams(**PARAMS)
+        states = []
+        for time, poses, visibility in frames:
+            for item in frameItems(poses, visibility):
+                tracker.addItem(item)
+            tracker.updateTracking(time)
+            states.append(trackState(tracker.trackedItems))
+        return states
+
+    def test_out_of_order(self):
+        frames = crowdFrames(0, frames=20)
+        expected = self.serial(frames)
+        tracker = Tracker()
+        tracker.setParams(**PARAMS)
+        pending = []  # (timestamp, item) detected but not added yet
+        states = []
+        rng = random.Random(0)
+        for f, (time, poses, visibility) in enumerate(frames):
+            pending.extend((time, item) for item in frameItems(poses, visibility))
+            if f + 1 < len(frames):  # items of the next frame arrive early
+                nextTime, nextPoses, nextVisibility = frames[f + 1]
+                early = frameItems(nextPoses, nextVisibility)[:3]
+                pending.extend((nextTime, item) for item in early)
+                frames[f + 1] = (nextTime, nextPoses[3:], nextVisibility[3:])
+            rng.shuffle(pending)
+            for timestamp, item in pending:
+                tracker.addItem(item, timestamp)
+            pending = []
+            tracker.updateTracking(time)
+            self.assertEqual(tracker.inbox.late, 0)
+            states.append(trackState(tracker.trackedItems))
+        self.assertEqual(len(tracker.inbox), 0)
+        assertSameStates(unordered(expected), unordered(states))
+
+    def test_threads(self):
+        """ the same tracks as adding the items in order, whatever the producer of each item """
+        frames = crowdFrames(1, frames=20)
+        expected = self.serial(frames)
+        tracker = Tracker()
+        tracker.setParams(**PARAMS)
+        states = []
+        for time, poses, visibility in frames:
+            items = frameItems(poses, visibility)
+            producers = [threading.Thread(target=lambda part=items[p::2]: [tracker.addItem(item, time) for item in part])
+                         for p in range(2)]
+            for producer in producers:
+                producer.start()
+            for producer in producers:
+                producer.join()
+            tracker.updateTracking(time)
+            states.append(trackState(tracker.trackedItems))
+        assertSameStates(unordered(expected), unordered(states))
+
+    def test_late_items(self):
+        frames = crowdFrames(2, frames=10)
+        for dropLate in (False, True):
+            tracker = Tracker()
+            tracker.setParams(drop_late_items=dropLate, **PARAMS)
+            for time, poses, visibility in frames[:5]:
+                for item in frameItems(poses, visibility):
+                    tracker.addItem(item, time)
+                tracker.updateTracking(time)
+            tracked = len(tracker.trackedItems)
+            time, poses, visibility = frames[5]
+            late = frameItems(poses, visibility)
+            for item in late:
+                tracker.addItem(item, frames[2][0])
+            tracker.updateTracking(time)
+            self.assertEqual(tracker.inbox.late, len(late))
+            updated = [item for item in late if item.getID() is not None]
+            self.assertEqual(len(updated), 0 if dropLate else len(late))
+            if dropLate:
+                self.assertLessEqual(len(tracker.trackedItems), tracked)
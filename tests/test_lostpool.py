@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+from item_tracking import Tracker, Item
+from item_tracking.item import ItemHandler
+from item_tracking.lostpool import LostPool
+
+
+def point(x, y=0.):
+    item = Item()
+    item.setComponent("c0", x=x, y=y, z=0., rx=0., ry=0., rz=0.)
+    return item
+
+
+class LostPoolTest(unittest.TestCase):
+
+    def test_expiry_order(self):
+        pool = LostPool()
+        items = [point(x) for x in range(6)]
+        keys = [pool.push(item, expiry) for item, expiry in zip(items, [3., 1., 2., 1., 5., 4.])]
+        self.assertIs(pool.remove(keys[2]), items[2])
+        self.assertEqual(pool.expire(0.5), [])
+        self.assertEqual(pool.expire(2.), [items[1], items[3]])
+        self.assertEqual(pool.items(), [items[0], items[4], items[5]])  # in loss order
+        self.assertEqual(pool.keys(), [keys[0], keys[4], keys[5]])
+        self.assertEqual(pool.expire(10.), [items[0], items[5], items[4]])
+        self.assertEqual(len(pool), 0)
+
+    def test_removed_entries(self):
+        """ the heap is rebuilt when most of its entries were removed """
+        pool = LostPool()
+        keys = [pool.push(point(0.), float(e)) for e in range(100)]
+        for key in keys[:90]:
+            pool.remove(key)
+        self.assertLessEqual(len(pool.heap), 2 * len(pool) + 16)
+        self.assertEqual(len(pool.expire(1000.)), 10)
+
+
+class ReidentificationTest(unittest.TestCase):
+    """ a track lost for less than time_del is found again with its ID, and dropped after """
+
+    def runGap(self, gap, **params):
+        """ :return: states of the tracked and lost items at each frame, of an item seen, unseen for gap frames and seen again """
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], thresholdDist=0.5, time_add=0.2, time_del=0.5, with_lost_pool=True, **params)
+        frames = [[point(0.1 * f)] for f in range(6)] + [[]] * gap + [[point(0.6 + 0.1 * gap, 0.05)]]
+        states = []
+        for f, items in enumerate(frames):
+            clock[0] = 0.1 * f
+            result = tracker.trackFrame(items)
+            states.append(([(item.getID(), item.getState()) for item in result.tracks],
+                           [(item.getID(), item.getState()) for item in tracker.lostTracks.items()]))
+        return states
+
+    def test_found(self):
+        for params in (dict(), dict(gating=Tracker.KDTREE), dict(with_kalman=True)):
+            states = self.runGap(3, **params)
+            self.assertEqual(states[5], ([(1, ItemHandler.UPDATE)], []))
+            for tracked, lost in states[6:9]:
+                self.assertEqual((tracked, lost), ([], [(1, ItemHandler.LOST)]), params)
+            self.assertEqual(states[9], ([(1, ItemHandler.UPDATE)], []), params)
+
+    def test_expired(self):
+        states = self.runGap(7)  # last seen at 0.5, dropped at 0.5 + time_del
+        self.assertEqual(states[9], ([], [(1, ItemHandler.LOST)]))
+        self.assertEqual(states[10], ([], []))
+        self.assertEqual(states[13], ([(2, ItemHandler.NEW)], []))
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking.matching import candidateEdges, greedyMatch, optimalMatch
+
+
+def legacyGreedy(distance, thresholdDist):
+    """ matching loop of the first versions of Tracker.matchingDistanceDecider: repeated argmin over the whole matrix """
+    distance = np.array(distance, dtype=float)
+    lSize, cSize = distance.shape
+    matches = []
+    if lSize * cSize:
+        mini = np.nanmin(distance)
+        while mini < thresholdDist:
+            p = np.argmin(distance)
+            l, c = p // cSize, p % cSize
+            matches.append((l, c))
+            distance[l, :] = np.inf
+            distance[:, c] = np.inf
+            mini = np.nanmin(distance)
+    return matches
+
+
+class GreedyMatchTest(unittest.TestCase):
+    """ the sorted edges matcher gives the matches of the legacy loop, in the same order """
+
+    def test_legacy(self):
+        rng = np.random.RandomState(0)
+        for shape in [(0, 4), (4, 0), (1, 1), (7, 3), (3, 7), (30, 30), (50, 20)]:
+            for _ in range(10):
+                distance = np.round(rng.rand(*shape) * 2, 1)  # ties
+                distance[rng.rand(*shape) < 0.2] = np.inf
+                l, c = greedyMatch(*candidateEdges(distance, 1.), shape=shape, thresholdDist=1.)
+                self.assertEqual(list(zip(l.tolist(), c.tolist())), legacyGreedy(distance, 1.))
+
+
+class OptimalMatchTest(unittest.TestCase):
+
+    def test_total_cost(self):
+        """ the assignment costs at most the greedy one, each item of the edges left unassigned costing thresholdDist """
+        rng = np.random.RandomState(1)
+        for _ in range(20):
+            distance = rng.rand(12, 10) * 1.5
+            edges = candidateEdges(distance, 1.)
+            assigned = min(len(np.unique(edges[0])), len(np.unique(edges[1])))
+            costs = []
+            for matcher in (greedyMatch, optimalMatch):
+                l, c = matcher(*edges, shape=distance.shape, thresholdDist=1.)
+                self.assertEqual(len(set(l.tolist())), len(l))
+                self.assertEqual(len(set(c.tolist())), len(c))
+                self.assertTrue((distance[l, c] < 1.).all())
+                costs.append(distance[l, c].sum() + (assigned - len(l)) * 1.)
+            self.assertLessEqual(costs[1], costs[0] + 1e-9)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+from item_tracking import Tracker
+from .scenes import crowdFrames, track, assertSameStates
+
+
+class PartitionTest(unittest.TestCase):
+    """ the partitioned mode tracks as the gating of the same radius, whatever the tiles and workers """
+
+    def runTracker(self, frames, **params):
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], thresholdDist=0.5, time_add=0.25, time_del=0.5, **params)
+        return track(tracker, frames, clock)
+
+    def test_tiles(self):
+        frames = crowdFrames(4, count=60, frames=25, size=10.)
+        expected = self.runTracker(frames, gating=Tracker.GRID)
+        for size, workers in ((1., 1), (3., 1), (2., 3)):
+            assertSameStates(expected, self.runTracker(frames, partition_size=size, partition_workers=workers))
+
+    def test_optimal(self):
+        frames = crowdFrames(5, count=60, frames=25, size=10.)
+        expected = self.runTracker(frames, gating=Tracker.GRID, matching=Tracker.OPTIMAL)
+        assertSameStates(expected, self.runTracker(frames, partition_size=2., matching=Tracker.OPTIMAL))
+
+    def test_components_smoothing(self):
+        frames = crowdFrames(6, count=60, frames=25, size=10.)
+        params = dict(with_components_pose_smoothing=True, components_pose_smoothing_coeff=0.4)
+        assertSameStates(self.runTracker(frames, gating=Tracker.GRID, **params), self.runTracker(frames, partition_size=2., **params))
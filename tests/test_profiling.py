@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+from item_tracking import Tracker, Item
+from item_tracking.profiling import Profiler, RingBuffer, Histogram
+from .scenes import NAMES, crowdFrames, frameItems, track, assertSameStates
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5)
+STAGES = ['barycenters', 'distanceCompute', 'matchingDistanceDecider', 'addTracks', 'updateTracks', 'deleteTracks', 'frame']
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def profiled(self, frames, **params):
+        clock = [0.]
+        profiler = Profiler()
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], profiler=profiler, **dict(PARAMS, **params))
+        return tracker, profiler, track(tracker, frames, clock)
+
+    def test_records(self):
+        """ a record per frame, with the stages run and the counts of the frame """
+        frames = crowdFrames(0, frames=15)
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], **PARAMS)
+        expected = track(tracker, frames, clock)
+        profiler = Profiler()
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], profiler=profiler, **PARAMS)
+        states, trackedCounts = [], []
+        for frame in frames:
+            trackedCounts.append(len(tracker.trackedItems))
+            states.extend(track(tracker, [frame], clock))
+        assertSameStates(expected, states)
+        records = profiler.sink.records()
+        self.assertEqual([record['frame'] for record in records], list(range(len(frames))))
+        for record, (_, poses, _), tracked in zip(records, frames, trackedCounts):
+            self.assertEqual(list(record['stages']), STAGES)
+            self.assertTrue(all(elapsed >= 0. for elapsed in record['stages'].values()))
+            self.assertEqual((record['newItems'], record['trackedItems']), (len(poses), tracked))
+            self.assertEqual(record['pairs'], len(poses) * tracked)
+            self.assertEqual(record['new'] + record['updated'], len(poses))
+            self.assertLessEqual(record['candidates'], record['pairs'])
+            self.assertEqual(record['malformed'], {})
+        self.assertEqual(profiler.frames, len(frames))
+        self.assertEqual(profiler.totals['newItems'], sum(len(poses) for _, poses, _ in frames))
+        self.assertEqual(profiler.histograms['frame'].count, len(frames))
+        self.assertIn("matchingDistanceDecider", profiler.summary())
+
+    def test_lost_pool_gating(self):
+        _, profiler, _ = self.profiled(crowdFrames(1, frames=15), with_lost_pool=True, gating=Tracker.GRID)
+        records = profiler.sink.records()
+        self.assertTrue(all('reidentify' in record['stages'] for record in records))
+        self.assertTrue(any(record['lostPool'] for record in records))
+        self.assertTrue(all(record['pairs'] <= record['newItems'] * record['trackedItems'] for record in records))
+
+    def test_arrays(self):
+        clock = [0.]
+        profiler = Profiler()
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], profiler=profiler, **PARAMS)
+        for time, poses, visibility in crowdFrames(2, frames=5):
+            clock[0] = time
+            tracker.updateFromArrays(poses, visibility=visibility, component_names=NAMES)
+            self.assertEqual(profiler.sink.records()[-1]['newItems'], len(poses))
+        self.assertEqual(profiler.frames, 5)
+
+    def test_malformed_per_tracker(self):
+        """ the malformed components of a tracker are only counted by its profiler """
+        trackers, profilers = [], []
+        for _ in range(2):
+            profilers.append(Profiler())
+            trackers.append(Tracker())
+            trackers[-1].setParams(profiler=profilers[-1], compute_items_orientation=True, **PARAMS)
+        for frame in range(3):
+            item = Item()
+            item.setComponent("c0", x=1., y=1., z=1.)  # without orientation
+            trackers[0].addItem(item)
+            trackers[0].updateTracking(float(frame))
+            trackers[1].addItem(frameItems(*crowdFrames(3, frames=1)[0][1:])[0])
+            trackers[1].updateTracking(float(frame))
+        self.assertEqual([record['malformed'] for record in profilers[0].sink.records()], [{'orientation': 1}] * 3)
+        self.assertEqual([record['malformed'] for record in profilers[1].sink.records()], [{}] * 3)
+        self.assertEqual(profilers[0].malformed, {'orientation': 3})
+
+
+class SinkTest(unittest.TestCase):
+
+    def test_ring_buffer(self):
+        sink = RingBuffer(3)
+        for frame in range(5):
+            sink(frame)
+        self.assertEqual(sink.records(), [2, 3, 4])
+
+    def test_histogram(self):
+        histogram = Histogram()
+        for value in [1e-3] * 98 + [0.5, 2.]:
+            histogram.add(value)
+        self.assertAlmostEqual(histogram.mean(), (98e-3 + 2.5) / 100)
+        self.assertLessEqual(histogram.percentile(50), 1.3e-3)
+        self.assertGreaterEqual(histogram.percentile(50), 1e-3)
+        self.assertEqual(histogram.percentile(100), 2.)
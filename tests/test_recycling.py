@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import unittest
+import numpy as np
+from item_tracking import Tracker, Item
+from item_tracking.recycling import ItemPool
+from .scenes import NAMES, crowdFrames, trackState, assertSameStates
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5, with_items_pose_smoothing=True,
+              with_components_pose_smoothing=True, with_lost_pool=True)
+
+
+def acquiredItems(poses, visibility, tracker):
+    """ :return: items of a frame of crowdFrames, as frameItems but acquired from the tracker """
+    items = []
+    for p, v in zip(poses, visibility):
+        item = tracker.acquireItem()
+        item.smooth_components_poses = tracker.with_components_pose_smoothing
+        item.components_smoothing_coeff = tracker.components_pose_smoothing_coeff
+        item.compute_speed_from_components_speeds = tracker.compute_speed_from_components_speeds
+        for k in np.flatnonzero(v).tolist():
+            item.setComponent(NAMES[k], x=p[k, 0], y=p[k, 1], z=p[k, 2], rx=p[k, 3], ry=p[k, 4], rz=p[k, 5])
+        items.append(item)
+    return items
+
+
+def componentStates(items):
+    """ :return: smoothed poses of the components of items, by name """
+    return [sorted((name, component.smoothed_x, component.smoothed_y) for name, component in item.components.items())
+            for item in items]
+
+
+class ItemPoolTest(unittest.TestCase):
+
+    def test_reset(self):
+        """ a released item is acquired as a new one, and its components too """
+        pool = ItemPool(capacity=1)
+        item = pool.acquireItem()
+        item.setComponent("c0", x=1., y=2., z=3.)
+        item.setID(4)
+        component = item.components["c0"]
+        pool.release(item)
+        pool.release(pool.acquireItem())  # discarded, the free list being full
+        again = pool.acquireItem("b", 1.)
+        self.assertIs(again, item)
+        self.assertEqual((again.components, again.getID(), again.name), ({}, None, "b"))
+        again.setComponent("c1", x=0., y=0., z=0.)
+        self.assertIs(again.components["c1"], component)
+        self.assertEqual(again.components["c1"].name, "c1")
+        self.assertEqual(pool.stats()['discarded'], 0)
+        self.assertEqual((pool.stats()['hits'], pool.stats()['misses']), (2, 1))
+
+    def test_not_pool_items(self):
+        pool = ItemPool()
+        pool.release(Item())
+        self.assertEqual(len(pool), 1)
+
+
+class TrackerPoolingTest(unittest.TestCase):
+    """ tracking with item_pool_size gives the tracks of tracking without it """
+
+    def states(self, frames, **params):
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], **dict(PARAMS, **params))
+        states = []
+        for time, poses, visibility in frames:
+            clock[0] = time
+            tracks = tracker.trackFrame(acquiredItems(poses, visibility, tracker)).tracks
+            states.append((trackState(tracks), componentStates(tracks)))
+        return tracker, states
+
+    def test_same_tracks(self):
+        frames = crowdFrames(0, frames=40)
+        _, expected = self.states(frames)
+        for size in (1, 10, 1000):
+            tracker, states = self.states(frames, item_pool_size=size)
+            assertSameStates([state for state, _ in expected], [state for state, _ in states])
+            self.assertEqual([components for _, components in states], [components for _, components in expected])
+            stats = tracker.itemPool.stats()
+            self.assertGreater(stats['hits'], 0)
+            self.assertLessEqual(stats['free'], size)
+            self.assertLessEqual(stats['live'], stats['hits'] + stats['misses'])
+
+    def test_steady_state(self):
+        """ once warmed up, the items of each frame come from the pool """
+        frames = crowdFrames(1, frames=30)
+        tracker, _ = self.states(frames[:10], item_pool_size=1000)
+        misses = tracker.itemPool.stats()['misses']
+        clock = [0.]
+        tracker.setParams(nowTime=lambda: clock[0])
+        for time, poses, visibility in frames[10:]:
+            clock[0] = time
+            tracker.trackFrame(acquiredItems(poses, visibility, tracker))
+        self.assertLessEqual(tracker.itemPool.stats()['misses'] - misses, 20)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from item_tracking import Tracker
+from item_tracking.item import Component
+from item_tracking.replay import Recorder, replay
+from .scenes import NAMES, crowdFrames, frameItems, trackState, assertSameStates
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5)
+
+
+class ReplayTest(unittest.TestCase):
+    """ replaying a log tracks its frames as the recorded run """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'frames.log')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def recordItems(self, **params):
+        """ :return: trackState of each frame of items with weights, hidden components and clouds, recorded in the log """
+        rng = np.random.RandomState(0)
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], recorder=Recorder(self.path), **dict(PARAMS, **params))
+        states = []
+        for time, poses, visibility in crowdFrames(0, frames=20):
+            clock[0] = time
+            items = frameItems(poses, visibility, tracker)
+            for i, item in enumerate(items):
+                if i % 5 == 0:
+                    item.setPointCloud(rng.randn(40, 3) * 0.1 + poses[i, 0, :3])
+                for component in item.components.values():
+                    component.distWeight, component.baryWeight = rng.uniform(.5, 2., 2)
+                    if rng.rand() < 0.1:
+                        component.status = Component.UNKNOWN
+            states.append(trackState(tracker.trackFrame(items).tracks))
+        tracker.recorder.close()
+        return states
+
+    def replayed(self, items=None, **params):
+        tracker = Tracker()
+        tracker.setParams(**dict(PARAMS, **params))
+        now = tracker.now
+        states = [trackState(result.tracks) for result in replay(tracker, self.path, items)]
+        self.assertEqual(tracker.now, now)
+        return states
+
+    def test_items(self):
+        for params in (dict(), dict(with_lost_pool=True, with_components_pose_smoothing=True)):
+            assertSameStates(self.recordItems(**params), self.replayed(**params))
+            os.remove(self.path)
+
+    def test_array_mode_unsupported(self):
+        self.recordItems()
+        with self.assertRaises(ValueError):
+            self.replayed(items=False)
+
+    def test_arrays(self):
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], recorder=Recorder(self.path), **PARAMS)
+        expected = []
+        for time, poses, visibility in crowdFrames(1, frames=20):
+            clock[0] = time
+            expected.append(tracker.trackFrame(dict(poses=poses, visibility=visibility, component_names=NAMES)).tracks.ids.tolist())
+        tracker.recorder.close()
+        tracker = Tracker()
+        tracker.setParams(**PARAMS)
+        now = tracker.now
+        self.assertEqual([result.tracks.ids.tolist() for result in replay(tracker, self.path)], expected)
+        self.assertEqual(tracker.now, now)
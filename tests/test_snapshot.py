@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import io
+import unittest
+import numpy as np
+from item_tracking import Tracker, Item
+from .scenes import NAMES, crowdFrames, track, trackState, assertSameStates
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5)
+
+
+class SnapshotTest(unittest.TestCase):
+    """ a tracker restored from a snapshot tracks the next frames as the tracker saved """
+
+    def roundTrip(self, frames, split, trackFrames, **params):
+        """ :return: results of the frames after split, of the saved tracker and of the restored one """
+        clock = [0.]
+        saved = Tracker()
+        saved.setParams(nowTime=lambda: clock[0], **dict(PARAMS, **params))
+        trackFrames(saved, frames[:split], clock)
+        snapshot = io.BytesIO()
+        saved.saveState(snapshot)
+        snapshot.seek(0)
+        restored = Tracker()
+        restored.setParams(with_kalman=True)
+        restored.kalman.update([1, 2, 3], np.zeros((3, 3)), 0.)  # state of another run, replaced by loadState
+        restored.loadState(snapshot)
+        restored.setParams(nowTime=lambda: clock[0])
+        return trackFrames(saved, frames[split:], clock), trackFrames(restored, frames[split:], clock)
+
+    def test_items(self):
+        assertSameStates(*self.roundTrip(crowdFrames(0), 20, track))
+
+    def test_lost_pool_smoothing(self):
+        assertSameStates(*self.roundTrip(crowdFrames(1), 20, track, with_lost_pool=True, with_items_pose_smoothing=True,
+                                         with_components_pose_smoothing=True, items_pose_smoothing_coeff=0.6))
+
+    def test_kalman(self):
+        for params in (dict(), dict(with_lost_pool=True), dict(kalman_gate=9.)):
+            assertSameStates(*self.roundTrip(crowdFrames(2), 20, track, with_kalman=True, **params))
+
+    def test_point_clouds(self):
+        rng = np.random.RandomState(0)
+        shapes = [rng.randn(100, 3) * 0.2 for _ in range(6)]
+
+        def trackClouds(tracker, frames, clock):
+            states = []
+            for time, poses, visibility in frames:
+                clock[0] = time
+                items = []
+                for p, shape in zip(poses, shapes):
+                    item = Item()
+                    item.setPointCloud(shape + p[0, :3])
+                    items.append(item)
+                states.append(trackState(tracker.trackFrame(items).tracks))
+            return states
+
+        for params in (dict(), dict(voxel_size=0.1), dict(with_lost_pool=True)):
+            assertSameStates(*self.roundTrip(crowdFrames(3, count=6), 20, trackClouds, **params))
+
+    def test_arrays(self):
+        def trackArrays(tracker, frames, clock):
+            states = []
+            for time, poses, visibility in frames:
+                clock[0] = time
+                states.append(np.column_stack(tracker.trackFrame(dict(poses=poses, visibility=visibility, component_names=NAMES)).tracks).tolist())
+            return states
+
+        expected, actual = self.roundTrip(crowdFrames(4), 20, trackArrays, with_kalman=True)
+        self.assertEqual(len(expected), len(actual))
+        for e, a in zip(expected, actual):
+            np.testing.assert_array_equal(a, e)
+
+    def test_restore_ids(self):
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], **PARAMS)
+        track(tracker, crowdFrames(5, frames=10), clock)
+        snapshot = io.BytesIO()
+        tracker.saveState(snapshot)
+        snapshot.seek(0)
+        restored = Tracker()
+        restored.loadState(snapshot)
+        self.assertEqual(restored.maxID, tracker.maxID)
+        self.assertTrue(tracker.trackedItems)
+        assertSameStates([trackState(tracker.trackedItems)], [trackState(restored.trackedItems)])
+
+    def test_angular_speeds(self):
+        clock = [0.]
+        tracker = Tracker()
+        tracker.setParams(nowTime=lambda: clock[0], compute_items_orientation=True, **PARAMS)
+        track(tracker, crowdFrames(6, frames=10), clock)
+        snapshot = io.BytesIO()
+        tracker.saveState(snapshot)
+        snapshot.seek(0)
+        restored = Tracker()
+        restored.loadState(snapshot)
+        speeds = [(item.drx, item.dry, item.drz) for item in tracker.trackedItems]
+        self.assertTrue(any(speed != (None, None, None) for speed in speeds))
+        self.assertEqual([(item.drx, item.dry, item.drz) for item in restored.trackedItems], speeds)
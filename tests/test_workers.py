@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+import sys
+import unittest
+import numpy as np
+from item_tracking import Tracker
+from .scenes import NAMES, crowdFrames
+
+
+PARAMS = dict(thresholdDist=0.8, time_add=0.25, time_del=0.5)
+
+
+def arrayFrame(time, poses, visibility):
+    return dict(poses=poses, visibility=visibility, component_names=NAMES, timestamp=time)
+
+
+@unittest.skipIf(sys.version_info < (3, 8), "shared memory needs python 3.8")
+class TrackerPoolTest(unittest.TestCase):
+    """ the tracks of each scene of a pool are those of a tracker of the scene alone """
+
+    def assertSameTracks(self, tracks, expected):
+        for field, expectedField in zip(tracks, expected):
+            np.testing.assert_array_equal(field, expectedField)
+
+    def test_serial(self):
+        """ including scenes without a frame at some update """
+        from item_tracking.workers import TrackerPool
+        scenes = dict(("camera%d" % s, crowdFrames(s, count=10 + 5 * s, frames=15)) for s in range(3))
+        seen = dict((scene, [f for f in range(15) if f % 4 or scene != "camera1"]) for scene in scenes)
+        expected = dict()
+        for scene, frames in scenes.items():
+            tracker = Tracker()
+            tracker.setParams(**PARAMS)
+            expected[scene] = dict((f, tracker.updateFromArrays(frames[f][1], visibility=frames[f][2], component_names=NAMES,
+                                                                timestamp=frames[f][0])) for f in seen[scene])
+        with TrackerPool(sorted(scenes), workers=2, **PARAMS) as pool:
+            for f in range(15):
+                frames = dict((scene, arrayFrame(*scenes[scene][f])) for scene in scenes if f in seen[scene])
+                tracks = pool.update(frames)
+                self.assertEqual(sorted(tracks), sorted(frames))
+                for scene in frames:
+                    self.assertSameTracks(tracks[scene], expected[scene][f])
+
+    def test_error(self):
+        """ the error of a scene is raised, the other scenes go on """
+        from item_tracking.workers import TrackerPool
+        (time, poses, visibility), = crowdFrames(4, frames=1)
+        with TrackerPool(["a", "b"], **PARAMS) as pool:
+            with self.assertRaises(RuntimeError):
+                pool.update(dict(a=arrayFrame(time, poses, visibility), b=dict(poses=poses, component_names=NAMES[:2])))
+            self.assertEqual(len(pool.update(dict(a=arrayFrame(time + .1, poses, visibility)))["a"].ids), len(poses))